@@ -1,12 +1,26 @@
 # ---------------------------------------------------------------------
 # skidl_netlist_loader.py  –  works on KiCad 6 … 9, zero external deps
+# usage:  python a.py [netlist.net [board.kicad_pcb]]   (or $SKIDL_NET)
 # ---------------------------------------------------------------------
-import pcbnew, re, pathlib
+import os, pcbnew, re, pathlib, sys
+from netlist_check import FATAL, check, errors, pad_sets
 
-NET = r"C:\Users\kerem\Documents\pcb projects\Sifirdan\create_schematic.net"
-BOARD_FILE = "demo.kicad_pcb"
+NET = sys.argv[1] if len(sys.argv) > 1 else os.environ.get("SKIDL_NET", "create_schematic.net")
+BOARD_FILE = sys.argv[2] if len(sys.argv) > 2 else "demo.kicad_pcb"
 MM = pcbnew.FromMM
 
+# -------------- 0. pre-flight: every (ref, pin) must have a pad ------
+# pads from the KiCad footprint libraries ($KICAD*_FOOTPRINT_DIR) and fp-info-cache
+pads = pad_sets(NET)
+problems = check(NET, pads)
+if pads.cache.dirty:
+    pads.cache.save()
+for p in errors(problems):
+    print(f"⚠ {p['kind']}: {p['ref']} pin {p['pin']} ({p['footprint']}) {p['detail']}")
+bad = errors(problems, FATAL)
+if bad:
+    sys.exit(f"{len(bad)} netlist/footprint mismatches – fix them before building {BOARD_FILE}")
+
 # -------------- 1. grab components & footprints ----------------------
 with open(NET, encoding="utf-8") as f:
     txt = f.read()
@@ -46,6 +60,9 @@ for nname, nodes in nets.items():
     netcode = net_objs[nname].GetNet()
     for ref, pin in nodes:
         pad = board.FindFootprintByReference(ref).FindPadByNumber(pin)
+        if pad is None:                           # pre-flight only had pad counts
+            print(f"⚠ {ref} has no pad {pin} (net {nname})")
+            continue
         pad.SetNetCode(netcode)
 
 board.BuildConnectivity()
@@ -0,0 +1,283 @@
+# ---------------------------------------------------------------------
+# anneal.py  –  simulated-annealing placer minimizing HPWL
+# ---------------------------------------------------------------------
+"""
+Wirelength-driven placement on the same slot grid the family-row placer
+uses, so results stay on pitch.  A slot holds one part, but parts larger
+than the pitch still overlap their neighbours; :func:`run` therefore
+finishes with :func:`spatial_index.legalize`, as :func:`placement.place`
+does.
+
+A move picks a part and a slot within a shrinking window; if the slot is
+taken the two parts swap.  Only the nets touching the moved parts are
+re-measured (one gather + ``reduceat`` over their pins, index arrays
+precomputed per part), so a move costs the sum of their degrees instead
+of a full HPWL pass.  Very high fanout nets
+(GND, power rails) are left out of the cost by default — they go to
+planes and would otherwise dominate every move.
+
+The family rows of :mod:`placement` stay usable as a soft constraint:
+each part pays ``row_weight`` × its distance from its family's row.
+The temperature schedule and window limiter follow VPR.
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+import placement
+from board_model import Board
+from spatial_index import legalize
+from wirelength import NetTable
+
+MAX_DEGREE = 32
+
+
+def slot_grid(layout, n):
+    """Slot centres ``(xs, ys)`` for a layout; y runs top row first."""
+    if layout.fixed:
+        left, right = layout.margin, layout.width - layout.margin
+        bottom, top = layout.margin, layout.height - layout.margin
+        xs = np.arange(left, right + 1e-9, layout.pitch_x)
+        ys = top - np.arange(0, top - bottom + 1e-9, layout.pitch_y)
+    else:
+        side = max(int(math.ceil(math.sqrt(1.5 * n))), 1)
+        xs = np.arange(side) * layout.pitch_x
+        ys = np.arange(side) * layout.pitch_y
+    if len(xs) * len(ys) < n:
+        raise ValueError(f"{n} parts do not fit {len(xs)} × {len(ys)} slots at this pitch")
+    return xs, ys
+
+
+def row_targets(refs, layout):
+    rows = placement.row_numbers(refs, layout)
+    if layout.fixed:
+        return layout.height - layout.margin - rows * layout.pitch_y
+    return rows * layout.pitch_y
+
+
+def _initial_slots(xy, xs, ys, movable=None):
+    """Snap positions to slots, bumping collisions to the next free slot.
+
+    Parts not in ``movable`` take no slot (``slot`` -1).
+    """
+    nx, ny = len(xs), len(ys)
+    ix = np.clip(np.rint((xy[:, 0] - xs[0]) / (xs[1] - xs[0] if nx > 1 else 1)), 0, nx - 1)
+    iy = np.clip(np.rint((xy[:, 1] - ys[0]) / (ys[1] - ys[0] if ny > 1 else 1)), 0, ny - 1)
+    want = (iy * nx + ix).astype(np.int64)
+    occ = np.full(nx * ny, -1, dtype=np.int64)
+    slot = np.full(len(xy), -1, dtype=np.int64)
+    for i, s in enumerate(want.tolist()):
+        if movable is not None and not movable[i]:
+            continue
+        while occ[s] >= 0:
+            s = (s + 1) % len(occ)
+        occ[s] = i
+        slot[i] = s
+    return slot, occ
+
+
+def anneal(board, layout=placement.LAYOUTS["d"], row_weight=0.5, max_degree=MAX_DEGREE,
+           effort=1.0, seed=0, time_limit=None, start=None, verbose=True,
+           temperature=None, window=None):
+    """Anneal ``board``; returns ``(xy, rot, stats)`` without touching the board.
+
+    Locked footprints keep their ``start`` position (default: where they
+    are on the board) and take no slot, so they can also serve as fixed
+    anchors outside the grid; the grid only seeds the movable ones.
+    ``temperature`` / ``window`` (slots) start a cooler, more local run
+    instead of the default hot start — for refining a given ``start``.
+    """
+    rng = np.random.default_rng(seed)
+    refs = board.refs
+    n = len(refs)
+    nets = NetTable(board, max_degree)
+    movable = np.array([not fp.locked for fp in board.footprints], dtype=bool)
+    movable_idx = np.flatnonzero(movable)
+    xs, ys = slot_grid(layout, len(movable_idx))
+    nx = len(xs)
+    here, rot = board.placement()
+    if start is None:
+        start = here
+        start[movable_idx] = placement.grid(board, layout)[0][movable_idx]
+    xy = np.array(start, dtype=float).reshape(-1, 2)
+    slot, occ = _initial_slots(xy, xs, ys, movable)
+    target_y = row_targets(refs, layout)
+
+    slot_x, slot_y = xs.tolist(), ys.tolist()
+    xy[movable_idx] = np.stack([xs[slot[movable_idx] % nx], ys[slot[movable_idx] // nx]], 1)
+    pin_xy = nets.pin_xy(xy, rot)
+    pin_off = pin_xy - xy[nets.pin_fp]
+    fp_pins = [nets.fp_pin[nets.fp_pin_ptr[i]:nets.fp_pin_ptr[i + 1]] for i in range(n)]
+    net_pins = [nets.net_pin[nets.net_ptr[k]:nets.net_ptr[k + 1]] for k in range(nets.n_nets)]
+    fp_nets = [frozenset(nets.nets_of(i).tolist()) for i in range(n)]
+
+    def gather(net_ids):
+        """Concatenated pin indices + segment starts for a set of nets."""
+        segs = [net_pins[k] for k in net_ids]
+        if not segs:
+            return None
+        lens = [len(p) for p in segs]
+        return np.concatenate(segs), np.cumsum([0] + lens[:-1])
+
+    fp_gather = [gather(sorted(fp_nets[i])) for i in range(n)]
+
+    def wire(g):
+        if g is None:
+            return 0.0
+        p = pin_xy[g[0]]
+        return float((np.maximum.reduceat(p, g[1]) - np.minimum.reduceat(p, g[1])).sum())
+
+    target = target_y.tolist()
+    ys_of = [0.0] * n
+
+    def cost_total():
+        return (float(nets.per_net(pin_xy).sum())
+                + row_weight * float(np.abs(xy[:, 1] - target_y).sum()))
+
+    def move_part(i, s):
+        x, y = slot_x[s % nx], slot_y[s // nx]
+        xy[i] = x, y
+        ys_of[i] = y
+        p = fp_pins[i]
+        if len(p):
+            pin_xy[p] = pin_off[p] + (x, y)
+
+    for i in range(n):
+        ys_of[i] = float(xy[i, 1])
+
+    def try_move(a, s_new, temperature, u):
+        """Move part a to slot s_new (swapping with its occupant); Metropolis accept."""
+        s_old = int(slot[a])
+        b = int(occ[s_new])
+        if b == a or (b >= 0 and not movable[b]):
+            return 0.0, False
+        if b < 0:
+            g = fp_gather[a]
+        elif fp_nets[a].isdisjoint(fp_nets[b]):
+            ga, gb = fp_gather[a], fp_gather[b]
+            g = ga if gb is None else gb if ga is None else (
+                np.concatenate([ga[0], gb[0]]), np.concatenate([ga[1], gb[1] + len(ga[0])]))
+        else:
+            g = gather(sorted(fp_nets[a] | fp_nets[b]))
+        before = wire(g) + row_weight * abs(ys_of[a] - target[a])
+        if b >= 0:
+            before += row_weight * abs(ys_of[b] - target[b])
+        move_part(a, s_new)
+        if b >= 0:
+            move_part(b, s_old)
+        after = wire(g) + row_weight * abs(ys_of[a] - target[a])
+        if b >= 0:
+            after += row_weight * abs(ys_of[b] - target[b])
+        delta = after - before
+        if delta <= 0 or (temperature > 0 and u < math.exp(-delta / temperature)):
+            slot[a], occ[s_new], occ[s_old] = s_new, a, b
+            if b >= 0:
+                slot[b] = s_old
+            return delta, True
+        move_part(a, s_old)
+        if b >= 0:
+            move_part(b, s_new)
+        return delta, False
+
+    t0 = time.perf_counter()
+    hpwl0 = float(nets.per_net(pin_xy).sum())
+    cost = cost_total()
+    if len(movable_idx) < 2 or nets.n_nets == 0:
+        return xy, rot, {"hpwl0": hpwl0, "hpwl": hpwl0, "cost": cost, "moves": 0,
+                         "seconds": 0.0}
+
+    n_slots = len(occ)
+    ny = len(ys)
+    max_r = max(nx, ny)
+    radius = float(min(window, max_r) if window else max_r)
+
+    def batch(count):
+        """Pre-drawn random parts, window offsets and acceptance draws."""
+        r = max(int(radius), 1)
+        return (movable_idx[rng.integers(len(movable_idx), size=count)].tolist(),
+                rng.integers(-r, r + 1, size=count).tolist(),
+                rng.integers(-r, r + 1, size=count).tolist(),
+                rng.random(count).tolist())
+
+    def target_slot(a, dx, dy):
+        s = int(slot[a])
+        tx = min(max(s % nx + dx, 0), nx - 1)
+        ty = min(max(s // nx + dy, 0), ny - 1)
+        return ty * nx + tx
+
+    if temperature is None:
+        # initial temperature: 20 × std-dev of random move deltas
+        deltas = []
+        for a, s in zip(batch(min(len(movable_idx), 200))[0],
+                        rng.integers(n_slots, size=200).tolist()):
+            d, ok = try_move(a, s, float("inf"), 0.0)
+            deltas.append(d)
+            cost += d if ok else 0.0
+        temperature = 20 * float(np.std(deltas)) or 1.0
+
+    inner = max(int(effort * len(movable_idx) ** (4 / 3)), 10)
+    moves = 0
+    while True:
+        accepted = 0
+        for a, dx, dy, u in zip(*batch(inner)):
+            d, ok = try_move(a, target_slot(a, dx, dy), temperature, u)
+            if ok:
+                accepted += 1
+                cost += d
+        moves += inner
+        rate = accepted / inner
+        radius = min(max(radius * (1 - 0.44 + rate), 1.0), max_r)
+        temperature *= 0.5 if rate > 0.96 else 0.9 if rate > 0.8 else 0.95 if rate > 0.15 else 0.8
+        if verbose:
+            print(f"  T={temperature:9.3f}  cost={cost:10.1f}  accept={rate:5.1%}  window={radius:4.1f}")
+        if temperature < 0.005 * cost / max(nets.n_nets, 1):
+            break
+        if time_limit and time.perf_counter() - t0 > time_limit:
+            break
+
+    # final greedy pass at T = 0
+    for a, dx, dy, u in zip(*batch(len(movable_idx))):
+        try_move(a, target_slot(a, dx, dy), 0.0, u)
+    stats = {"hpwl0": hpwl0, "hpwl": float(nets.per_net(pin_xy).sum()),
+             "cost": cost_total(), "moves": moves, "seconds": time.perf_counter() - t0}
+    return xy, rot, stats
+
+
+def run(layout, path=None, out=None, **kw):
+    board = Board.load(path) if path else Board.from_pcbnew()
+    xy, rot, stats = anneal(board, layout, **kw)
+    bounds = (0, 0, layout.width, layout.height) if layout.fixed else None
+    xy, moved = legalize(board, xy, rot, bounds)
+    if moved:
+        print(f"  legalized {len(moved)} overlapping or off-board footprints")
+    locked = np.array([fp.locked for fp in board.footprints], dtype=bool)
+    shifted = [board.refs[i] for i in np.flatnonzero(
+        locked & (np.abs(xy - board.placement()[0]) > 1e-9).any(1)).tolist()]
+    if shifted:
+        raise SystemExit(f"⚠ locked footprints moved: {', '.join(shifted)}")
+    board.set_placement(xy, rot)
+    if layout.fixed:
+        board.set_outline(0, 0, layout.width, layout.height)
+    else:
+        board.set_outline(*placement.fitted_outline(board, xy, rot, layout.fit_margin))
+    board.commit(out)
+    print(f"✓ annealed {len(board.footprints)} footprints: HPWL {stats['hpwl0']:.1f} → "
+          f"{stats['hpwl']:.1f} mm in {stats['moves']} moves, {stats['seconds']:.2f} s")
+    return board
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="HPWL simulated-annealing placement")
+    ap.add_argument("board", nargs="?", help=".kicad_pcb file (default: board open in KiCad)")
+    ap.add_argument("-o", "--output")
+    ap.add_argument("--layout", choices=sorted(placement.LAYOUTS), default="d")
+    ap.add_argument("--row-weight", type=float, default=0.5,
+                    help="pull towards family rows (0 = pure wirelength)")
+    ap.add_argument("--effort", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--time-limit", type=float)
+    args = ap.parse_args()
+    run(placement.LAYOUTS[args.layout], args.board, args.output, row_weight=args.row_weight,
+        effort=args.effort, seed=args.seed, time_limit=args.time_limit)
@@ -1,6 +1,10 @@
 import pcbnew
 import wx
 
+import maze_router
+from board_model import Board
+from board_txn import Transaction
+
 def layout_board_in_console():
     """
     This function runs inside the KiCad Python Console to automate PCB layout.
@@ -21,43 +25,16 @@ def layout_board_in_console():
     C_REF = 'C1'
     LED_REF = 'D1'
 
+    # All edits are queued on one transaction and applied together at the
+    # end: one connectivity rebuild, one refresh (see board_txn.py).
+    txn = Transaction(pcb, verbose=True)
+
     # --- Step 2: Define the Board Outline ---
-    # We create line segments on the Edge.Cuts layer.
+    # Existing Edge.Cuts segments are reused/replaced, so no duplicates.
     print("Defining board outline on Edge.Cuts layer...")
-    seg = pcbnew.DRAWSEGMENT(board)
-    seg.SetLayer(pcbnew.Edge_Cuts)
-    start = pcbnew.VECTOR2I(pcbnew.FromMM(10), pcbnew.FromMM(20))
-    end   = pcbnew.VECTOR2I(pcbnew.FromMM(50), pcbnew.FromMM(60))
-
-    seg.SetStart(start)
-    seg.SetEnd(end)
-
-    board.Add(seg)
-    pcbnew.Refresh()
-
-
-    
-    # First, remove any existing outline segments to avoid duplicates
-    for drawing in pcb.GetDrawings():
-        if drawing.GetLayer() == pcbnew.Edge_Cuts:
-            pcb.Remove(drawing)
-
-    points = [
-        pcbnew.wxPointMM(100, 100),
-        pcbnew.wxPointMM(130, 100),
-        pcbnew.wxPointMM(130, 125),
-        pcbnew.wxPointMM(100, 125)
-    ]
-
-    for i in range(len(points)):
-        start_point = points[i]
-        end_point = points[(i + 1) % len(points)] # Wrap around to close the rectangle
-        segment = pcbnew.PCB_SHAPE(pcb, pcbnew.SHAPE_T_SEGMENT)
-        segment.SetStart(start_point)
-        segment.SetEnd(end_point)
-        segment.SetLayer(pcbnew.Edge_Cuts)
-        segment.SetWidth(int(0.15 * 1e6)) # Width in nanometers
-        pcb.Add(segment)
+    points = [(100, 100), (130, 100), (130, 125), (100, 125)]
+    txn.set_outline([points[i] + points[(i + 1) % len(points)]   # wrap around to close
+                     for i in range(len(points))])
 
     # --- Step 3: Place Components ---
     print("Placing components...")
@@ -66,67 +43,49 @@ def layout_board_in_console():
     c1 = pcb.FindModule(C_REF)
 
     if r1:
-        r1.SetPosition(pcbnew.wxPointMM(105, 110))
-        r1.SetOrientationDegrees(90)
+        txn.move(r1, 105, 110)
+        txn.rotate(r1, 90)
         print(f"Placed {R_REF}")
     else:
         print(f"Warning: Could not find {R_REF}")
 
     if d1:
-        d1.SetPosition(pcbnew.wxPointMM(115, 110))
-        d1.SetOrientationDegrees(-90)
+        txn.move(d1, 115, 110)
+        txn.rotate(d1, -90)
         print(f"Placed {LED_REF}")
     else:
         print(f"Warning: Could not find {LED_REF}")
 
     if c1:
-        c1.SetPosition(pcbnew.wxPointMM(125, 110))
-        c1.SetOrientationDegrees(90)
+        txn.move(c1, 125, 110)
+        txn.rotate(c1, 90)
         print(f"Placed {C_REF}")
     else:
         print(f"Warning: Could not find {C_REF}")
 
+    # pads must be at their new positions before tracks are drawn to them
+    txn.commit(final=False)
+
     # --- Step 4: Route the Tracks ---
-    print("Routing tracks on F.Cu (Front Copper) layer...")
-    
+    # Maze-routed on both copper layers around pads and existing copper
+    # (see maze_router.py) instead of straight pad-to-pad segments.
+    print("Routing the R1/D1/C1 nets on F.Cu / B.Cu...")
+
     if not all([r1, d1, c1]):
         print("\nError: One or more components not found. Skipping routing.")
     else:
-        # Helper function to create a track
-        def route_track(pad1, pad2):
-            track = pcbnew.PCB_TRACK(pcb)
-            track.SetStart(pad1.GetPosition())
-            track.SetEnd(pad2.GetPosition())
-            track.SetWidth(int(0.25 * 1e6)) # 0.25mm width in nanometers
-            track.SetLayer(pcbnew.F_Cu)
-            pcb.Add(track)
-            # Associate track with the net from the pad
-            track.SetNet(pad1.GetNet())
-
-        # Net: GND (C1 pin 2 to D1 pin 2)
-        try:
-            print(f"Attempting to route GND between {C_REF} pin 2 and {LED_REF} pin 2...")
-            route_track(c1.Pads()[1], d1.Pads()[1])
-            print(" -> GND route successful.")
-        except Exception as e:
-            print(f" -> Error routing GND net: {e}")
-
-        # Net: SIGNAL (R1 pin 2 -> D1 pin 1 -> C1 pin 1)
-        try:
-            print(f"Attempting to route SIGNAL from {R_REF} to {LED_REF}...")
-            route_track(r1.Pads()[1], d1.Pads()[0])
-            print(" -> R1-D1 route successful.")
-            
-            print(f"Attempting to route SIGNAL from {LED_REF} to {C_REF}...")
-            route_track(d1.Pads()[0], c1.Pads()[0])
-            print(" -> D1-C1 route successful.")
-        except Exception as e:
-            print(f" -> Error routing SIGNAL net: {e}")
+        board = Board.from_pcbnew(pcb)
+        nets = sorted({p.GetNetname() for fp in (r1, d1, c1) for p in fp.Pads()
+                       if p.GetNetname()})
+        report = maze_router.route(board, nets=nets)
+        for name in report["failed"]:
+            print(f" -> Error routing {name}: {report['nets'][name]['failed']}")
+        board.apply(txn=txn)          # queue the new tracks and vias
 
     # --- Step 5: Refresh the View ---
-    # This updates the editor window to show the changes.
+    # Adds the tracks, rebuilds connectivity once and refreshes the editor.
     print("\nRefreshing PCB Editor view...")
-    pcbnew.Refresh()
+    txn.commit()
     print("--- Script Finished Successfully ---")
 
 # --- Execute the function ---
@@ -0,0 +1,616 @@
+# ---------------------------------------------------------------------
+# board_model.py  –  headless board model for the layout scripts
+# ---------------------------------------------------------------------
+"""
+One in-memory view of a board that the placement/routing/check scripts
+share, whether the board came from a ``.kicad_pcb`` file (no KiCad
+needed) or from the board open in the KiCad editor (``pcbnew``).
+
+Positions are millimetres, y grows downwards, rotation is degrees CCW as
+shown in the editor — the same conventions as the file format.  Anything
+that scales with part or pad count is exposed as NumPy arrays
+(:meth:`Board.placement`, :meth:`Board.pads`, :meth:`Board.bboxes`) so
+callers compute in one vectorized pass and write back with
+:meth:`Board.set_placement`, then :meth:`Board.save` / :meth:`Board.apply`.
+"""
+import math
+import uuid
+
+import numpy as np
+
+import sexpr
+from sexpr import QStr
+
+EDGE = "Edge.Cuts"
+COPPER = ("F.Cu", "B.Cu")
+_GRAPHICS = ("fp_line", "fp_rect", "fp_poly", "fp_circle", "fp_arc")
+_BOARD_GRAPHICS = ("gr_line", "gr_rect", "gr_poly", "gr_circle", "gr_arc")
+
+
+class Pad:
+    __slots__ = ("number", "x", "y", "angle", "w", "h", "shape", "kind",
+                 "layers", "net", "drill", "function")
+
+    def __init__(self, number, x, y, w, h, angle=0.0, shape="rect",
+                 kind="smd", layers=("F.Cu",), net="", drill=0.0, function=""):
+        self.number, self.x, self.y = number, x, y          # local, unrotated
+        self.w, self.h, self.angle = w, h, angle            # angle relative to footprint
+        self.shape, self.kind, self.layers = shape, kind, tuple(layers)
+        self.net, self.drill = net, drill
+        self.function = function                            # symbol pin name, e.g. PS_DDR4_DQ0_504
+
+
+class Footprint:
+    __slots__ = ("ref", "fpid", "value", "x", "y", "rot", "side", "locked",
+                 "pads", "bbox", "sheet", "_rot0", "_side0", "_node")
+
+    def __init__(self, ref, fpid="", x=0.0, y=0.0, rot=0.0, side="F",
+                 pads=(), bbox=None, value="", locked=False, sheet=""):
+        self.ref, self.fpid, self.value = ref, fpid, value
+        self.x, self.y, self.rot, self._rot0 = x, y, rot, rot
+        self.side, self.locked, self.sheet = side, locked, sheet
+        self._side0 = side
+        self.pads = list(pads)
+        self.bbox = bbox or _pad_extent(self.pads)          # local xmin,ymin,xmax,ymax
+        self._node = None
+
+
+class Track:
+    __slots__ = ("x1", "y1", "x2", "y2", "width", "layer", "net", "_node")
+
+    def __init__(self, x1, y1, x2, y2, width, layer, net=""):
+        self.x1, self.y1, self.x2, self.y2 = x1, y1, x2, y2
+        self.width, self.layer, self.net = width, layer, net
+        self._node = None
+
+
+class Via:
+    __slots__ = ("x", "y", "size", "drill", "layers", "net", "_node")
+
+    def __init__(self, x, y, size, drill, layers=("F.Cu", "B.Cu"), net=""):
+        self.x, self.y, self.size, self.drill = x, y, size, drill
+        self.layers, self.net = tuple(layers), net
+        self._node = None
+
+
+def _pad_extent(pads):
+    if not pads:
+        return (-0.5, -0.5, 0.5, 0.5)
+    xs = [p.x for p in pads]
+    ys = [p.y for p in pads]
+    hw = [max(p.w, p.h) / 2 for p in pads]
+    return (min(x - h for x, h in zip(xs, hw)), min(y - h for y, h in zip(ys, hw)),
+            max(x + h for x, h in zip(xs, hw)), max(y + h for y, h in zip(ys, hw)))
+
+
+def copper_layers(pad, side="F"):
+    """Copper layers a pad is on: through-hole and ``*.Cu`` pads are on both."""
+    if "*.Cu" in pad.layers or pad.kind == "thru_hole" or \
+            ("F.Cu" in pad.layers and "B.Cu" in pad.layers):
+        return COPPER
+    if "B.Cu" in pad.layers:
+        return ("B.Cu",)
+    if "F.Cu" in pad.layers:
+        return ("F.Cu",)
+    return ("B.Cu",) if side == "B" else ("F.Cu",)
+
+
+def flip_layer(name):
+    """``F.Cu`` ↔ ``B.Cu``, ``F.SilkS`` ↔ ``B.SilkS``, …; others unchanged."""
+    if name.startswith("F."):
+        return "B." + name[2:]
+    if name.startswith("B."):
+        return "F." + name[2:]
+    return name
+
+
+def flip(fp):
+    """Move ``fp`` to the other side the way KiCad's *Flip* does: local y
+    mirrored, pad angles negated, orientation ``180 - rot`` — so the world
+    geometry is mirrored left/right about the footprint origin.  Pads are
+    replaced, not edited (:meth:`Board.detached` copies share them)."""
+    fp.pads = [Pad(p.number, p.x, -p.y, p.w, p.h, (-p.angle) % 360, p.shape, p.kind,
+                   [flip_layer(l) for l in p.layers], p.net, p.drill, p.function)
+               for p in fp.pads]
+    x0, y0, x1, y1 = fp.bbox
+    fp.bbox = (x0, -y1, x1, -y0)
+    fp.rot = (180 - fp.rot) % 360
+    fp.side = "F" if fp.side == "B" else "B"
+
+
+def rotate(local, rot_deg):
+    """Rotate local (..., 2) offsets by per-row angles (degrees, CCW on screen)."""
+    a = np.radians(rot_deg)
+    c, s = np.cos(a), np.sin(a)
+    x, y = local[..., 0], local[..., 1]
+    return np.stack([x * c + y * s, -x * s + y * c], axis=-1)
+
+
+# ── file backend ─────────────────────────────────────────────────────────
+def _net_name(n, nets):
+    """``(net 3 "GND")`` (KiCad 6-9), ``(net "GND")`` or ``(net 3)``."""
+    net = sexpr.find(n, "net")
+    if net is None or len(net) < 2:
+        return ""
+    if len(net) > 2:
+        return str(net[2])
+    if isinstance(net[1], QStr):
+        return str(net[1])
+    return nets.get(int(net[1]), "")
+
+
+def _pad_from_node(n, nets):
+    at = sexpr.floats(n, "at", 3)
+    size = sexpr.floats(n, "size", 2)
+    layers = sexpr.find(n, "layers")
+    drill = sexpr.find(n, "drill")
+    drill_d = 0.0
+    if drill is not None:
+        nums = [v for v in drill[1:] if not isinstance(v, list) and v != "oval"]
+        drill_d = float(nums[0]) if nums else 0.0
+    return Pad(str(n[1]), at[0], at[1], size[0], size[1], at[2],
+               shape=str(n[3]) if len(n) > 3 else "rect", kind=str(n[2]),
+               layers=[str(x) for x in layers[1:]] if layers else (),
+               net=_net_name(n, nets), drill=drill_d,
+               function=str(sexpr.value(n, "pinfunction", "")))
+
+
+def _courtyard(node):
+    xs, ys = [], []
+    for g in node:
+        if not (isinstance(g, list) and g and g[0] in _GRAPHICS):
+            continue
+        layer = str(sexpr.value(g, "layer", ""))
+        if not layer.endswith("CrtYd"):
+            continue
+        if g[0] == "fp_circle":
+            cx, cy = sexpr.floats(g, "center")
+            ex, ey = sexpr.floats(g, "end")
+            r = math.hypot(ex - cx, ey - cy)
+            xs += [cx - r, cx + r]
+            ys += [cy - r, cy + r]
+        elif g[0] == "fp_poly":
+            for xy in sexpr.find_all(sexpr.find(g, "pts") or [], "xy"):
+                xs.append(float(xy[1]))
+                ys.append(float(xy[2]))
+        else:
+            for key in ("start", "end", "mid"):
+                if sexpr.find(g, key) is not None:
+                    x, y = sexpr.floats(g, key)
+                    xs.append(x)
+                    ys.append(y)
+    if not xs:
+        return None
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _footprint_from_node(n, nets):
+    at = sexpr.floats(n, "at", 3)
+    props = {str(p[1]): str(p[2]) for p in sexpr.find_all(n, "property") if len(p) > 2}
+    ref = props.get("Reference", "")
+    for t in sexpr.find_all(n, "fp_text"):          # KiCad 6/7 files
+        if len(t) > 2 and t[1] == "reference":
+            ref = str(t[2])
+    pads = [_pad_from_node(p, nets) for p in sexpr.find_all(n, "pad")]
+    for p in pads:                                  # file stores absolute pad angles
+        p.angle = (p.angle - at[2]) % 360
+    layer = str(sexpr.value(n, "layer", "F.Cu"))
+    fp = Footprint(ref, str(n[1]), at[0], at[1], at[2],
+                   side="B" if layer.startswith("B.") else "F", pads=pads,
+                   bbox=_courtyard(n), value=props.get("Value", ""),
+                   locked="locked" in n[2:4] or sexpr.value(n, "locked") == "yes",
+                   sheet=str(sexpr.value(n, "sheetname", "")))
+    fp._node = n
+    return fp
+
+
+def _flip_node(n):
+    """KiCad's flip applied to a footprint s-expression (see :func:`flip`)."""
+    for child in n:
+        if not (isinstance(child, list) and child):
+            continue
+        key = child[0]
+        if key in ("layer", "layers"):
+            child[1:] = [type(l)(flip_layer(l)) if isinstance(l, str) else l
+                         for l in child[1:]]
+        elif key in ("pad", "property", "fp_text"):
+            at = sexpr.find(child, "at")
+            if at is not None:
+                angle = float(at[3]) if len(at) > 3 else 0.0
+                at[1:] = [at[1], -float(at[2]), round((180 - angle) % 360, 6)]
+            _flip_node(child)
+            eff = sexpr.find(child, "effects")
+            just = sexpr.find(eff, "justify") if eff else None
+            if key != "pad" and eff is not None:
+                if just is None:
+                    eff.append(["justify", "mirror"])
+                elif "mirror" in just:
+                    just.remove("mirror")
+                    if len(just) == 1:
+                        eff.remove(just)
+                else:
+                    just.append("mirror")
+        elif key in _GRAPHICS:
+            for k in ("start", "end", "center", "mid"):
+                pt = sexpr.find(child, k)
+                if pt is not None:
+                    pt[2] = -float(pt[2])
+            for xy in sexpr.find_all(sexpr.find(child, "pts") or [], "xy"):
+                xy[2] = -float(xy[2])
+            _flip_node(child)
+
+
+def _sync_footprint(fp):
+    """Write the model position/rotation/side back into the footprint's s-expression."""
+    n = fp._node
+    if fp.side != fp._side0:
+        _flip_node(n)
+        fp._rot0 = (180 - fp._rot0) % 360
+        fp._side0 = fp.side
+    at = sexpr.find(n, "at")
+    at[1:] = [round(fp.x, 6), round(fp.y, 6)] + ([round(fp.rot % 360, 6)] if fp.rot % 360 else [])
+    delta = fp.rot - fp._rot0
+    if delta:
+        for child in n:
+            if isinstance(child, list) and child and child[0] in ("pad", "property", "fp_text"):
+                cat = sexpr.find(child, "at")
+                if cat is None:
+                    continue
+                angle = float(cat[3]) if len(cat) > 3 else 0.0
+                cat[1:] = cat[1:3] + [round((angle + delta) % 360, 6)]
+        fp._rot0 = fp.rot
+
+
+# ── the model ────────────────────────────────────────────────────────────
+class Board:
+    """Footprints, nets, copper and outline of one board."""
+
+    def __init__(self, footprints=(), nets=None):
+        self.footprints = list(footprints)
+        self.nets = dict(nets or {})          # code -> name
+        self.tracks, self.vias = [], []
+        self.outline = []                     # [(x1, y1, x2, y2)] on Edge.Cuts
+        self.path = None
+        self._tree = None
+        self._pcb = None                      # native pcbnew.BOARD, if any
+        self._outline_dirty = False
+        self._pads = None
+        self._live = None                     # (x, y, rot, side) last pushed to pcbnew
+
+    # -- construction ------------------------------------------------------
+    @classmethod
+    def load(cls, path):
+        """Read a ``.kicad_pcb`` file; no KiCad installation needed."""
+        tree = sexpr.load(path)
+        nets = {int(n[1]): str(n[2]) for n in sexpr.find_all(tree, "net") if len(n) > 2}
+        b = cls([_footprint_from_node(n, nets) for n in sexpr.find_all(tree, "footprint")],
+                nets)
+        b.path, b._tree = path, tree
+        for n in tree:
+            if not (isinstance(n, list) and n):
+                continue
+            if n[0] == "segment":
+                (x1, y1), (x2, y2) = sexpr.floats(n, "start"), sexpr.floats(n, "end")
+                t = Track(x1, y1, x2, y2, float(sexpr.value(n, "width", 0.2)),
+                          str(sexpr.value(n, "layer", "F.Cu")), _net_name(n, nets))
+                t._node = n
+                b.tracks.append(t)
+            elif n[0] == "via":
+                x, y = sexpr.floats(n, "at")
+                layers = sexpr.find(n, "layers")
+                v = Via(x, y, float(sexpr.value(n, "size", 0.6)),
+                        float(sexpr.value(n, "drill", 0.3)),
+                        [str(l) for l in layers[1:]] if layers else ("F.Cu", "B.Cu"),
+                        _net_name(n, nets))
+                v._node = n
+                b.vias.append(v)
+            elif n[0] in _BOARD_GRAPHICS and sexpr.value(n, "layer") == EDGE:
+                b.outline.extend(_edge_segments(n))
+        return b
+
+    @classmethod
+    def from_pcbnew(cls, pcb=None):
+        """Snapshot the board open in KiCad (or ``pcb``) into the model."""
+        import pcbnew
+
+        pcb = pcb or pcbnew.GetBoard()
+        mm = pcbnew.ToMM
+        fps = []
+        for native in pcb.GetFootprints():
+            pos = native.GetPosition()
+            x, y, rot = mm(pos.x), mm(pos.y), native.GetOrientationDegrees()
+            pads = []
+            for p in native.Pads():
+                wp, size = p.GetPosition(), p.GetSize()
+                local = rotate(np.array([mm(wp.x) - x, mm(wp.y) - y]), -rot)
+                pads.append(Pad(str(p.GetNumber()), float(local[0]), float(local[1]),
+                                mm(size.x), mm(size.y), (p.GetOrientationDegrees() - rot) % 360,
+                                net=p.GetNetname(), function=p.GetPinFunction()))
+            bbox = None
+            if rot % 90 == 0:                 # world box turned back exactly
+                bb = native.GetBoundingBox(False, False)
+                corners = rotate(np.array([[mm(bb.GetLeft()) - x, mm(bb.GetTop()) - y],
+                                           [mm(bb.GetRight()) - x, mm(bb.GetBottom()) - y]]),
+                                 -rot)
+                bbox = tuple(map(float, (*corners.min(0), *corners.max(0))))
+            fp = Footprint(native.GetReference(), str(native.GetFPID().GetUniStringLibId()),
+                           x, y, rot, side="B" if native.IsFlipped() else "F",
+                           pads=pads, bbox=bbox,
+                           value=native.GetValue(), locked=native.IsLocked())
+            fp._node = native
+            fps.append(fp)
+        b = cls(fps, {code: str(n.GetNetname())
+                      for code, n in pcb.GetNetsByNetcode().items()})
+        for t in pcb.GetTracks():
+            if t.GetClass() == "PCB_VIA":
+                p = t.GetPosition()
+                v = Via(mm(p.x), mm(p.y), mm(t.GetWidth()), mm(t.GetDrillValue()),
+                        net=t.GetNetname())
+                v._node = t
+                b.vias.append(v)
+            else:
+                s, e = t.GetStart(), t.GetEnd()
+                tr = Track(mm(s.x), mm(s.y), mm(e.x), mm(e.y), mm(t.GetWidth()),
+                           t.GetLayerName(), t.GetNetname())
+                tr._node = t
+                b.tracks.append(tr)
+        for d in pcb.GetDrawings():
+            if d.GetLayer() == pcbnew.Edge_Cuts and d.GetShape() == pcbnew.SHAPE_T_SEGMENT:
+                s, e = d.GetStart(), d.GetEnd()
+                b.outline.append((mm(s.x), mm(s.y), mm(e.x), mm(e.y)))
+        b._pcb = pcb
+        b._live = [(fp.x, fp.y, fp.rot, fp.side) for fp in fps]
+        return b
+
+    def detached(self):
+        """Copy without the file tree or pcbnew handles, cheap to pickle
+        to worker processes.  Pads are shared with the original; tracks
+        and vias are copied (as unsaved copper)."""
+        fps = [Footprint(fp.ref, fp.fpid, fp.x, fp.y, fp.rot, fp.side, fp.pads, fp.bbox,
+                         fp.value, fp.locked, fp.sheet) for fp in self.footprints]
+        b = Board(fps, self.nets)
+        b.outline = list(self.outline)
+        b.tracks = [Track(t.x1, t.y1, t.x2, t.y2, t.width, t.layer, t.net) for t in self.tracks]
+        b.vias = [Via(v.x, v.y, v.size, v.drill, v.layers, v.net) for v in self.vias]
+        return b
+
+    # -- vectorized views --------------------------------------------------
+    @property
+    def refs(self):
+        return [fp.ref for fp in self.footprints]
+
+    def index(self):
+        return {fp.ref: i for i, fp in enumerate(self.footprints)}
+
+    def placement(self):
+        """``(xy (N, 2), rot (N,))`` of all footprints."""
+        xy = np.array([(fp.x, fp.y) for fp in self.footprints], dtype=float).reshape(-1, 2)
+        rot = np.array([fp.rot for fp in self.footprints], dtype=float)
+        return xy, rot
+
+    def set_placement(self, xy, rot=None, idx=None, side=None):
+        """Store new positions (and rotations, sides) for ``idx`` (default:
+        all) in one go.  A footprint whose side changes goes through
+        :func:`flip` first, so ``rot`` is the orientation it ends up with."""
+        idx = range(len(self.footprints)) if idx is None else idx
+        rot = [None] * len(xy) if rot is None else rot
+        side = [None] * len(xy) if side is None else side
+        for i, (x, y), r, s in zip(idx, np.asarray(xy, dtype=float).tolist(), list(rot),
+                                   list(side)):
+            fp = self.footprints[i]
+            if s is not None and s != fp.side:
+                flip(fp)
+                self._pads = None
+            fp.x, fp.y = x, y
+            if r is not None:
+                fp.rot = float(r)
+
+    def local_bboxes(self):
+        return np.array([fp.bbox for fp in self.footprints], dtype=float).reshape(-1, 4)
+
+    def bboxes(self, xy=None, rot=None):
+        """World-space ``(N, 4)`` xmin, ymin, xmax, ymax for a placement."""
+        if xy is None:
+            xy, rot = self.placement()
+        rot = np.zeros(len(xy)) if rot is None else np.asarray(rot, dtype=float)
+        lb = self.local_bboxes()
+        corners = np.stack([lb[:, [0, 1]], lb[:, [2, 1]], lb[:, [2, 3]], lb[:, [0, 3]]], 1)
+        world = rotate(corners, rot[:, None]) + np.asarray(xy)[:, None, :]
+        return np.concatenate([world.min(1), world.max(1)], axis=1)
+
+    def pads(self):
+        """Pad table as arrays: ``fp`` index, ``local`` xy, ``size``, ``net`` id.
+
+        ``local`` and ``size`` are in the footprint frame (unrotated).
+
+        ``net`` is an index into ``net_names`` (-1 for unconnected pads).
+        Cached; call :meth:`invalidate` after editing footprints or pads.
+        """
+        if self._pads is None:
+            fp_i, local, size, net, numbers = [], [], [], [], []
+            names = {}
+            for i, fp in enumerate(self.footprints):
+                for p in fp.pads:
+                    fp_i.append(i)
+                    local.append((p.x, p.y))
+                    swap = round((p.angle % 180) / 90) % 2
+                    size.append((p.h, p.w) if swap else (p.w, p.h))
+                    net.append(names.setdefault(p.net, len(names)) if p.net else -1)
+                    numbers.append(p.number)
+            self._pads = {
+                "fp": np.array(fp_i, dtype=np.int32),
+                "local": np.array(local, dtype=float).reshape(-1, 2),
+                "size": np.array(size, dtype=float).reshape(-1, 2),
+                "net": np.array(net, dtype=np.int32),
+                "number": numbers,
+                "net_names": list(names),
+            }
+        return self._pads
+
+    def invalidate(self):
+        self._pads = None
+
+    def pad_xy(self, xy=None, rot=None):
+        """World pad centres ``(P, 2)`` for a placement (default: current)."""
+        if xy is None:
+            xy, rot = self.placement()
+        pads = self.pads()
+        fp = pads["fp"]
+        rot = np.zeros(len(xy)) if rot is None else np.asarray(rot, dtype=float)
+        return rotate(pads["local"], rot[fp]) + np.asarray(xy)[fp]
+
+    # -- outline -----------------------------------------------------------
+    def set_outline(self, x0, y0, x1, y1):
+        """Replace Edge.Cuts with one rectangle."""
+        self.outline = [(x0, y0, x1, y0), (x1, y0, x1, y1),
+                        (x1, y1, x0, y1), (x0, y1, x0, y0)]
+        self._outline_dirty = True
+
+    def outline_bbox(self):
+        if not self.outline:
+            return None
+        o = np.array(self.outline, dtype=float)
+        return (o[:, [0, 2]].min(), o[:, [1, 3]].min(), o[:, [0, 2]].max(), o[:, [1, 3]].max())
+
+    # -- copper ------------------------------------------------------------
+    def add_track(self, x1, y1, x2, y2, width, layer, net=""):
+        """New track segment; written out by the next :meth:`save` / :meth:`apply`."""
+        t = Track(x1, y1, x2, y2, width, layer, net)
+        self.tracks.append(t)
+        return t
+
+    def add_via(self, x, y, size, drill, net=""):
+        v = Via(x, y, size, drill, net=net)
+        self.vias.append(v)
+        return v
+
+    def net_code(self, name):
+        for code, n in self.nets.items():
+            if n == name:
+                return code
+        return 0
+
+    # -- write back --------------------------------------------------------
+    def save(self, path=None):
+        """Write the (file-backed) board to ``path`` (default: where it came from)."""
+        if self._tree is None:
+            raise ValueError("board was not loaded from a file; use apply()")
+        for fp in self.footprints:
+            _sync_footprint(fp)
+        for t in self.tracks:
+            if t._node is None:
+                t._node = _segment(t, self.net_code(t.net))
+                self._tree.append(t._node)
+        for v in self.vias:
+            if v._node is None:
+                v._node = _via(v, self.net_code(v.net))
+                self._tree.append(v._node)
+        if self._outline_dirty:
+            self._tree[:] = [n for n in self._tree
+                             if not (isinstance(n, list) and n and n[0] in _BOARD_GRAPHICS
+                                     and sexpr.value(n, "layer") == EDGE)]
+            for x1, y1, x2, y2 in self.outline:
+                self._tree.append(_gr_line(x1, y1, x2, y2))
+            self._outline_dirty = False
+        sexpr.save(self._tree, path or self.path)
+
+    def apply(self, refresh=True, verbose=False, txn=None):
+        """Push positions/outline/new copper into the live pcbnew board as
+        one :class:`board_txn.Transaction`; only footprints that changed
+        since the last load/apply are touched.  Returns the phase timings.
+
+        With ``txn`` the edits are queued on that transaction instead and
+        committing it is left to the caller (returns ``None``).
+        """
+        from board_txn import Transaction
+
+        own = txn is None
+        txn = txn or Transaction(self._pcb, refresh, verbose)
+        live = self._live or [None] * len(self.footprints)
+        for i, fp in enumerate(self.footprints):
+            if live[i] != (fp.x, fp.y, fp.rot, fp.side):
+                txn.flip(fp._node, fp.side == "B")
+                txn.move(fp._node, fp.x, fp.y)
+                txn.rotate(fp._node, fp.rot)
+        if self._outline_dirty:
+            txn.set_outline(self.outline)
+        for item in self.tracks + self.vias:
+            if item._node is None:
+                item._node = _native_copper(self._pcb, item)
+                txn.add(item._node)
+        timings = txn.commit() if own else None
+        self._live = [(fp.x, fp.y, fp.rot, fp.side) for fp in self.footprints]
+        self._outline_dirty = False
+        return timings
+
+    def commit(self, path=None):
+        """``save`` for file-backed boards, ``apply`` for live ones."""
+        if self._pcb is not None:
+            self.apply()
+        else:
+            self.save(path)
+
+
+def _edge_segments(n):
+    if n[0] == "gr_line":
+        (x1, y1), (x2, y2) = sexpr.floats(n, "start"), sexpr.floats(n, "end")
+        return [(x1, y1, x2, y2)]
+    if n[0] == "gr_rect":
+        (x0, y0), (x1, y1) = sexpr.floats(n, "start"), sexpr.floats(n, "end")
+        return [(x0, y0, x1, y0), (x1, y0, x1, y1), (x1, y1, x0, y1), (x0, y1, x0, y0)]
+    if n[0] == "gr_poly":
+        pts = [(float(p[1]), float(p[2]))
+               for p in sexpr.find_all(sexpr.find(n, "pts") or [], "xy")]
+        return [(a[0], a[1], b[0], b[1]) for a, b in zip(pts, pts[1:] + pts[:1])]
+    return []
+
+
+def _gr_line(x1, y1, x2, y2, width=0.1):
+    return ["gr_line", ["start", round(x1, 6), round(y1, 6)], ["end", round(x2, 6), round(y2, 6)],
+            ["stroke", ["width", width], ["type", "default"]],
+            ["layer", QStr(EDGE)], ["uuid", new_uuid("gr_line", x1, y1, x2, y2, EDGE)]]
+
+
+def _segment(t, code):
+    return ["segment", ["start", round(t.x1, 6), round(t.y1, 6)],
+            ["end", round(t.x2, 6), round(t.y2, 6)], ["width", t.width],
+            ["layer", QStr(t.layer)], ["net", code],
+            ["uuid", new_uuid("segment", t.x1, t.y1, t.x2, t.y2, t.width, t.layer, t.net)]]
+
+
+def _via(v, code):
+    return ["via", ["at", round(v.x, 6), round(v.y, 6)], ["size", v.size], ["drill", v.drill],
+            ["layers"] + [QStr(l) for l in v.layers], ["net", code],
+            ["uuid", new_uuid("via", v.x, v.y, v.size, v.drill, *v.layers, v.net)]]
+
+
+def _native_copper(pcb, item):
+    """pcbnew ``PCB_TRACK`` / ``PCB_VIA`` for a model track or via."""
+    import pcbnew
+
+    mm = pcbnew.FromMM
+    if isinstance(item, Via):
+        native = pcbnew.PCB_VIA(pcb)
+        native.SetPosition(pcbnew.VECTOR2I(mm(item.x), mm(item.y)))
+        native.SetWidth(mm(item.size))
+        native.SetDrill(mm(item.drill))
+    else:
+        native = pcbnew.PCB_TRACK(pcb)
+        native.SetStart(pcbnew.VECTOR2I(mm(item.x1), mm(item.y1)))
+        native.SetEnd(pcbnew.VECTOR2I(mm(item.x2), mm(item.y2)))
+        native.SetWidth(mm(item.width))
+        native.SetLayer(pcb.GetLayerID(item.layer))
+    net = pcb.FindNet(item.net) if item.net else None
+    if net is not None:
+        native.SetNet(net)
+    return native
+
+
+def new_uuid(*key):
+    """Stable id for a new item: the same geometry, layer and net always
+    get the same uuid, so rewriting an unchanged board is byte-identical."""
+    return QStr(str(uuid.uuid5(_UUID_NS, repr(tuple(
+        round(k, 6) if isinstance(k, float) else str(k) for k in key)))))
+
+
+_UUID_NS = uuid.UUID("5a0e7c1e-3f5b-4d6e-9b1a-2c8f4e6d0b37")
@@ -0,0 +1,361 @@
+# ---------------------------------------------------------------------
+# board_server.py  –  resident board model behind a local JSON-RPC socket
+# ---------------------------------------------------------------------
+"""
+Every layout iteration used to re-read the ~350 KB ``.kicad_pcb`` (and
+KiCad its libraries) from scratch.  This daemon loads a board once into
+a :class:`board_model.Board` and keeps it — plus its pad / net arrays —
+resident; scripts talk to it with JSON-RPC 2.0, one request per line,
+over a Unix socket (TCP on 127.0.0.1 where ``AF_UNIX`` is missing).
+
+Backends: ``pcbnew.LoadBoard`` when pcbnew imports, otherwise the plain
+file model — the same one the headless placers use, so everything works
+without KiCad installed.  Either way the server needs a board path (a
+daemon has no board open in the editor), and ``save`` writes that file
+(``pcbnew.SaveBoard`` for the pcbnew backend).
+
+Footprint geometry stays resident too: a :class:`fp_cache.FootprintCache`
+(libraries from ``--lib-dir`` / ``$KICAD*_FOOTPRINT_DIR``, seeded with
+the footprints embedded in each opened board) supplies the courtyard
+boxes for ``bbox`` and ``courtyards``.
+
+Methods: ``open``, ``place``, ``move``, ``modules`` / ``nets`` (the
+``script.py`` dumps), ``bbox`` (``f.py``), ``courtyards``, ``hpwl``,
+``ratsnest``, ``drc``, ``save``, ``ping``, ``shutdown``.
+
+    python board_server.py serve my_board_100x100.kicad_pcb &
+    python board_server.py call bbox
+    python board_server.py call place '{"layout": "d"}'
+    python board_server.py call move '{"R1": [10, 10], "U1": [30, 20, 90]}'
+
+    from board_server import BoardClient
+    with BoardClient() as c:
+        c.place(layout="e", pack=True)
+        print(c.bbox())
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import replace
+
+import drc
+import fp_cache
+import net_topology
+import placement
+from board_model import Board
+from wirelength import NetTable
+
+SOCKET = os.path.join(tempfile.gettempdir(), "kicad-board.sock")
+TCP = ("127.0.0.1", 47813)          # used where AF_UNIX is unavailable
+HAS_UNIX = hasattr(socket, "AF_UNIX")
+
+
+class RPCError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+# ── 1. the resident state ────────────────────────────────────────────────
+class BoardService:
+    """Board model plus everything derived from it, kept between calls."""
+
+    def __init__(self, path=None, backend="auto", lib_dirs=(), cache=fp_cache.CACHE):
+        self.backend = backend
+        self.footprints = fp_cache.FootprintCache(cache, lib_dirs)
+        self.board = None
+        self.path = None
+        self.loaded = None          # (path, mtime) of the file in memory
+        self._nets = None
+        self._rows = None           # footprint-cache row per board footprint
+        self.lock = threading.Lock()
+        if path:
+            self.open(path)
+
+    def _load(self, path):
+        if not path:
+            raise RPCError(-32602, "open needs a board path")
+        if self.backend in ("auto", "pcbnew"):
+            try:
+                import pcbnew
+            except ImportError:
+                if self.backend == "pcbnew":
+                    raise RPCError(-32000, "pcbnew backend requested but KiCad is not installed")
+            else:
+                return Board.from_pcbnew(pcbnew.LoadBoard(path))
+        return Board.load(path)
+
+    def board_or_fail(self):
+        if self.board is None:
+            raise RPCError(-32001, "no board open")
+        return self.board
+
+    def nettable(self):
+        if self._nets is None:
+            self._nets = NetTable(self.board_or_fail())
+        return self._nets
+
+    # -- RPC methods ---------------------------------------------------------
+    def open(self, path=None, reload=False):
+        """Load ``path``; a no-op when that file is already resident and unchanged."""
+        path = os.path.abspath(path) if path else None
+        key = (path, os.path.getmtime(path) if path and os.path.exists(path) else None)
+        if reload or key != self.loaded or self.board is None:
+            t0 = time.perf_counter()
+            self.board = self._load(path)
+            self.board.pads()
+            self.footprints.seed(self.board)
+            self._rows = self.footprints.rows([fp.fpid for fp in self.board.footprints])
+            if self.footprints.dirty:
+                self.footprints.save()
+            self.path, self.loaded, self._nets = path, key, None
+            return {"loaded": True, "footprints": len(self.board.footprints),
+                    "ms": (time.perf_counter() - t0) * 1e3}
+        return {"loaded": False, "footprints": len(self.board.footprints)}
+
+    def ping(self):
+        return {"pid": os.getpid(), "board": self.path,
+                "backend": "pcbnew" if self.board is not None and self.board._pcb else "file"}
+
+    def place(self, layout="d", pack=False):
+        if layout not in placement.LAYOUTS:
+            raise RPCError(-32602, f"unknown layout {layout!r}")
+        lay = placement.LAYOUTS[layout]
+        if pack:
+            lay = replace(lay, pack=True)
+        x0, y0, x1, y1 = placement.place(self.board_or_fail(), lay)
+        return {"outline": [x0, y0, x1, y1]}
+
+    def move(self, moves=None, **refs):
+        """``{"REF": [x, y] | [x, y, rot], ...}`` — as the params object
+        itself or under ``"moves"``."""
+        moves = {**(moves or {}), **refs}
+        board = self.board_or_fail()
+        index = board.index()
+        unknown = [r for r in moves if r not in index]
+        if unknown:
+            raise RPCError(-32602, f"unknown refs: {', '.join(unknown)}")
+        for ref, v in moves.items():
+            fp = board.footprints[index[ref]]
+            fp.x, fp.y = float(v[0]), float(v[1])
+            if len(v) > 2:
+                fp.rot = float(v[2])
+        return {"moved": len(moves)}
+
+    def modules(self):
+        return [{"ref": fp.ref, "fpid": fp.fpid, "value": fp.value, "x": fp.x, "y": fp.y,
+                 "rot": fp.rot, "side": fp.side} for fp in self.board_or_fail().footprints]
+
+    def nets(self):
+        nets = {}
+        for fp in self.board_or_fail().footprints:
+            for p in fp.pads:
+                if p.net:
+                    nets.setdefault(p.net, []).append([fp.ref, p.number])
+        return nets
+
+    def geometry(self):
+        """World pad / courtyard arrays of the current placement."""
+        board = self.board_or_fail()
+        xy, rot = board.placement()
+        return self.footprints.place(self._rows, xy, rot, [fp.side for fp in board.footprints])
+
+    def courtyards(self):
+        """``{"REF": [x0, y0, x1, y1]}`` courtyard boxes from the footprint cache."""
+        board = self.board_or_fail()
+        bb = self.geometry()["bbox"].tolist()
+        return {fp.ref: b for fp, b, r in zip(board.footprints, bb, self._rows.tolist())
+                if r >= 0}
+
+    def bbox(self):
+        """Edge.Cuts size, like ``f.py`` (courtyards when there is no outline)."""
+        board = self.board_or_fail()
+        box = board.outline_bbox()
+        source = "Edge.Cuts"
+        if box is None:
+            bb = self.geometry()["bbox"]
+            unknown = self._rows < 0                     # not in the cache: pad extents
+            bb[unknown] = board.bboxes()[unknown]
+            box, source = (bb[:, 0].min(), bb[:, 1].min(), bb[:, 2].max(), bb[:, 3].max()), \
+                "courtyards"
+        x0, y0, x1, y1 = map(float, box)
+        return {"source": source, "box": [x0, y0, x1, y1], "width": x1 - x0, "height": y1 - y0}
+
+    def hpwl(self):
+        xy, rot = self.board_or_fail().placement()
+        return {"hpwl": self.nettable().hpwl(xy, rot)}
+
+    def ratsnest(self, kind="mst"):
+        """Airwires ``[net, x1, y1, x2, y2]`` from :func:`net_topology.ratsnest`."""
+        return [list(line) for line in net_topology.ratsnest(self.board_or_fail(), kind=kind)]
+
+    def drc(self, clearance=drc.CLEARANCE, edge_clearance=drc.EDGE_CLEARANCE):
+        """Clearance violations from :func:`drc.check`."""
+        return drc.check(self.board_or_fail(), clearance, edge_clearance)
+
+    def save(self, path=None):
+        board = self.board_or_fail()
+        if board._pcb is not None:                       # commit() only applies to the BOARD
+            import pcbnew
+            board.commit()
+            pcbnew.SaveBoard(path or self.path, board._pcb)
+        else:
+            board.commit(path)
+        if path is None or os.path.abspath(path) == self.path:
+            self.loaded = (self.path, os.path.getmtime(self.path)) if self.path else None
+        return {"saved": path or self.path}
+
+    METHODS = ("open", "ping", "place", "move", "modules", "nets", "bbox", "courtyards", "hpwl",
+               "ratsnest", "drc", "save")
+
+    def dispatch(self, req):
+        method = req.get("method")
+        params = req.get("params") or {}
+        if method not in self.METHODS:
+            raise RPCError(-32601, f"method not found: {method}")
+        with self.lock:
+            if isinstance(params, list):
+                return getattr(self, method)(*params)
+            return getattr(self, method)(**params)
+
+
+# ── 2. server ────────────────────────────────────────────────────────────
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        service = self.server.service
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            rid, bye = None, False
+            try:
+                req = json.loads(line)
+                rid = req.get("id")
+                if req.get("method") == "shutdown":
+                    resp = {"jsonrpc": "2.0", "id": rid, "result": {"bye": True}}
+                    bye = True
+                else:
+                    resp = {"jsonrpc": "2.0", "id": rid, "result": service.dispatch(req)}
+            except RPCError as e:
+                resp = {"jsonrpc": "2.0", "id": rid,
+                        "error": {"code": e.code, "message": str(e)}}
+            except (ValueError, TypeError) as e:
+                resp = {"jsonrpc": "2.0", "id": rid, "error": {"code": -32602, "message": str(e)}}
+            except Exception as e:                       # keep the daemon alive
+                resp = {"jsonrpc": "2.0", "id": rid,
+                        "error": {"code": -32603, "message": f"{type(e).__name__}: {e}"}}
+            self.wfile.write(json.dumps(resp, separators=(",", ":")).encode() + b"\n")
+            self.wfile.flush()
+            if bye:                                      # only once the reply is out
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+if HAS_UNIX:
+    class _Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:
+    class _Server(socketserver.ThreadingTCPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+
+
+def serve(path=None, address=None, backend="auto", lib_dirs=(), cache=fp_cache.CACHE):
+    address = address or (SOCKET if HAS_UNIX else TCP)
+    if HAS_UNIX and os.path.exists(address):
+        os.remove(address)                               # stale socket from a crash
+    service = BoardService(path, backend, lib_dirs, cache)
+    with _Server(address, _Handler) as server:
+        server.service = service
+        print(f"✓ board server on {address} ({len(service.board.footprints) if service.board else 0}"
+              f" footprints resident)")
+        try:
+            server.serve_forever()
+        finally:
+            if HAS_UNIX and os.path.exists(address):
+                os.remove(address)
+
+
+# ── 3. client ────────────────────────────────────────────────────────────
+class BoardClient:
+    """Thin client: ``BoardClient().bbox()`` → result dict (raises on errors)."""
+
+    def __init__(self, address=None, timeout=60):
+        address = address or (SOCKET if HAS_UNIX else TCP)
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(address)
+        self.file = self.sock.makefile("rwb")
+        self._id = 0
+
+    def call(self, method, *args, **kwargs):
+        self._id += 1
+        req = {"jsonrpc": "2.0", "id": self._id, "method": method,
+               "params": list(args) if args else kwargs}
+        self.file.write(json.dumps(req, separators=(",", ":")).encode() + b"\n")
+        self.file.flush()
+        resp = json.loads(self.file.readline() or b"null")
+        if resp is None:
+            raise ConnectionError("board server closed the connection")
+        if "error" in resp:
+            raise RPCError(resp["error"]["code"], resp["error"]["message"])
+        return resp["result"]
+
+    def __getattr__(self, method):
+        if method.startswith("_"):
+            raise AttributeError(method)
+        return lambda *a, **kw: self.call(method, *a, **kw)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="resident board model over JSON-RPC")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("serve")
+    p.add_argument("board", nargs="?")
+    p.add_argument("--socket", help=f"socket path (default {SOCKET})")
+    p.add_argument("--backend", choices=("auto", "pcbnew", "file"), default="auto")
+    p.add_argument("--lib-dir", action="append", default=[],
+                   help="directory holding <lib>.pretty folders (also $KICAD*_FOOTPRINT_DIR)")
+    p.add_argument("--fp-cache", default=fp_cache.CACHE,
+                   help=f"footprint geometry cache (default {fp_cache.CACHE})")
+    p = sub.add_parser("call")
+    p.add_argument("method")
+    p.add_argument("params", nargs="?", default="{}", help="JSON object or array")
+    p.add_argument("--socket")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "serve":
+        serve(args.board, args.socket, args.backend, args.lib_dir, args.fp_cache)
+        return 0
+    t0 = time.perf_counter()
+    params = json.loads(args.params)
+    try:
+        with BoardClient(args.socket) as c:
+            result = c.call(args.method, *params) if isinstance(params, list) \
+                else c.call(args.method, **params)
+    except RPCError as e:
+        print(f"⚠ {args.method}: {e} ({e.code})", file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=1))
+    print(f"({(time.perf_counter() - t0) * 1e3:.1f} ms)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+# ---------------------------------------------------------------------
+# board_txn.py  –  batched edits to the live pcbnew board
+# ---------------------------------------------------------------------
+"""
+The old console scripts interleaved one SWIG call per ``SetPosition`` /
+``SetOrientationDegrees`` with Edge.Cuts deletes, then ran
+``BuildConnectivity()`` (twice in ``e.py``) and ``Refresh()``.  On a
+large board every one of those repaints or re-indexes, and the editor
+freezes.
+
+:class:`Transaction` queues the edits instead — later edits to the same
+footprint replace earlier ones — and applies them at :meth:`commit`:
+unchanged values are skipped, Edge.Cuts outlines are rewritten in place
+when the segment count allows, and connectivity is rebuilt and the view
+refreshed exactly once, only if something changed.  Each phase is
+timed::
+
+    with Transaction(pcbnew.GetBoard()) as txn:
+        txn.move(fp, 10, 20)
+        txn.rotate(fp, 90)
+        txn.set_outline([(0, 0, 100, 0), ...])
+    print(txn.timings)
+
+An exception inside the ``with`` block discards the queue.  Edits do
+not go through KiCad's undo stack (``BOARD_COMMIT`` needs an editor
+frame the scripting console does not hand out).
+"""
+import time
+
+EDGE_WIDTH = 0.1            # mm
+
+
+class Transaction:
+    """Queued position / orientation / add / remove edits on a pcbnew board."""
+
+    def __init__(self, pcb=None, refresh=True, verbose=False):
+        import pcbnew
+
+        self.pcbnew = pcbnew
+        self.pcb = pcb or pcbnew.GetBoard()
+        self.refresh = refresh
+        self.verbose = verbose
+        self.timings = {}
+        self._moves = {}            # id(native) -> [native, (x, y) | None, rot | None, back | None]
+        self._add, self._remove = [], []
+        self._outline = None
+        self._copper = False        # applied, connectivity not yet rebuilt
+        self._view = False          # applied, view not yet refreshed
+
+    # -- queueing ------------------------------------------------------------
+    def _entry(self, native):
+        return self._moves.setdefault(id(native), [native, None, None, None])
+
+    def move(self, native, x, y):
+        """Queue a move of ``native`` (footprint or any item) to ``x, y`` mm."""
+        self._entry(native)[1] = (float(x), float(y))
+
+    def rotate(self, native, degrees):
+        self._entry(native)[2] = float(degrees)
+
+    def flip(self, native, back):
+        """Queue putting a footprint on the back (``True``) or front side;
+        applied before the move and rotation queued with it."""
+        self._entry(native)[3] = bool(back)
+
+    def add(self, item):
+        self._add.append(item)
+
+    def remove(self, item):
+        self._remove.append(item)
+
+    def set_outline(self, segments):
+        """Replace Edge.Cuts with ``[(x1, y1, x2, y2)]`` mm segments."""
+        self._outline = [tuple(map(float, s)) for s in segments]
+
+    def __len__(self):
+        return len(self._moves) + len(self._add) + len(self._remove) + (self._outline is not None)
+
+    def rollback(self):
+        self._moves.clear()
+        self._add.clear()
+        self._remove.clear()
+        self._outline = None
+
+    # -- applying ------------------------------------------------------------
+    def _vec(self, x, y):
+        mm = self.pcbnew.FromMM
+        return self.pcbnew.VECTOR2I(mm(x), mm(y))
+
+    def _apply_moves(self):
+        changed = 0
+        for native, pos, rot, back in self._moves.values():
+            if back is not None and native.IsFlipped() != back:
+                left_right = getattr(self.pcbnew, "FLIP_DIRECTION_LEFT_RIGHT", True)  # KiCad 9
+                native.Flip(native.GetPosition(), left_right)
+                changed += 1
+            if pos is not None:
+                new = self._vec(*pos)
+                old = native.GetPosition()
+                if (old.x, old.y) != (new.x, new.y):
+                    native.SetPosition(new)
+                    changed += 1
+            if rot is not None and \
+                    abs((native.GetOrientationDegrees() - rot + 180) % 360 - 180) > 1e-9:
+                native.SetOrientationDegrees(rot)
+                changed += 1
+        return changed
+
+    def _apply_outline(self):
+        pcbnew, pcb = self.pcbnew, self.pcb
+        old = [d for d in pcb.GetDrawings() if d.GetLayer() == pcbnew.Edge_Cuts]
+        reuse = [d for d in old if d.GetShape() == pcbnew.SHAPE_T_SEGMENT][:len(self._outline)]
+        for d in old:
+            if not any(d is r for r in reuse):
+                pcb.Remove(d)
+        for i, (x1, y1, x2, y2) in enumerate(self._outline):
+            if i < len(reuse):
+                seg = reuse[i]
+            else:
+                seg = pcbnew.PCB_SHAPE(pcb)
+                seg.SetShape(pcbnew.SHAPE_T_SEGMENT)
+                seg.SetLayer(pcbnew.Edge_Cuts)
+                seg.SetWidth(pcbnew.FromMM(EDGE_WIDTH))
+                pcb.Add(seg)
+            seg.SetStart(self._vec(x1, y1))
+            seg.SetEnd(self._vec(x2, y2))
+
+    def commit(self, final=True):
+        """Apply everything queued; returns :attr:`timings` (seconds per phase).
+
+        ``final=False`` applies the edits but leaves the connectivity
+        rebuild and refresh to the next (final) commit — for scripts that
+        need e.g. moved pad positions before queueing tracks.
+        """
+        t = {}
+        t0 = time.perf_counter()
+        changed = self._apply_moves()
+        t["moves"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for item in self._remove:
+            self.pcb.Remove(item)
+        for item in self._add:
+            self.pcb.Add(item)
+        if self._outline is not None:
+            self._apply_outline()
+        t["items"] = time.perf_counter() - t0
+
+        self._copper |= bool(changed or self._add or self._remove)
+        self._view |= self._copper or self._outline is not None
+        t0 = time.perf_counter()
+        if final and self._copper:
+            self.pcb.BuildConnectivity()
+        t["connectivity"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        if final and self.refresh and self._view:
+            self.pcbnew.Refresh()
+        t["refresh"] = time.perf_counter() - t0
+        if final:
+            self._copper = self._view = False
+        t["total"] = sum(t.values())
+        t["changed"] = changed
+        self.timings = t
+        if self.verbose:
+            print(f"  txn: {changed} changes, {len(self._add)} added, {len(self._remove)} "
+                  f"removed; moves {t['moves'] * 1e3:.1f} ms, connectivity "
+                  f"{t['connectivity'] * 1e3:.1f} ms, refresh {t['refresh'] * 1e3:.1f} ms")
+        self.rollback()
+        return t
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
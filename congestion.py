@@ -0,0 +1,259 @@
+# ---------------------------------------------------------------------
+# congestion.py  –  RUDY routing-demand heatmap for a placement
+# ---------------------------------------------------------------------
+"""
+Is a placement from ``c.py`` / ``d.py`` / ``e.py`` routable at all?  RUDY
+(Rectangular Uniform wire DensitY) answers before the router runs: each
+net needs about ``q(n) × HPWL`` mm of track, assumed spread evenly over
+its bounding box.  Horizontal demand goes to F.Cu and vertical to B.Cu,
+the router's preferred directions.
+
+Everything is arrays.  A net's overlap with the grid columns (rows) is one
+clipped subtraction against the cell edges, ``(N, nx)`` and ``(N, ny)``,
+and the demand map is their density-weighted product — a single matrix
+multiply, exact for boxes that do not sit on cell edges.  Capacity is the
+cell area a layer has left after pads, divided by the track pitch
+(width + clearance), so a cell's utilization is demand / capacity and
+anything above 1 cannot be routed as placed.
+
+:meth:`Rudy.overflow` (mm of track beyond capacity) is the placement
+cost term (``multistart.py --congestion``); :func:`write_svg` /
+:func:`write_png` draw the heatmap over the footprints.
+
+    python congestion.py board.kicad_pcb --svg heat.svg --png heat.png
+"""
+import argparse
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from board_model import COPPER, Board, copper_layers, rotate
+from maze_router import CLEARANCE, WIDTH
+from wirelength import NetTable
+
+PITCH = 1.0                 # mm per heatmap cell
+TRACK_PITCH = WIDTH + CLEARANCE
+HOT = 0.8                   # utilization reported as a hotspot
+BLOCK_MAX = 0.5             # pads take at most this share of a cell (tracks end on them)
+
+# Cheng's wirelength correction: expected Steiner length / HPWL by pin count
+_Q_PINS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 50)
+_Q = (1.0, 1.0, 1.0, 1.0828, 1.1536, 1.2206, 1.2823, 1.3385, 1.3991, 1.4493, 2.7933)
+
+
+def q_factor(degree):
+    degree = np.asarray(degree, dtype=float)
+    return np.where(degree > 50, 2.7933 + 0.02616 * (degree - 50), np.interp(degree, _Q_PINS, _Q))
+
+
+def _coverage(lo, hi, edges):
+    """Length of ``[lo, hi]`` (N,) inside each cell ``(N, len(edges) - 1)``."""
+    return np.clip(np.minimum(hi[:, None], edges[None, 1:])
+                   - np.maximum(lo[:, None], edges[None, :-1]), 0.0, None)
+
+
+class Rudy:
+    """Demand / capacity maps of one board's nets on a ``pitch`` grid."""
+
+    def __init__(self, board, nets=None, pitch=PITCH, track_pitch=TRACK_PITCH,
+                 bounds="outline"):
+        self.board = board
+        self.nets = nets if nets is not None else NetTable(board)
+        self.pitch, self.track_pitch = pitch, track_pitch
+        # (x0, y0, x1, y1), "outline" (Edge.Cuts) or None (courtyards, per placement)
+        self.bounds = board.outline_bbox() if bounds == "outline" else bounds
+        self.q = q_factor(np.diff(self.nets.net_ptr))
+        pads = board.pads()
+        self.pad_fp, self.pad_local, self.pad_size = pads["fp"], pads["local"], pads["size"]
+        self.pad_layer = np.array([[l in copper_layers(p, fp.side) for l in COPPER]
+                                   for fp in board.footprints for p in fp.pads],
+                                  dtype=bool).reshape(-1, len(COPPER))
+
+    def grid(self, xy, rot):
+        """Cell edges ``(xs, ys)``; the outline, else the courtyards' extent."""
+        if self.bounds is not None:
+            x0, y0, x1, y1 = self.bounds
+        else:
+            bb = self.board.bboxes(xy, rot)
+            x0, y0 = bb[:, :2].min(0)
+            x1, y1 = bb[:, 2:].max(0)
+        p = self.pitch
+        nx, ny = max(int(np.ceil((x1 - x0) / p)), 1), max(int(np.ceil((y1 - y0) / p)), 1)
+        return x0 + p * np.arange(nx + 1), y0 + p * np.arange(ny + 1)
+
+    def demand(self, pin_xy, xs, ys):
+        """mm of track wanted per cell: ``(2, ny, nx)`` horizontal, vertical."""
+        nets = self.nets
+        if not nets.n_nets:
+            return np.zeros((2, len(ys) - 1, len(xs) - 1))
+        p = pin_xy[nets.net_pin]
+        start = nets.net_ptr[:-1]
+        lo = np.minimum.reduceat(p, start, axis=0)
+        hi = np.maximum.reduceat(p, start, axis=0)
+        span = hi - lo
+        # degenerate boxes (aligned pins) still need a track's worth of width
+        half = np.maximum(self.pitch - span, 0.0) / 2
+        lo, hi = lo - half, hi + half
+        area = (hi - lo).prod(1)
+        ox = _coverage(lo[:, 0], hi[:, 0], xs)
+        oy = _coverage(lo[:, 1], hi[:, 1], ys)
+        dens = (self.q * span.T / area).T                # (N, 2) mm of track per mm²
+        return np.stack([(oy * dens[:, :1]).T @ ox, (oy * dens[:, 1:]).T @ ox])
+
+    def capacity(self, xy, rot, xs, ys):
+        """mm of track that fit per cell and layer, ``(2, ny, nx)``."""
+        rot = np.asarray(rot, dtype=float)
+        fp = self.pad_fp
+        centre = rotate(self.pad_local, rot[fp]) + np.asarray(xy)[fp]
+        swap = (np.rint(rot[fp] / 90).astype(int) % 2).astype(bool)
+        size = np.where(swap[:, None], self.pad_size[:, ::-1], self.pad_size) + CLEARANCE
+        lo, hi = centre - size / 2, centre + size / 2
+        ox = _coverage(lo[:, 0], hi[:, 0], xs)
+        oy = _coverage(lo[:, 1], hi[:, 1], ys)
+        cell = np.outer(np.diff(ys), np.diff(xs))
+        blocked = np.stack([(oy * self.pad_layer[:, k:k + 1]).T @ ox
+                            for k in range(len(COPPER))])
+        return (cell - np.minimum(blocked, BLOCK_MAX * cell)) / self.track_pitch
+
+    def maps(self, xy=None, rot=None, pin_xy=None):
+        """``{"xs", "ys", "demand", "capacity", "util"}`` for a placement."""
+        if xy is None:
+            xy, rot = self.board.placement()
+        rot = np.zeros(len(xy)) if rot is None else rot
+        xs, ys = self.grid(xy, rot)
+        if pin_xy is None:
+            pin_xy = self.nets.pin_xy(xy, rot)
+        demand = self.demand(pin_xy, xs, ys)
+        cap = self.capacity(xy, rot, xs, ys)
+        util = demand / cap
+        return {"xs": xs, "ys": ys, "demand": demand, "capacity": cap, "util": util}
+
+    def overflow(self, xy=None, rot=None, pin_xy=None):
+        """mm of track beyond capacity, summed over cells and layers."""
+        m = self.maps(xy, rot, pin_xy)
+        return float(np.clip(m["demand"] - m["capacity"], 0.0, None).sum())
+
+
+def hotspots(m, threshold=HOT, top=10, radius=3.0):
+    """``[(layer, x, y, util)]`` worst cells, at most one per ``radius`` mm."""
+    util = m["util"]
+    xs, ys = m["xs"], m["ys"]
+    cx, cy = (xs[:-1] + xs[1:]) / 2, (ys[:-1] + ys[1:]) / 2
+    flat = util.ravel()
+    cand = np.flatnonzero(flat >= threshold)
+    cand = cand[np.argsort(-flat[cand], kind="stable")]
+    out = []
+    for k in cand.tolist():
+        layer, iy, ix = np.unravel_index(k, util.shape)
+        x, y = float(cx[ix]), float(cy[iy])
+        if any(l == COPPER[layer] and abs(x - hx) < radius and abs(y - hy) < radius
+               for l, hx, hy, _ in out):
+            continue
+        out.append((COPPER[layer], x, y, float(flat[k])))
+        if len(out) >= top:
+            break
+    return out
+
+
+# ── rendering ────────────────────────────────────────────────────────────
+_RAMP = np.array([(0.0, 49, 54, 149), (0.4, 69, 117, 180), (0.7, 254, 224, 144),
+                  (1.0, 244, 109, 67), (1.5, 165, 0, 38)])
+
+
+def colours(util):
+    """RGB ``(..., 3) uint8`` for utilization (blue → red, saturating at 1.5)."""
+    u = np.clip(util, 0.0, 1.5)
+    return np.stack([np.interp(u, _RAMP[:, 0], _RAMP[:, k]) for k in (1, 2, 3)],
+                    -1).astype(np.uint8)
+
+
+def save_png(path, img):
+    """Write an RGB ``(h, w, 3) uint8`` image (zlib, no PIL)."""
+    h, w = img.shape[:2]
+    raw = np.concatenate([np.zeros((h, 1), dtype=np.uint8), img.reshape(h, -1)], 1).tobytes()
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + \
+            struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw, 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def write_png(path, m, scale=4):
+    """Both layers side by side, ``scale`` pixels per cell."""
+    rgb = colours(m["util"])                             # (2, ny, nx, 3)
+    gap = np.full((rgb.shape[1], 1, 3), 255, dtype=np.uint8)
+    img = np.concatenate([rgb[0], gap, rgb[1]], axis=1)
+    save_png(path, img.repeat(scale, 0).repeat(scale, 1))
+
+
+def write_svg(path, board, m, xy=None, rot=None, spots=()):
+    """Heatmap (one toggleable group per layer) over footprint boxes, in mm."""
+    xs, ys = m["xs"], m["ys"]
+    rgb = colours(m["util"])
+    w, h = xs[-1] - xs[0], ys[-1] - ys[0]
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{xs[0]:g} {ys[0]:g} {w:g} {h:g}" '
+           f'width="{w * 8:.0f}" height="{h * 8:.0f}">']
+    for k, layer in enumerate(COPPER):
+        hide = "" if k == 0 else ' display="none"'
+        out.append(f'<g id="{layer}" opacity="0.55"{hide}>')
+        for iy, ix in zip(*np.nonzero(m["demand"][k] > 0)):
+            r, g, b = rgb[k, iy, ix].tolist()
+            out.append(f'<rect x="{xs[ix]:g}" y="{ys[iy]:g}" width="{xs[ix + 1] - xs[ix]:g}" '
+                       f'height="{ys[iy + 1] - ys[iy]:g}" fill="rgb({r},{g},{b})"/>')
+        out.append("</g>")
+    out.append('<g fill="none" stroke="#222" stroke-width="0.1">')
+    for x0, y0, x1, y1 in board.bboxes(xy, rot).tolist():
+        out.append(f'<rect x="{x0:g}" y="{y0:g}" width="{x1 - x0:g}" height="{y1 - y0:g}"/>')
+    for x0, y0, x1, y1 in board.outline:
+        out.append(f'<line x1="{x0:g}" y1="{y0:g}" x2="{x1:g}" y2="{y1:g}" stroke="#c8c800"/>')
+    out.append("</g>")
+    for layer, x, y, u in spots:
+        out.append(f'<circle cx="{x:g}" cy="{y:g}" r="1.5" fill="none" stroke="#f0f" '
+                   f'stroke-width="0.2"><title>{layer} {u:.2f}</title></circle>')
+    out.append("</svg>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(out))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="RUDY congestion heatmap")
+    ap.add_argument("board", nargs="?", help=".kicad_pcb file (default: board open in KiCad)")
+    ap.add_argument("--pitch", type=float, default=PITCH, help="heatmap cell size, mm")
+    ap.add_argument("--max-degree", type=int, help="leave out nets with more pins (planes)")
+    ap.add_argument("--top", type=int, default=10, help="hotspots to list")
+    ap.add_argument("--svg")
+    ap.add_argument("--png")
+    args = ap.parse_args(argv)
+    board = Board.load(args.board) if args.board else Board.from_pcbnew()
+    t0 = time.perf_counter()
+    rudy = Rudy(board, NetTable(board, args.max_degree), args.pitch)
+    t1 = time.perf_counter()
+    m = rudy.maps()
+    t2 = time.perf_counter()
+    spots = hotspots(m, top=args.top)
+    for layer, x, y, u in spots:
+        print(f"  {layer:5s} ({x:7.1f}, {y:7.1f})  utilization {u:5.2f}")
+    if args.svg:
+        write_svg(args.svg, board, m, spots=spots)
+    if args.png:
+        write_png(args.png, m)
+    over = float(np.clip(m["demand"] - m["capacity"], 0.0, None).sum())
+    peak = [float(u.max()) for u in m["util"]]
+    ny, nx = m["util"].shape[1:]
+    print(f"✓ {rudy.nets.n_nets} nets on {nx} × {ny} cells: peak utilization "
+          + ", ".join(f"{l} {p:.2f}" for l, p in zip(COPPER, peak))
+          + f"; overflow {over:.1f} mm (setup {(t1 - t0) * 1e3:.1f} ms, "
+          f"maps {(t2 - t1) * 1e3:.1f} ms)")
+    if max(peak) > 1:
+        print(f"⚠ {int((m['util'] > 1).sum())} cells over capacity")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# ---------------------------------------------------------------------
+# connectivity.py  –  headless copper connectivity and ratsnest
+# ---------------------------------------------------------------------
+"""
+What ``pcbnew.BuildConnectivity()`` answers, without KiCad: which pads of
+each net are joined by copper, and which connections are still missing.
+
+Pads, tracks and vias become items in a spatial hash (``cell`` mm
+buckets over their bounding boxes).  Two items of the same net are
+connected when an *anchor* of one — track end, via centre, pad centre —
+lies inside the copper of the other on a shared layer, the same rule
+KiCad uses.  Connected items are merged in a union-find, so
+
+* :meth:`Connectivity.add` costs one hash lookup per anchor;
+* :meth:`Connectivity.remove` marks the item's net dirty and only that
+  net is re-unioned on the next query.
+
+:meth:`Connectivity.unrouted` gives the missing connections per net: the
+minimum spanning tree over the net's pads with distance 0 inside a
+component, whose non-zero edges are exactly the airwires.
+
+    python connectivity.py routed.kicad_pcb
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from board_model import COPPER, Board, Via, copper_layers
+from net_topology import mst
+
+CELL = 1.0                  # mm spatial hash bucket
+EPS = 1e-6
+
+
+class _Item:
+    __slots__ = ("kind", "net", "layers", "box", "anchors", "shape", "obj")
+
+    def __init__(self, kind, net, layers, box, anchors, shape, obj=None):
+        self.kind, self.net, self.layers = kind, net, layers
+        self.box, self.anchors, self.shape, self.obj = box, anchors, shape, obj
+
+
+def _inside(shape, x, y):
+    """Is ``x, y`` within an item's copper."""
+    kind = shape[0]
+    if kind == "seg":
+        _, x1, y1, x2, y2, r = shape
+        dx, dy = x2 - x1, y2 - y1
+        t = max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy or 1.0)))
+        return math.hypot(x - x1 - t * dx, y - y1 - t * dy) <= r + EPS
+    if kind == "circle":
+        _, cx, cy, r = shape
+        return math.hypot(x - cx, y - cy) <= r + EPS
+    _, cx, cy, hw, hh, c, s = shape               # rectangle in the pad frame
+    dx, dy = x - cx, y - cy
+    return abs(dx * c - dy * s) <= hw + EPS and abs(dx * s + dy * c) <= hh + EPS
+
+
+class Connectivity:
+    """Incremental connectivity of one board's pads, tracks and vias."""
+
+    def __init__(self, board, cell=CELL):
+        self.board = board
+        self.cell = cell
+        self.items = []
+        self.parent = []
+        self.hash = {}
+        self.by_net = {}                          # net -> item ids
+        self.ids = {}                             # id(board object) -> item id
+        self.dirty = set()
+        pads = board.pads()
+        self.pad_names = [f"{board.footprints[f].ref}.{n}"
+                          for f, n in zip(pads["fp"].tolist(), pads["number"])]
+        self.n_pads = 0
+        xy = board.pad_xy()
+        k = 0
+        for fp in board.footprints:
+            for p in fp.pads:
+                x, y = map(float, xy[k])
+                k += 1
+                self.n_pads += 1
+                if p.shape == "circle":
+                    shape = ("circle", x, y, p.w / 2)
+                    r = p.w / 2
+                else:
+                    a = math.radians(fp.rot + p.angle)
+                    shape = ("rect", x, y, p.w / 2, p.h / 2, math.cos(a), math.sin(a))
+                    r = math.hypot(p.w, p.h) / 2
+                self._insert(_Item("pad", p.net, frozenset(copper_layers(p, fp.side)),
+                                   (x - r, y - r, x + r, y + r), ((x, y),), shape))
+        for t in board.tracks:
+            self.add(t)
+        for v in board.vias:
+            self.add(v)
+
+    # -- union-find ----------------------------------------------------------
+    def _find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def _union(self, a, b):
+        ra, rb = self._find(a), self._find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+    # -- spatial hash --------------------------------------------------------
+    def _keys(self, box):
+        c = self.cell
+        for ix in range(int(math.floor(box[0] / c)), int(math.floor(box[2] / c)) + 1):
+            for iy in range(int(math.floor(box[1] / c)), int(math.floor(box[3] / c)) + 1):
+                yield ix, iy
+
+    def _insert(self, item):
+        i = len(self.items)
+        self.items.append(item)
+        self.parent.append(i)
+        for key in self._keys(item.box):
+            self.hash.setdefault(key, []).append(i)
+        if item.net:
+            self.by_net.setdefault(item.net, []).append(i)
+            if item.net not in self.dirty:
+                self._connect(i)
+        if item.obj is not None:
+            self.ids[id(item.obj)] = i
+        return i
+
+    def _touching(self, i):
+        """Same-net items whose copper holds an anchor of ``i`` or vice versa."""
+        item = self.items[i]
+        seen = set()
+        c = self.cell
+        for x, y in item.anchors:
+            for j in self.hash.get((int(math.floor(x / c)), int(math.floor(y / c))), ()):
+                other = self.items[j]
+                if j != i and j not in seen and other.kind and other.net == item.net \
+                        and other.layers & item.layers and _inside(other.shape, x, y):
+                    seen.add(j)
+        for key in self._keys(item.box):
+            for j in self.hash.get(key, ()):
+                other = self.items[j]
+                if j == i or j in seen or not other.kind or other.net != item.net \
+                        or not other.layers & item.layers:
+                    continue
+                if any(_inside(item.shape, x, y) for x, y in other.anchors):
+                    seen.add(j)
+        return seen
+
+    def _connect(self, i):
+        for j in self._touching(i):
+            self._union(i, j)
+
+    # -- editing -------------------------------------------------------------
+    def add(self, obj):
+        """Add a :class:`board_model.Track` or ``Via``; returns its item id."""
+        if isinstance(obj, Via):
+            r = obj.size / 2
+            item = _Item("via", obj.net, frozenset(COPPER),
+                         (obj.x - r, obj.y - r, obj.x + r, obj.y + r),
+                         ((obj.x, obj.y),), ("circle", obj.x, obj.y, r), obj)
+        else:
+            r = obj.width / 2
+            item = _Item("track", obj.net, frozenset((obj.layer,)),
+                         (min(obj.x1, obj.x2) - r, min(obj.y1, obj.y2) - r,
+                          max(obj.x1, obj.x2) + r, max(obj.y1, obj.y2) + r),
+                         ((obj.x1, obj.y1), (obj.x2, obj.y2)),
+                         ("seg", obj.x1, obj.y1, obj.x2, obj.y2, r), obj)
+        return self._insert(item)
+
+    def remove(self, obj):
+        """Drop a track or via; its net is re-unioned on the next query."""
+        i = self.ids.pop(id(obj))
+        item = self.items[i]
+        for key in self._keys(item.box):
+            self.hash[key].remove(i)
+        item.kind = None                          # tombstone
+        if item.net:
+            self.by_net[item.net].remove(i)
+            self.dirty.add(item.net)
+
+    def _rebuild(self, net):
+        ids = self.by_net.get(net, [])
+        for i in ids:
+            self.parent[i] = i
+        for i in ids:
+            self._connect(i)
+        self.dirty.discard(net)
+
+    # -- queries -------------------------------------------------------------
+    def nets(self):
+        return sorted(n for n in self.by_net if len(self.net_pads(n)) > 1)
+
+    def net_pads(self, net):
+        return [i for i in self.by_net.get(net, ()) if i < self.n_pads]
+
+    def components(self, net):
+        """Pad ids of ``net`` grouped by the copper island joining them."""
+        if net in self.dirty:
+            self._rebuild(net)
+        groups = {}
+        for i in self.net_pads(net):
+            groups.setdefault(self._find(i), []).append(i)
+        return list(groups.values())
+
+    def unrouted(self, nets=None):
+        """``{net: [(pad a, pad b, mm)]}`` missing connections (nets
+        that are complete are left out)."""
+        out = {}
+        for net in nets or self.nets():
+            groups = self.components(net)
+            if len(groups) < 2:
+                continue
+            pads = [i for g in groups for i in g]
+            label = np.repeat(np.arange(len(groups)), [len(g) for g in groups])
+            xy = np.array([self.items[i].anchors[0] for i in pads])
+            d = np.abs(xy[:, None, :] - xy[None, :, :]).sum(2)
+            d[label[:, None] == label[None, :]] = 0.0
+            out[net] = [(pads[a], pads[b], float(d[a, b]))
+                        for a, b in mst(xy, d).tolist() if label[a] != label[b]]
+        return out
+
+    def complete(self, net):
+        return len(self.components(net)) < 2
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="headless connectivity / unrouted report")
+    ap.add_argument("board", nargs="?", help=".kicad_pcb file (default: board open in KiCad)")
+    ap.add_argument("--all", action="store_true", help="list every missing connection")
+    args = ap.parse_args(argv)
+    board = Board.load(args.board) if args.board else Board.from_pcbnew()
+    t0 = time.perf_counter()
+    conn = Connectivity(board)
+    t1 = time.perf_counter()
+    missing = conn.unrouted()
+    t2 = time.perf_counter()
+    nets = conn.nets()
+    for net, wires in sorted(missing.items()):
+        print(f"  {net:20s} {len(wires):3d} unrouted  "
+              + ", ".join(f"{conn.pad_names[a]}–{conn.pad_names[b]}"
+                          for a, b, _ in (wires if args.all else wires[:3]))
+              + ("" if args.all or len(wires) <= 3 else ", …"))
+    print(f"✓ {len(nets) - len(missing)} of {len(nets)} nets complete, "
+          f"{sum(map(len, missing.values()))} connections unrouted "
+          f"({len(board.tracks)} tracks, {len(board.vias)} vias; build {(t1 - t0) * 1e3:.1f} ms, "
+          f"query {(t2 - t1) * 1e3:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from skidl import *
+from svg_render import generate_svg   # in-process, replaces netlistsvg
 import os
 import os
 print(os.listdir('C:/Users/kerem/Documents/KiCad_Libraries/'))
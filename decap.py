@@ -0,0 +1,179 @@
+# ---------------------------------------------------------------------
+# decap.py  –  put bypass caps next to the IC power pins they serve
+# ---------------------------------------------------------------------
+"""
+The grid placers drop every capacitor into the "CAP" row, so the
+hundreds of bypass caps ``new_deneme.py`` / ``create_netlist.py`` create
+per rail end up far from the BGA balls they decouple.
+
+This pass finds the decoupling caps (two pads: one ground, one rail) and
+the power pins of the large ICs on the same rails, and gives each cap its
+own pin: k nearest pins per cap from a KD-tree (``scipy.spatial`` when
+installed, a vectorized brute-force search otherwise), then the
+cap/pin pairs are claimed shortest first.  When a rail has more caps
+than pins, the pins are handed out again in further rounds.  Each cap
+is set down just outside the IC courtyard, on the edge nearest its pin;
+only the caps are then legalized.
+
+    python decap.py board.kicad_pcb -o out.kicad_pcb
+"""
+import argparse
+import re
+
+import numpy as np
+
+import placement
+from board_model import Board
+from spatial_index import legalize
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:                     # numpy fallback below
+    cKDTree = None
+
+GROUND = re.compile(r"^/?([ADP]?GND|VSS|0V)", re.I)
+MIN_IC_PADS = 8                         # smaller parts are not decap targets
+GAP = 0.3                               # mm between IC courtyard and cap
+K = 8                                   # candidate pins per cap
+
+
+def is_ground(name):
+    return bool(GROUND.match(name))
+
+
+def decaps(board):
+    """``[(footprint index, rail net name)]`` of two-pad ground/rail caps."""
+    out = []
+    for i, fp in enumerate(board.footprints):
+        if placement.family(fp.ref) != "CAP" or len(fp.pads) != 2 or fp.locked:
+            continue
+        a, b = (p.net for p in fp.pads)
+        if not a or not b:
+            continue
+        if is_ground(a) != is_ground(b):
+            out.append((i, b if is_ground(a) else a))
+    return out
+
+
+def power_pins(board, rails, min_pads=MIN_IC_PADS):
+    """Pad indices (into :meth:`Board.pads`) of IC pins on ``rails``."""
+    pads = board.pads()
+    names = pads["net_names"]
+    rail_ids = np.array([i for i, n in enumerate(names) if n in rails], dtype=np.int64)
+    n_pads = np.array([len(fp.pads) for fp in board.footprints])
+    big = n_pads[pads["fp"]] >= min_pads
+    return np.flatnonzero(big & np.isin(pads["net"], rail_ids))
+
+
+def nearest(points, queries, k):
+    """Indices ``(Q, k)`` of the ``k`` nearest ``points`` to each query."""
+    k = min(k, len(points))
+    if cKDTree is not None:
+        _, idx = cKDTree(points).query(queries, k=k)
+        return np.asarray(idx).reshape(len(queries), k)
+    d = ((queries[:, None, :] - points[None, :, :]) ** 2).sum(-1)
+    idx = np.argpartition(d, k - 1, axis=1)[:, :k] if k < len(points) else \
+        np.broadcast_to(np.arange(len(points)), d.shape)
+    order = np.take_along_axis(d, idx, 1).argsort(1)
+    return np.take_along_axis(idx, order, 1)
+
+
+def assign(cap_xy, pin_xy, k=K):
+    """Pin index for every cap; pins are reused only after all are taken."""
+    n = len(cap_xy)
+    owner = np.full(n, -1, dtype=np.int64)
+    left = np.arange(n)
+    taken = set()
+    while len(left):
+        if len(taken) == len(pin_xy):   # every pin has a cap: start sharing
+            taken = set()
+        cand = nearest(pin_xy, cap_xy[left], k)
+        dist = np.linalg.norm(cap_xy[left, None, :] - pin_xy[cand], axis=2)
+        order = np.argsort(dist, axis=None, kind="stable")
+        caps, pins = np.unravel_index(order, dist.shape)
+        for c, p in zip(caps.tolist(), cand[caps, pins].tolist()):
+            if owner[left[c]] < 0 and p not in taken:
+                owner[left[c]] = p
+                taken.add(p)
+                if len(taken) == len(pin_xy):
+                    break
+        left = left[owner[left] < 0]
+        k = len(pin_xy)                 # later rounds: any pin will do
+    return owner
+
+
+def spot(ic_box, pin, cap_box, gap=GAP):
+    """Offset of a cap (world ``cap_box`` at its origin) just outside
+    ``ic_box`` on the edge nearest ``pin``."""
+    x0, y0, x1, y1 = ic_box
+    px, py = pin
+    cw, ch = cap_box[2] - cap_box[0], cap_box[3] - cap_box[1]
+    cx = min(max(px, x0 + cw / 2), x1 - cw / 2) if x1 - x0 > cw else (x0 + x1) / 2
+    cy = min(max(py, y0 + ch / 2), y1 - ch / 2) if y1 - y0 > ch else (y0 + y1) / 2
+    edge = np.argmin([px - x0, x1 - px, py - y0, y1 - py])
+    if edge == 0:
+        cx = x0 - gap - cw / 2
+    elif edge == 1:
+        cx = x1 + gap + cw / 2
+    elif edge == 2:
+        cy = y0 - gap - ch / 2
+    else:
+        cy = y1 + gap + ch / 2
+    # box centre -> footprint origin
+    return cx - (cap_box[0] + cap_box[2]) / 2, cy - (cap_box[1] + cap_box[3]) / 2
+
+
+def place_decaps(board, xy=None, rot=None, bounds=None, gap=GAP, min_pads=MIN_IC_PADS):
+    """Move decoupling caps next to their IC pins; returns ``(xy, n_placed)``."""
+    if xy is None:
+        xy, rot = board.placement()
+    xy = np.array(xy, dtype=float)
+    rot = np.zeros(len(xy)) if rot is None else np.asarray(rot, dtype=float)
+    caps = decaps(board)
+    if not caps:
+        return xy, 0
+    pins = power_pins(board, {net for _, net in caps}, min_pads)
+    if not len(pins):
+        return xy, 0
+    pads = board.pads()
+    names = pads["net_names"]
+    pin_xy = board.pad_xy(xy, rot)
+    pin_fp = pads["fp"][pins]
+    pin_net = [names[n] for n in pads["net"][pins]]
+    boxes = board.bboxes(xy, rot)
+    origin_boxes = board.bboxes(np.zeros_like(xy), rot)
+
+    placed = []
+    for net in sorted({net for _, net in caps}):
+        cap_i = np.array([i for i, n in caps if n == net])
+        on_net = np.array([i for i, n in enumerate(pin_net) if n == net], dtype=np.int64)
+        if not len(on_net):
+            continue
+        owner = assign(xy[cap_i], pin_xy[pins[on_net]])
+        for c, o in zip(cap_i.tolist(), owner.tolist()):
+            p = on_net[o]
+            xy[c] = spot(boxes[pin_fp[p]], pin_xy[pins[p]], origin_boxes[c], gap)
+            placed.append(c)
+    xy, _ = legalize(board, xy, rot, bounds, movable=placed)
+    return xy, len(placed)
+
+
+def run(path=None, out=None, gap=GAP, min_pads=MIN_IC_PADS):
+    board = Board.load(path) if path else Board.from_pcbnew()
+    xy, rot = board.placement()
+    xy, n = place_decaps(board, xy, rot, board.outline_bbox(), gap, min_pads)
+    board.set_placement(xy, rot)
+    board.commit(out)
+    print(f"✓ placed {n} decoupling caps next to their power pins")
+    return board
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="decoupling-cap proximity placement")
+    ap.add_argument("board", nargs="?", help=".kicad_pcb file (default: board open in KiCad)")
+    ap.add_argument("-o", "--output")
+    ap.add_argument("--gap", type=float, default=GAP, help="mm from IC courtyard")
+    ap.add_argument("--min-pads", type=int, default=MIN_IC_PADS,
+                    help="pads a footprint needs to count as an IC")
+    args = ap.parse_args()
+    run(args.board, args.output, args.gap, args.min_pads)
@@ -0,0 +1,331 @@
+# ---------------------------------------------------------------------
+# drc.py  –  headless copper clearance check (track / via / pad / edge)
+# ---------------------------------------------------------------------
+"""
+KiCad's DRC without KiCad, for generated boards — ``b.py``'s straight
+tracks in particular cross whatever lies between two pads.
+
+Every pad, track and via becomes a *shape*: a skeleton of segments plus a
+radius (tracks and vias are capsules, round pads points, oval pads short
+segments) and, for rectangular pads, the filled outline polygon.  The
+distance between two shapes is the closest skeleton pair minus both
+radii, or 0 when one lies inside the other's polygon.  Checks:
+
+* copper–copper on a shared layer between different nets
+  (track–track, track–pad, pad–pad, vias count as both-layer copper)
+  against ``clearance``;
+* copper against the Edge.Cuts segments (``edge_clearance``) and copper
+  whose centre lies outside the outline.
+
+Shapes sit in a :class:`spatial_index.SpatialIndex` with boxes grown by
+half the clearance, so only pairs whose grown boxes meet are measured.
+:meth:`DRC.update` re-indexes only the footprints / tracks / vias handed
+to it and re-tests just their neighbourhood — cheap enough to run inside
+placement and routing loops.
+
+    python drc.py routed.kicad_pcb -o drc.json
+"""
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+from board_model import COPPER, Board, Footprint, Via, copper_layers, rotate
+from maze_router import CLEARANCE, EDGE_CLEARANCE
+from spatial_index import SpatialIndex
+
+CELL = 2.0                  # mm hash bucket
+
+
+# ── geometry ─────────────────────────────────────────────────────────────
+def _point_seg(px, py, x1, y1, x2, y2):
+    """Distance and closest point from ``p`` to segment ``1-2``."""
+    dx, dy = x2 - x1, y2 - y1
+    L = dx * dx + dy * dy
+    t = 0.0 if L == 0 else max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / L))
+    cx, cy = x1 + t * dx, y1 + t * dy
+    return math.hypot(px - cx, py - cy), cx, cy
+
+
+def _cross(ax, ay, bx, by, cx, cy):
+    return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+
+def seg_seg(a, b):
+    """``(distance, x, y)`` between segments ``a``, ``b`` = (x1, y1, x2, y2);
+    ``x, y`` is the midpoint of the closest pair."""
+    ax1, ay1, ax2, ay2 = a
+    bx1, by1, bx2, by2 = b
+    d1, d2 = _cross(ax1, ay1, ax2, ay2, bx1, by1), _cross(ax1, ay1, ax2, ay2, bx2, by2)
+    d3, d4 = _cross(bx1, by1, bx2, by2, ax1, ay1), _cross(bx1, by1, bx2, by2, ax2, ay2)
+    if ((d1 > 0) != (d2 > 0)) and ((d3 > 0) != (d4 > 0)) and d1 and d2 and d3 and d4:
+        t = d3 / (d3 - d4)
+        return 0.0, ax1 + t * (ax2 - ax1), ay1 + t * (ay2 - ay1)
+    best = None
+    for (px, py), seg in (((ax1, ay1), b), ((ax2, ay2), b), ((bx1, by1), a), ((bx2, by2), a)):
+        d, cx, cy = _point_seg(px, py, *seg)
+        if best is None or d < best[0]:
+            best = d, (px + cx) / 2, (py + cy) / 2
+    return best
+
+
+def _in_poly(poly, x, y):
+    """Point in a convex polygon (either winding)."""
+    sign = 0
+    n = len(poly)
+    for k in range(n):
+        (x1, y1), (x2, y2) = poly[k], poly[(k + 1) % n]
+        c = _cross(x1, y1, x2, y2, x, y)
+        if c:
+            if sign and (c > 0) != (sign > 0):
+                return False
+            sign = c
+    return True
+
+
+class Shape:
+    __slots__ = ("key", "kind", "net", "layers", "segs", "r", "poly", "box", "label", "centre")
+
+    def __init__(self, key, kind, net, layers, segs, r, poly=None, label=""):
+        self.key, self.kind, self.net, self.layers = key, kind, net, frozenset(layers)
+        self.segs, self.r, self.poly, self.label = segs, r, poly, label
+        pts = [p for s in segs for p in ((s[0], s[1]), (s[2], s[3]))] + list(poly or ())
+        xs, ys = [p[0] for p in pts], [p[1] for p in pts]
+        self.box = (min(xs) - r, min(ys) - r, max(xs) + r, max(ys) + r)
+        self.centre = ((self.box[0] + self.box[2]) / 2, (self.box[1] + self.box[3]) / 2)
+
+    def edges(self):
+        """Segments to measure against: the polygon's sides, else the skeleton."""
+        if not self.poly:
+            return self.segs
+        p = self.poly
+        return [(*p[k], *p[(k + 1) % len(p)]) for k in range(len(p))]
+
+
+def distance(a, b):
+    """``(gap, x, y)``: copper-to-copper gap between two shapes (0 on overlap)."""
+    for inner, outer in ((a, b), (b, a)):
+        if outer.poly:
+            for s in inner.segs:
+                for px, py in ((s[0], s[1]), (s[2], s[3])):
+                    if _in_poly(outer.poly, px, py):
+                        return 0.0, px, py
+    best = None
+    for sa in a.edges():
+        for sb in b.edges():
+            d = seg_seg(sa, sb)
+            if best is None or d[0] < best[0]:
+                best = d
+    return max(best[0] - a.r - b.r, 0.0), best[1], best[2]
+
+
+# ── shapes of board items ────────────────────────────────────────────────
+def pad_shapes(fp, fp_index):
+    """One :class:`Shape` per pad of ``fp``, in world coordinates."""
+    out = []
+    for k, p in enumerate(fp.pads):
+        local = np.array([p.x, p.y])
+        x, y = (rotate(local, fp.rot) + (fp.x, fp.y)).tolist()
+        a = fp.rot + p.angle
+        layers = copper_layers(p, fp.side)
+        label = f"{fp.ref}.{p.number}"
+        key = ("pad", fp_index, k)
+        if p.shape == "circle":
+            out.append(Shape(key, "pad", p.net, layers, [(x, y, x, y)], p.w / 2, label=label))
+        elif p.shape == "oval":
+            r = min(p.w, p.h) / 2
+            hx, hy = max(p.w / 2 - r, 0.0), max(p.h / 2 - r, 0.0)
+            ends = rotate(np.array([[-hx, -hy], [hx, hy]]), a) + (x, y)
+            out.append(Shape(key, "pad", p.net, layers, [tuple(ends.ravel().tolist())], r,
+                             label=label))
+        else:                                        # rect, roundrect, trapezoid, custom
+            hw, hh = p.w / 2, p.h / 2
+            corners = rotate(np.array([[-hw, -hh], [hw, -hh], [hw, hh], [-hw, hh]]), a) + (x, y)
+            poly = [tuple(c) for c in corners.tolist()]
+            out.append(Shape(key, "pad", p.net, layers, [(x, y, x, y)], 0.0, poly, label))
+    return out
+
+
+def copper_shape(obj):
+    if isinstance(obj, Via):
+        return Shape(("via", id(obj)), "via", obj.net, COPPER, [(obj.x, obj.y, obj.x, obj.y)],
+                     obj.size / 2, label=f"via@{obj.x:.2f},{obj.y:.2f}")
+    return Shape(("track", id(obj)), "track", obj.net, (obj.layer,),
+                 [(obj.x1, obj.y1, obj.x2, obj.y2)], obj.width / 2,
+                 label=f"track@{(obj.x1 + obj.x2) / 2:.2f},{(obj.y1 + obj.y2) / 2:.2f}")
+
+
+# ── the checker ──────────────────────────────────────────────────────────
+class DRC:
+    """Clearance checker over one board; keeps its violations between updates."""
+
+    def __init__(self, board, clearance=CLEARANCE, edge_clearance=EDGE_CLEARANCE, cell=CELL):
+        self.board = board
+        self.clearance, self.edge_clearance = clearance, edge_clearance
+        self.margin = max(clearance, edge_clearance) / 2
+        self.index = SpatialIndex(cell)
+        self.shapes = {}
+        self.violations = {}                     # frozenset of keys -> report dict
+        self.fp_keys = {}                        # id(footprint) -> pad keys
+        for k, (x1, y1, x2, y2) in enumerate(board.outline):
+            self._insert(Shape(("edge", k), "edge", None, COPPER, [(x1, y1, x2, y2)], 0.0,
+                               label="Edge.Cuts"))
+        for i, fp in enumerate(board.footprints):
+            shapes = pad_shapes(fp, i)
+            self.fp_keys[id(fp)] = [s.key for s in shapes]
+            for s in shapes:
+                self._insert(s)
+        for obj in list(board.tracks) + list(board.vias):
+            self._insert(copper_shape(obj))
+
+    def _insert(self, shape):
+        self.shapes[shape.key] = shape
+        m = self.margin
+        b = shape.box
+        self.index.insert(shape.key, (b[0] - m, b[1] - m, b[2] + m, b[3] + m))
+
+    def _drop(self, key):
+        self.index.remove(key)
+        del self.shapes[key]
+        for pair in [p for p in self.violations if key in p]:
+            del self.violations[pair]
+
+    # -- tests ---------------------------------------------------------------
+    def _pair(self, a, b):
+        """Violation dict for two shapes, or ``None``."""
+        if a.kind == "edge" and b.kind == "edge":
+            return None
+        if a.kind == "edge" or b.kind == "edge":
+            need = self.edge_clearance
+        else:
+            if a.net and a.net == b.net:
+                return None
+            if a.kind == "pad" and b.kind == "pad" and a.key[1] == b.key[1] and not a.net:
+                return None                      # unconnected pads of one part (mounting)
+            need = self.clearance
+        layers = a.layers & b.layers
+        if not layers:
+            return None
+        gap, x, y = distance(a, b)
+        if gap >= need - 1e-6:
+            return None
+        kinds = sorted((a.kind, b.kind), key=("edge", "pad", "via", "track").index)
+        return {"type": "-".join(kinds), "layer": sorted(layers)[0] if len(layers) == 1 else "*.Cu",
+                "a": a.label, "b": b.label, "nets": [a.net or "", b.net or ""],
+                "gap": round(gap, 4), "required": need, "x": round(x, 3), "y": round(y, 3)}
+
+    def _outside(self, s):
+        """Copper centre outside the Edge.Cuts outline (ray casting)."""
+        if s.kind == "edge" or not self.board.outline:
+            return None
+        x, y = s.centre
+        inside = False
+        for x1, y1, x2, y2 in self.board.outline:
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+        if inside:
+            return None
+        return {"type": f"{s.kind}-outside", "layer": "*.Cu" if len(s.layers) > 1
+                else next(iter(s.layers)), "a": s.label, "b": "Edge.Cuts", "nets": [s.net or ""],
+                "gap": 0.0, "required": self.edge_clearance, "x": round(x, 3), "y": round(y, 3)}
+
+    def _check(self, keys):
+        for key in keys:
+            s = self.shapes[key]
+            v = self._outside(s)
+            if v:
+                self.violations[frozenset((key,))] = v
+            for other in self.index.query(self.index.boxes[key], exclude=key):
+                pair = frozenset((key, other))
+                if pair in self.violations:
+                    continue
+                v = self._pair(s, self.shapes[other])
+                if v:
+                    self.violations[pair] = v
+
+    def run(self):
+        """Full check; returns the violation list."""
+        self.violations = {}
+        for a, b in self.index.overlaps():
+            v = self._pair(self.shapes[a], self.shapes[b])
+            if v:
+                self.violations[frozenset((a, b))] = v
+        for s in self.shapes.values():
+            v = self._outside(s)
+            if v:
+                self.violations[frozenset((s.key,))] = v
+        return self.report()
+
+    # -- incremental ---------------------------------------------------------
+    def update(self, changed=(), removed=()):
+        """Re-check after edits: ``changed`` footprints (moved / rotated),
+        tracks or vias (new or moved), ``removed`` tracks or vias.
+        Returns the full, updated violation list."""
+        keys = []
+        index = {id(fp): i for i, fp in enumerate(self.board.footprints)}
+        for obj in removed:
+            self._drop(copper_shape(obj).key)
+        for obj in changed:
+            if isinstance(obj, Footprint):
+                for key in self.fp_keys.get(id(obj), ()):
+                    self._drop(key)
+                shapes = pad_shapes(obj, index[id(obj)])
+                self.fp_keys[id(obj)] = [s.key for s in shapes]
+            else:
+                shapes = [copper_shape(obj)]
+                if shapes[0].key in self.shapes:
+                    self._drop(shapes[0].key)
+            for s in shapes:
+                self._insert(s)
+                keys.append(s.key)
+        self._check(keys)
+        return self.report()
+
+    def report(self):
+        return sorted(self.violations.values(), key=lambda v: (v["type"], v["x"], v["y"]))
+
+
+def check(board, clearance=CLEARANCE, edge_clearance=EDGE_CLEARANCE):
+    """One-shot full DRC of ``board``: list of violation dicts."""
+    return DRC(board, clearance, edge_clearance).run()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="headless clearance DRC")
+    ap.add_argument("board", nargs="?", help=".kicad_pcb file (default: board open in KiCad)")
+    ap.add_argument("-o", "--output", help="write the JSON report here")
+    ap.add_argument("--clearance", type=float, default=CLEARANCE)
+    ap.add_argument("--edge-clearance", type=float, default=EDGE_CLEARANCE)
+    ap.add_argument("--top", type=int, default=20, help="violations to print")
+    args = ap.parse_args(argv)
+    board = Board.load(args.board) if args.board else Board.from_pcbnew()
+    t0 = time.perf_counter()
+    drc = DRC(board, args.clearance, args.edge_clearance)
+    violations = drc.run()
+    ms = (time.perf_counter() - t0) * 1e3
+    counts = {}
+    for v in violations:
+        counts[v["type"]] = counts.get(v["type"], 0) + 1
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"board": args.board, "clearance": args.clearance,
+                       "edge_clearance": args.edge_clearance, "counts": counts,
+                       "violations": violations, "ms": round(ms, 1)}, f, indent=1)
+    for v in violations[:args.top]:
+        print(f"  {v['type']:18s} {v['layer']:5s} {v['a']:>22s} ↔ {v['b']:<22s} "
+              f"gap {v['gap']:.3f} < {v['required']:.2f}  at ({v['x']:.2f}, {v['y']:.2f})")
+    n = len(drc.shapes)
+    if violations:
+        print(f"⚠ {len(violations)} violations ("
+              + ", ".join(f"{k} {c}" for k, c in sorted(counts.items()))
+              + f") among {n} shapes in {ms:.1f} ms")
+        return 1
+    print(f"✓ no clearance violations among {n} shapes ({ms:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
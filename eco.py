@@ -0,0 +1,146 @@
+# ---------------------------------------------------------------------
+# eco.py  –  incremental placement: only new / unplaced footprints move
+# ---------------------------------------------------------------------
+"""
+For engineering changes: when one LED circuit is added to
+``scheamtic_1.py`` and the netlist re-imported, re-running ``d.py``
+would re-grid every footprint and lose the hand-tuned positions.  Here
+everything already on the board stays put; only the new parts are
+placed, into free space found through :class:`spatial_index.SpatialIndex`.
+
+A part counts as new when its reference is missing from a previous
+board (``--since old.kicad_pcb``) or, without one, when it looks freshly
+imported: entirely outside the board outline, or stacked on the same
+origin as another footprint (KiCad drops imported footprints in a
+heap).  Parts that merely overlap, or overhang the edge, were put there
+by hand and stay; locked footprints never count as new.  Each new part aims for the centre of
+the placed pads it shares nets with and takes the nearest free spot,
+largest parts first.  Work is proportional to the new parts; the index
+over the existing ones is built once.
+
+    python eco.py board.kicad_pcb --since board-backup.kicad_pcb -o out.kicad_pcb
+    python d.py board.kicad_pcb --eco
+"""
+import argparse
+
+import numpy as np
+
+from board_model import Board
+from spatial_index import SpatialIndex
+
+GAP = 0.5                   # mm kept between courtyards
+
+
+def new_parts(board, since=None):
+    """Indices of footprints to place (see module docstring)."""
+    free = [i for i, fp in enumerate(board.footprints) if not fp.locked]
+    if since is not None:
+        old = set(since.refs)
+        return [i for i in free if board.refs[i] not in old]
+    bb = board.bboxes()
+    outline = board.outline_bbox()
+    out = set()
+    if outline is not None:
+        x0, y0, x1, y1 = outline
+        out.update(np.flatnonzero((bb[:, 2] < x0) | (bb[:, 3] < y0)
+                                  | (bb[:, 0] > x1) | (bb[:, 1] > y1)).tolist())
+    xy, _ = board.placement()
+    _, stack, count = np.unique(np.round(xy, 3), axis=0, return_inverse=True,
+                                return_counts=True)
+    out.update(np.flatnonzero(count[stack.ravel()] > 1).tolist())
+    return [i for i in free if i in out]
+
+
+def targets(board, xy, rot, placed):
+    """Where each part would like to be: mean of the placed pads on its nets."""
+    pads = board.pads()
+    pad_xy = board.pad_xy(xy, rot)
+    fp, net = pads["fp"], pads["net"]
+    ok = placed[fp] & (net >= 0)
+    n_nets = len(pads["net_names"])
+    sx = np.bincount(net[ok], pad_xy[ok, 0], minlength=n_nets)
+    sy = np.bincount(net[ok], pad_xy[ok, 1], minlength=n_nets)
+    cnt = np.bincount(net[ok], minlength=n_nets)
+    want = np.full((len(xy), 2), np.nan)
+    for i in np.flatnonzero(~placed).tolist():
+        lo, hi = np.searchsorted(fp, [i, i + 1])        # pads are grouped by footprint
+        nets = np.unique(net[lo:hi])
+        nets = nets[(nets >= 0) & (cnt[np.maximum(nets, 0)] > 0)]
+        if len(nets):
+            want[i] = sx[nets].sum() / cnt[nets].sum(), sy[nets].sum() / cnt[nets].sum()
+    return want
+
+
+def place_new(board, new, bounds=None, gap=GAP, step=0.5):
+    """Place ``new`` (indices) around the fixed rest; returns ``(xy, report)``.
+
+    ``report`` has per-part ``displacement`` (from where the part was)
+    and ``miss`` (distance from its net target), plus ``moved_existing``,
+    which is 0 by construction.
+    """
+    xy, rot = board.placement()
+    xy = xy.copy()
+    start = xy.copy()
+    placed = np.ones(len(xy), dtype=bool)
+    placed[new] = False
+    bounds = bounds if bounds is not None else board.outline_bbox()
+    bb = board.bboxes(xy, rot)
+    bb[:, :2] -= gap / 2
+    bb[:, 2:] += gap / 2
+    idx = SpatialIndex.from_boxes(bb[placed], ids=np.flatnonzero(placed).tolist())
+
+    want = targets(board, xy, rot, placed)
+    if bounds is not None:
+        centre = ((bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2)
+    else:
+        centre = tuple(xy[placed].mean(0)) if placed.any() else (0.0, 0.0)
+    area = (bb[:, 2] - bb[:, 0]) * (bb[:, 3] - bb[:, 1])
+    report = {"placed": [], "failed": [], "moved_existing": 0}
+    for i in sorted(new, key=lambda i: -area[i]):
+        goal = centre if np.isnan(want[i, 0]) else tuple(want[i])
+        shift = np.subtract(goal, ((bb[i, 0] + bb[i, 2]) / 2, (bb[i, 1] + bb[i, 3]) / 2))
+        box = (bb[i, 0] + shift[0], bb[i, 1] + shift[1], bb[i, 2] + shift[0], bb[i, 3] + shift[1])
+        d = idx.nearest_free(box, bounds, step)
+        if d is None:
+            report["failed"].append(board.footprints[i].ref)
+            continue
+        box = (box[0] + d[0], box[1] + d[1], box[2] + d[0], box[3] + d[1])
+        idx.insert(i, box)
+        xy[i] += shift + d
+        report["placed"].append({"ref": board.footprints[i].ref,
+                                 "displacement": float(np.hypot(*(xy[i] - start[i]))),
+                                 "miss": float(np.hypot(*d))})
+    return xy, report
+
+
+def run(path=None, out=None, since=None, bounds=None, gap=GAP):
+    board = Board.load(path) if path else Board.from_pcbnew()
+    new = new_parts(board, Board.load(since) if since else None)
+    if not new:
+        if out:
+            board.commit(out)
+        print("✓ nothing to place, board unchanged" + (f" (written to {out})" if out else ""))
+        return board
+    xy, report = place_new(board, new, bounds, gap)
+    board.set_placement(xy[new], idx=new)
+    board.commit(out)
+    miss = [p["miss"] for p in report["placed"]]
+    print(f"✓ placed {len(report['placed'])} new footprints, {report['moved_existing']} "
+          f"existing moved; mean {np.mean(miss) if miss else 0:.1f} mm from net target "
+          f"(max {max(miss, default=0):.1f} mm)")
+    for p in report["placed"]:
+        print(f"  {p['ref']:12s} moved {p['displacement']:7.1f} mm, "
+              f"{p['miss']:5.1f} mm from target")
+    if report["failed"]:
+        print(f"⚠ no free space for: {', '.join(report['failed'])}")
+    return board
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="incremental (ECO) placement")
+    ap.add_argument("board", nargs="?", help=".kicad_pcb file (default: board open in KiCad)")
+    ap.add_argument("-o", "--output")
+    ap.add_argument("--since", help="earlier board; refs missing from it are the new parts")
+    ap.add_argument("--gap", type=float, default=GAP)
+    args = ap.parse_args()
+    run(args.board, args.output, args.since, gap=args.gap)
@@ -0,0 +1,373 @@
+# ---------------------------------------------------------------------
+# fp_cache.py  –  footprint geometry parsed once, kept as packed arrays
+# ---------------------------------------------------------------------
+"""
+Placement, DRC, routing and outline fitting all ask the same questions of
+every footprint — where are its pads, how big, which layers, what does its
+courtyard look like — and in pcbnew each answer is a SWIG call per
+object (``e.py``'s ``GetBoundingBox`` loop).  But a footprint's geometry
+only depends on its library file.  This cache parses each ``.kicad_mod``
+once and stores it as flat arrays shared by every footprint:
+
+* pads:      ``pad_xy``, ``pad_size``, ``pad_angle``, ``pad_shape`` (index
+  into :data:`SHAPES`), ``pad_layers`` (bit 0 F.Cu, bit 1 B.Cu),
+  ``pad_drill``, ``pad_number``; rows of footprint k are
+  ``pad_ptr[k]:pad_ptr[k + 1]``;
+* courtyard: polygon vertices ``crt_xy`` with ``crt_ptr`` per footprint
+  and ``crt_poly`` (polygon id per vertex), plus the local ``bbox``.
+
+Entries are keyed by ``lib:name`` and the file's mtime (a changed file is
+re-parsed, its old rows dropped on :meth:`save`) and persisted to one
+``.npz``.  Footprints embedded in a ``.kicad_pcb`` can seed the cache
+where the libraries are not installed (back-side ones flipped back to
+library form first).  A board instance is then just ``(key, x, y, rot,
+side)``: :meth:`place` turns N instances into world pad / courtyard
+arrays with one gather and one rotation, no per-object calls — back-side
+instances mirrored the way KiCad's *Flip* does (local y negated).
+
+    python fp_cache.py board.kicad_pcb --lib-dir /usr/share/kicad/footprints
+"""
+import argparse
+import copy
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+import sexpr
+from board_model import COPPER, Board, _flip_node, _footprint_from_node, copper_layers, rotate
+
+CACHE = os.path.join(os.path.expanduser("~"), ".cache", "kicad-fp-geometry.npz")
+ENV_DIRS = ("KICAD9_FOOTPRINT_DIR", "KICAD8_FOOTPRINT_DIR", "KICAD7_FOOTPRINT_DIR",
+            "KICAD6_FOOTPRINT_DIR", "KICAD_FOOTPRINT_DIR")
+SHAPES = ("rect", "roundrect", "circle", "oval", "trapezoid", "custom")
+CIRCLE_SIDES = 16           # courtyard circles become polygons
+_ARRAYS = ("pad_xy", "pad_size", "pad_angle", "pad_shape", "pad_layers", "pad_drill",
+           "crt_xy", "crt_poly")
+
+
+def _chain(segments, tol=1e-4):
+    """Join loose courtyard lines into closed polygons (greedy end matching)."""
+    segs = [((round(x1 / tol), round(y1 / tol)), (round(x2 / tol), round(y2 / tol)), s)
+            for x1, y1, x2, y2 in segments for s in [(x1, y1, x2, y2)]]
+    polys = []
+    while segs:
+        a, b, s = segs.pop()
+        poly = [s[:2], s[2:]]
+        head, tail = a, b
+        grown = True
+        while grown and tail != head:
+            grown = False
+            for k, (c, d, t) in enumerate(segs):
+                if c == tail or d == tail:
+                    segs.pop(k)
+                    nxt = t[2:] if c == tail else t[:2]
+                    tail = d if c == tail else c
+                    if tail != head:
+                        poly.append(nxt)
+                    grown = True
+                    break
+        polys.append(poly)
+    return polys
+
+
+def courtyard_polygons(node):
+    """Courtyard outlines of a footprint node as lists of local (x, y)."""
+    polys, lines = [], []
+    for g in node:
+        if not (isinstance(g, list) and g and g[0] in ("fp_line", "fp_rect", "fp_poly",
+                                                        "fp_circle", "fp_arc")):
+            continue
+        if not str(sexpr.value(g, "layer", "")).endswith("CrtYd"):
+            continue
+        if g[0] == "fp_rect":
+            (x0, y0), (x1, y1) = sexpr.floats(g, "start"), sexpr.floats(g, "end")
+            polys.append([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])
+        elif g[0] == "fp_poly":
+            polys.append([(float(p[1]), float(p[2]))
+                          for p in sexpr.find_all(sexpr.find(g, "pts") or [], "xy")])
+        elif g[0] == "fp_circle":
+            cx, cy = sexpr.floats(g, "center")
+            ex, ey = sexpr.floats(g, "end")
+            r = math.hypot(ex - cx, ey - cy)
+            polys.append([(cx + r * math.cos(2 * math.pi * k / CIRCLE_SIDES),
+                           cy + r * math.sin(2 * math.pi * k / CIRCLE_SIDES))
+                          for k in range(CIRCLE_SIDES)])
+        else:                                        # lines; arcs by their chord
+            lines.append((*sexpr.floats(g, "start"), *sexpr.floats(g, "end")))
+    return polys + _chain(lines)
+
+
+class FootprintCache:
+    """``lib:name`` → packed pad / courtyard geometry, persisted to ``path``."""
+
+    def __init__(self, path=CACHE, lib_dirs=()):
+        self.path = path
+        self.lib_dirs = list(lib_dirs) + [os.environ[e] for e in ENV_DIRS if os.environ.get(e)]
+        self.keys, self.mtime, self.index = [], [], {}
+        self.numbers = []
+        self.pad_ptr, self.crt_ptr = [0], [0]
+        self.bbox = np.zeros((0, 4))
+        self._rows = {name: [] for name in _ARRAYS}
+        self._packed = None
+        self.stats = {"hits": 0, "parsed": 0, "embedded": 0, "missing": 0}
+        self.dirty = False
+        if path and os.path.exists(path):
+            self._load()
+
+    # -- persistence ---------------------------------------------------------
+    def _load(self):
+        with np.load(self.path, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            self.keys, self.mtime = meta["keys"], meta["mtime"]
+            self.numbers = [n.split("\t") if n else [] for n in meta["numbers"]]
+            self.pad_ptr, self.crt_ptr = z["pad_ptr"].tolist(), z["crt_ptr"].tolist()
+            self.bbox = z["bbox"]
+            self._packed = {name: z[name] for name in _ARRAYS}
+        self.index = {k: i for i, k in enumerate(self.keys)}
+        self._rows = {name: [self._packed[name]] for name in _ARRAYS}
+
+    def save(self, path=None):
+        self._compact()
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        meta = json.dumps({"keys": self.keys, "mtime": self.mtime,
+                           "numbers": ["\t".join(n) for n in self.numbers]})
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, meta=np.array(meta), pad_ptr=np.array(self.pad_ptr),
+                 crt_ptr=np.array(self.crt_ptr), bbox=self.bbox, **self.packed())
+        os.replace(tmp, path)
+        self.dirty = False
+
+    def _compact(self):
+        """Drop the rows orphaned by re-parsed footprints (``\x00stale`` keys)."""
+        keep = [i for i, k in enumerate(self.keys) if "\x00" not in k]
+        if len(keep) == len(self.keys):
+            return
+        z = self.packed()
+
+        def gather(ptr):
+            ptr = np.asarray(ptr)
+            count = ptr[1:][keep] - ptr[:-1][keep]
+            idx = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count) + \
+                np.repeat(ptr[:-1][keep], count)
+            return idx, [0] + np.cumsum(count).tolist()
+
+        pads, self.pad_ptr = gather(self.pad_ptr)
+        crt, self.crt_ptr = gather(self.crt_ptr)
+        self._packed = {name: a[crt if name.startswith("crt_") else pads] for name, a in z.items()}
+        self._rows = {name: [a] for name, a in self._packed.items()}
+        self.keys = [self.keys[i] for i in keep]
+        self.mtime = [self.mtime[i] for i in keep]
+        self.numbers = [self.numbers[i] for i in keep]
+        self.bbox = self.bbox[keep]
+        self.index = {k: i for i, k in enumerate(self.keys)}
+        self.dirty = True
+
+    def packed(self):
+        """The flat arrays (see the module docstring)."""
+        if self._packed is None or any(len(r) > 1 for r in self._rows.values()):
+            self._packed = {name: np.concatenate(rows) if rows else np.zeros(0)
+                            for name, rows in self._rows.items()}
+            if not self._rows["pad_xy"]:
+                self._packed["pad_xy"] = np.zeros((0, 2))
+                self._packed["pad_size"] = np.zeros((0, 2))
+                self._packed["crt_xy"] = np.zeros((0, 2))
+            self._rows = {name: [a] for name, a in self._packed.items()}
+        return self._packed
+
+    # -- filling -------------------------------------------------------------
+    def resolve(self, key):
+        """``lib:name`` → ``<dir>/<lib>.pretty/<name>.kicad_mod`` or ``None``."""
+        lib, _, name = key.partition(":")
+        for d in self.lib_dirs:
+            path = os.path.join(d, f"{lib}.pretty", f"{name}.kicad_mod")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def add(self, key, node, mtime=0.0):
+        """Store the geometry of one footprint s-expression under ``key``."""
+        fp = _footprint_from_node(node, {})
+        pads = fp.pads
+        polys = courtyard_polygons(node)
+        rows = self._rows
+        rows["pad_xy"].append(np.array([(p.x, p.y) for p in pads], dtype=float).reshape(-1, 2))
+        rows["pad_size"].append(np.array([(p.w, p.h) for p in pads], dtype=float).reshape(-1, 2))
+        rows["pad_angle"].append(np.array([p.angle for p in pads], dtype=float))
+        rows["pad_shape"].append(np.array([SHAPES.index(p.shape) if p.shape in SHAPES else 0
+                                           for p in pads], dtype=np.uint8))
+        rows["pad_layers"].append(np.array([sum(1 << COPPER.index(l) for l in copper_layers(p))
+                                            for p in pads], dtype=np.uint8))
+        rows["pad_drill"].append(np.array([p.drill for p in pads], dtype=float))
+        verts = [v for poly in polys for v in poly]
+        rows["crt_xy"].append(np.array(verts, dtype=float).reshape(-1, 2))
+        rows["crt_poly"].append(np.repeat(np.arange(len(polys), dtype=np.int32),
+                                          [len(p) for p in polys]))
+        if key in self.index:                        # stale: orphan the old rows
+            i = self.index[key]
+            self.keys[i] = f"{key}\x00stale{i}"
+        self.index[key] = len(self.keys)
+        self.keys.append(key)
+        self.mtime.append(mtime)
+        self.numbers.append([p.number for p in pads])
+        self.pad_ptr.append(self.pad_ptr[-1] + len(pads))
+        self.crt_ptr.append(self.crt_ptr[-1] + len(verts))
+        self.bbox = np.vstack([self.bbox, np.array(fp.bbox, dtype=float).reshape(1, 4)])
+        self.dirty = True
+        return self.index[key]
+
+    def get(self, key):
+        """Row of ``key``, parsing its library file when new or changed;
+        ``None`` when neither the cache nor a library has it."""
+        path = self.resolve(key)
+        i = self.index.get(key)
+        if path is None:
+            if i is None:
+                self.stats["missing"] += 1
+            else:
+                self.stats["hits"] += 1
+            return i
+        mtime = os.path.getmtime(path)
+        if i is not None and self.mtime[i] == mtime:
+            self.stats["hits"] += 1
+            return i
+        self.stats["parsed"] += 1
+        return self.add(key, sexpr.load(path), mtime)
+
+    def seed(self, board):
+        """Add footprints embedded in a loaded board that no library has."""
+        for fp in board.footprints:
+            if fp.fpid in self.index or fp._node is None or self.resolve(fp.fpid):
+                continue
+            self.add(fp.fpid, _relative(fp._node))
+            self.stats["embedded"] += 1
+
+    # -- instances -----------------------------------------------------------
+    def rows(self, keys):
+        """Cache row per instance key (-1 where unknown)."""
+        out = []
+        for k in keys:
+            i = self.get(k)
+            out.append(-1 if i is None else i)
+        return np.array(out, dtype=np.int64)
+
+    def place(self, rows, xy, rot, side=None):
+        """World geometry of N instances (``rows`` from :meth:`rows`).
+
+        Returns ``{"pad_fp", "pad_xy", "pad_size", "pad_angle", "pad_layers",
+        "pad_shape", "bbox"}`` with back-side instances flipped like KiCad
+        does — local y mirrored, pad angles negated — and their
+        single-layer pads moved to B.Cu.  ``rot`` is the orientation as the
+        board file has it (``180 - θ`` for a part flipped at ``θ``)."""
+        z = self.packed()
+        rows = np.asarray(rows, dtype=np.int64)
+        ok = rows >= 0
+        xy, rot = np.asarray(xy, dtype=float), np.asarray(rot, dtype=float)
+        back = np.zeros(len(rows), bool) if side is None else np.asarray(side) == "B"
+        ptr = np.asarray(self.pad_ptr)
+        start = np.where(ok, ptr[np.maximum(rows, 0)], 0)
+        count = np.where(ok, ptr[np.maximum(rows, 0) + 1] - start, 0)
+        inst = np.repeat(np.arange(len(rows)), count)
+        idx = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count) + \
+            np.repeat(start, count)
+        local = z["pad_xy"][idx].copy()
+        angle = z["pad_angle"][idx].copy()
+        layers = z["pad_layers"][idx].copy()
+        flip = back[inst]
+        local[flip, 1] *= -1
+        angle[flip] = -angle[flip]
+        single = flip & (layers != 3)
+        layers[single] = 3 - layers[single]
+        # courtyard boxes: every vertex through the same transform
+        cptr = np.asarray(self.crt_ptr)
+        cstart = np.where(ok, cptr[np.maximum(rows, 0)], 0)
+        ccount = np.where(ok, cptr[np.maximum(rows, 0) + 1] - cstart, 0)
+        cinst = np.repeat(np.arange(len(rows)), ccount)
+        cidx = np.arange(ccount.sum()) - np.repeat(np.cumsum(ccount) - ccount, ccount) + \
+            np.repeat(cstart, ccount)
+        verts = z["crt_xy"][cidx].copy()
+        verts[back[cinst], 1] *= -1
+        world = rotate(verts, rot[cinst]) + xy[cinst]
+        # no courtyard: the pad extent's corners
+        lb = np.where(ok[:, None], self.bbox[np.maximum(rows, 0)] if len(self.bbox)
+                      else np.zeros((len(rows), 4)), 0.0)
+        corners = np.stack([lb[:, [0, 1]], lb[:, [2, 1]], lb[:, [2, 3]], lb[:, [0, 3]]], 1)
+        corners[back, :, 1] *= -1
+        cw = rotate(corners, rot[:, None]) + xy[:, None, :]
+        bbox = np.concatenate([cw.min(1), cw.max(1)], axis=1)
+        has = ccount > 0
+        if has.any():
+            first = (np.cumsum(ccount) - ccount)[has]
+            bbox[has, :2] = np.minimum.reduceat(world, first, axis=0)
+            bbox[has, 2:] = np.maximum.reduceat(world, first, axis=0)
+        return {"pad_fp": inst, "pad_xy": rotate(local, rot[inst]) + xy[inst],
+                "pad_size": z["pad_size"][idx], "pad_angle": (angle + rot[inst]) % 360,
+                "pad_layers": layers, "pad_shape": z["pad_shape"][idx], "bbox": bbox}
+
+    def board(self, board):
+        """:meth:`place` for every footprint of a :class:`board_model.Board`."""
+        self.seed(board)
+        xy, rot = board.placement()
+        return self.place(self.rows([fp.fpid for fp in board.footprints]), xy, rot,
+                          [fp.side for fp in board.footprints])
+
+
+def _relative(node):
+    """Footprint node as its library file has it: no placement, pad angles
+    relative to the footprint, and a back-side footprint flipped back to
+    the front (un-mirrored, F./B. layers swapped)."""
+    at = sexpr.find(node, "at")
+    rot = float(at[3]) if at is not None and len(at) > 3 else 0.0
+    if str(sexpr.value(node, "layer", "F.Cu")).startswith("B."):
+        node = copy.deepcopy(node)
+        _flip_node(node)
+        rot = (180 - rot) % 360
+    out = [node[0], node[1]]
+    for c in node[2:]:
+        if isinstance(c, list) and c and c[0] == "at":
+            continue
+        if isinstance(c, list) and c and c[0] == "pad" and rot:
+            c = [x for x in c]
+            k = next(i for i, x in enumerate(c) if isinstance(x, list) and x and x[0] == "at")
+            pat = c[k]
+            angle = (float(pat[3]) if len(pat) > 3 else 0.0) - rot
+            c[k] = pat[:3] + [round(angle % 360, 6)]
+        out.append(c)
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="packed footprint geometry cache")
+    ap.add_argument("board", nargs="?", help=".kicad_pcb file (default: board open in KiCad)")
+    ap.add_argument("--lib-dir", action="append", default=[],
+                    help="directory holding <lib>.pretty folders (also $KICAD*_FOOTPRINT_DIR)")
+    ap.add_argument("--cache", default=CACHE, help=f"cache file (default {CACHE})")
+    args = ap.parse_args(argv)
+    t0 = time.perf_counter()
+    cache = FootprintCache(args.cache, args.lib_dir)
+    t1 = time.perf_counter()
+    board = Board.load(args.board) if args.board else Board.from_pcbnew()
+    t2 = time.perf_counter()
+    geo = cache.board(board)
+    t3 = time.perf_counter()
+    geo = cache.board(board)
+    t4 = time.perf_counter()
+    if cache.dirty:
+        cache.save()
+    s = cache.stats
+    missing = [fp.fpid for fp, r in zip(board.footprints, cache.rows(
+        [fp.fpid for fp in board.footprints])) if r < 0]
+    print(f"✓ {len(cache.index)} footprints cached in {cache.path} "
+          f"(load {(t1 - t0) * 1e3:.1f} ms; this board: {s['parsed']} parsed, "
+          f"{s['embedded']} from the board file, {s['hits']} hits)")
+    print(f"✓ {len(board.footprints)} instances → {len(geo['pad_xy'])} pads, courtyards: "
+          f"first pass {(t3 - t2) * 1e3:.1f} ms, cached {(t4 - t3) * 1e3:.2f} ms")
+    if missing:
+        print(f"⚠ no geometry for {len(set(missing))} footprints: {', '.join(sorted(set(missing)))}")
+
+
+if __name__ == "__main__":
+    main()
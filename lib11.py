@@ -6,6 +6,7 @@ Standalone LED Bargraph & NE555 Timer–LED Circuit Examples
 
 import os
 from skidl import *
+from svg_sheets import generate_sheets
 
 # -----------------------------------------------------------------------------
 # 1) Configure KiCad symbol library paths and default tool
@@ -129,6 +130,7 @@ def main():
     create_led_bargraph()
     create_timer_led_circuit()
     generate_netlist()
+    generate_sheets()
     print("✅ Netlist generated successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,548 @@
+# ---------------------------------------------------------------------
+# maze_router.py  –  two-layer A* maze router on a NumPy occupancy grid
+# ---------------------------------------------------------------------
+"""
+``b.py``'s ``route_track`` drew one straight F.Cu segment pad to pad,
+straight through whatever was in the way.  This router works on a grid
+(``pitch`` mm, both copper layers) rasterized from the board:
+
+* pads — on F.Cu, B.Cu or both (through-hole) — and existing tracks and
+  vias, each grown by clearance + half the track width, so a cell is
+  free for a net when its track *centreline* may pass there;
+* the board edge and any ``keepouts`` rectangles.
+
+Every cell stores its owner: 0 free, -1 blocked, ``k + 1`` for net k.
+A net may run through its own copper; where two nets' clearance halos
+meet the cell is blocked for both.  A second grid grown by the via
+radius says where a via fits.
+
+Nets are routed shortest first.  A multi-pin net grows a tree: its pads
+are taken in minimum-spanning-tree order (:mod:`net_topology`), each
+reached by an A* search started from every cell already on the tree.
+Steps go 8-way; a step against the layer's preferred direction (F.Cu
+horizontal, B.Cu vertical) costs ``wrong_way`` ×, a bend a little
+extra, and a layer change ``via_cost`` mm.  A search may expand
+``max_expand`` states or ``EXPAND_PER_CELL`` × the squared distance
+still to go, whichever is more; one that runs out is retried once with
+``RETRY`` × that budget before the connection counts as failed.
+
+Finished paths are cut into straight segments, with a stub into each
+pad centre, and become :class:`board_model.Track` / ``Via`` objects;
+their cells are stamped into the grids before the next net.  If a net
+fails, the pass is ripped up and rerouted with the failed nets first.
+Time, length, segments and vias are reported per net.
+
+    python maze_router.py board.kicad_pcb -o routed.kicad_pcb
+    python maze_router.py board.kicad_pcb --skip GND --pitch 0.2
+"""
+import argparse
+import heapq
+import math
+import time
+from array import array
+
+import numpy as np
+
+from board_model import COPPER, Board, copper_layers
+from connectivity import Connectivity
+from net_topology import connection_order
+
+LAYERS = COPPER             # grid layer 0 / 1
+WIDTH = 0.25                # mm track width
+CLEARANCE = 0.2             # mm copper to copper
+VIA_SIZE, VIA_DRILL = 0.6, 0.3
+PITCH = 0.25                # mm grid
+EDGE_CLEARANCE = 0.3        # mm copper to board edge
+BLOCKED = -1
+EXPAND_PER_CELL = 2         # A* budget per (cells to go)²; detours on a full board need ~3.5
+RETRY = 4                   # budget multiplier for the one retry of a search that ran out
+
+# 8 neighbours: (dx, dy, length, horizontal-ness)
+_STEPS = [(1, 0, 1.0, 1.0), (-1, 0, 1.0, 1.0), (0, 1, 1.0, 0.0), (0, -1, 1.0, 0.0),
+          (1, 1, math.sqrt(2), 0.5), (1, -1, math.sqrt(2), 0.5),
+          (-1, 1, math.sqrt(2), 0.5), (-1, -1, math.sqrt(2), 0.5)]
+
+
+class Grid:
+    """Owner grids for track centrelines (``track``, per layer) and vias
+    (``via``, per layer; a via needs its cell on both)."""
+
+    def __init__(self, bounds, pitch=PITCH):
+        x0, y0, x1, y1 = bounds
+        self.x0, self.y0, self.pitch = x0, y0, pitch
+        self.nx = int(math.floor((x1 - x0) / pitch)) + 1
+        self.ny = int(math.floor((y1 - y0) / pitch)) + 1
+        self.track = np.zeros((2, self.ny, self.nx), dtype=np.int32)
+        self.via = np.zeros((2, self.ny, self.nx), dtype=np.int32)
+
+    @property
+    def size(self):
+        return self.nx * self.ny
+
+    def cell(self, x, y):
+        ix = min(max(int(round((x - self.x0) / self.pitch)), 0), self.nx - 1)
+        iy = min(max(int(round((y - self.y0) / self.pitch)), 0), self.ny - 1)
+        return ix, iy
+
+    def xy(self, ix, iy):
+        return self.x0 + ix * self.pitch, self.y0 + iy * self.pitch
+
+    def _window(self, x0, y0, x1, y1):
+        """Index slices of the cells whose centres lie in a box, or None."""
+        p = self.pitch
+        i0 = max(int(math.ceil((x0 - self.x0) / p - 1e-9)), 0)
+        i1 = min(int(math.floor((x1 - self.x0) / p + 1e-9)), self.nx - 1)
+        j0 = max(int(math.ceil((y0 - self.y0) / p - 1e-9)), 0)
+        j1 = min(int(math.floor((y1 - self.y0) / p + 1e-9)), self.ny - 1)
+        if i0 > i1 or j0 > j1:
+            return None
+        return slice(j0, j1 + 1), slice(i0, i1 + 1)
+
+    @staticmethod
+    def _claim(view, owner, mask=None):
+        """Give free cells to ``owner``; cells another net holds become blocked."""
+        if mask is None:
+            mask = np.ones(view.shape, dtype=bool)
+        if owner == BLOCKED:
+            view[mask] = BLOCKED
+            return
+        view[mask & (view != 0) & (view != owner)] = BLOCKED
+        view[mask & (view == 0)] = owner
+
+    def box(self, grid, layer, box, grow, owner, force=False):
+        """Stamp an axis-aligned box grown by ``grow`` onto one layer."""
+        w = self._window(box[0] - grow, box[1] - grow, box[2] + grow, box[3] + grow)
+        if w is None:
+            return
+        view = grid[layer][w]
+        if force:
+            view[...] = owner
+        else:
+            self._claim(view, owner)
+
+    def near(self, x1, y1, x2, y2, radius):
+        """``(window, mask)`` of the cells within ``radius`` of a segment, or None."""
+        w = self._window(min(x1, x2) - radius, min(y1, y2) - radius,
+                         max(x1, x2) + radius, max(y1, y2) + radius)
+        if w is None:
+            return None
+        ys = self.y0 + np.arange(w[0].start, w[0].stop) * self.pitch
+        xs = self.x0 + np.arange(w[1].start, w[1].stop) * self.pitch
+        px, py = np.meshgrid(xs, ys)
+        dx, dy = x2 - x1, y2 - y1
+        t = np.clip(((px - x1) * dx + (py - y1) * dy) / max(dx * dx + dy * dy, 1e-12), 0, 1)
+        return w, np.hypot(px - x1 - t * dx, py - y1 - t * dy) <= radius + 1e-9
+
+    def segment(self, grid, layer, x1, y1, x2, y2, radius, owner):
+        """Stamp the cells within ``radius`` of a segment onto one layer."""
+        hit = self.near(x1, y1, x2, y2, radius)
+        if hit is not None:
+            self._claim(grid[layer][hit[0]], owner, hit[1])
+
+
+class Router:
+    """Routes nets of one board; results go to ``board.tracks`` / ``board.vias``."""
+
+    def __init__(self, board, pitch=PITCH, width=WIDTH, clearance=CLEARANCE,
+                 via_size=VIA_SIZE, via_drill=VIA_DRILL, via_cost=2.0, wrong_way=2.0,
+                 bend_cost=0.1, greed=1.0, max_expand=60000, keepouts=(), bounds=None):
+        self.board = board
+        self.width, self.clearance = width, clearance
+        self.via_size, self.via_drill = via_size, via_drill
+        self.wrong_way, self.bend, self.greed = wrong_way, bend_cost, greed
+        self.max_expand = max_expand
+        self.ran_out = False        # last search stopped on its budget, not for want of room
+        self.exhausted = 0          # connections of the last route_net that ran out
+        pads = board.pads()
+        self.net_names = pads["net_names"]
+        self.net_id = {n: k for k, n in enumerate(self.net_names)}
+        bounds = bounds or board.outline_bbox()
+        if bounds is None:
+            bb = board.bboxes()
+            bounds = (bb[:, 0].min() - 2, bb[:, 1].min() - 2, bb[:, 2].max() + 2, bb[:, 3].max() + 2)
+        self.grid = Grid(tuple(map(float, bounds)), pitch)
+        self.via_cost = via_cost / pitch
+        self.bounds, self.keepouts = bounds, keepouts
+        self.pad_xy = board.pad_xy()
+        self.pads = self._pad_boxes()
+        self._rasterize()
+
+    # -- obstacles -----------------------------------------------------------
+    def _pad_boxes(self):
+        """World ``(box, layers, net id)`` per pad, in ``board.pads()`` order."""
+        out = []
+        k = 0
+        for fp in self.board.footprints:
+            for p in fp.pads:
+                x, y = self.pad_xy[k]
+                a = math.radians(fp.rot + p.angle)
+                hw = (abs(p.w * math.cos(a)) + abs(p.h * math.sin(a))) / 2
+                hh = (abs(p.w * math.sin(a)) + abs(p.h * math.cos(a))) / 2
+                out.append(((x - hw, y - hh, x + hw, y + hh), tuple(LAYERS.index(l) for l in copper_layers(p, fp.side)),
+                            self.net_id.get(p.net, -1) if p.net else -1))
+                k += 1
+        return out
+
+    def _rasterize(self):
+        """(Re)build both grids from pads, the board's copper, keep-outs and edge."""
+        g = self.grid
+        g.track[...] = 0
+        g.via[...] = 0
+        halo = self.clearance + self.width / 2
+        via_halo = self.clearance + self.via_size / 2
+        for box, layers, net in self.pads:
+            for layer in layers:
+                owner = net + 1 if net >= 0 else BLOCKED
+                g.box(g.track, layer, box, halo, owner)
+                g.box(g.via, layer, box, via_halo, owner)
+        for t in self.board.tracks:
+            if t.layer in LAYERS:
+                self._stamp_segment(LAYERS.index(t.layer), t.x1, t.y1, t.x2, t.y2,
+                                    self._owner(t.net), t.width / 2)
+        for v in self.board.vias:
+            self._stamp_via(v.x, v.y, self._owner(v.net), v.size / 2)
+        for k in self.keepouts:
+            for layer in ((LAYERS.index(k[4]),) if len(k) > 4 else (0, 1)):
+                g.box(g.track, layer, k[:4], halo, BLOCKED, force=True)
+                g.box(g.via, layer, k[:4], via_halo, BLOCKED, force=True)
+        # the board edge
+        x0, y0, x1, y1 = self.bounds
+        for grid, r in ((g.track, halo), (g.via, via_halo)):
+            w = g._window(x0 + EDGE_CLEARANCE + r - g.pitch / 2, y0 + EDGE_CLEARANCE + r - g.pitch / 2,
+                          x1 - EDGE_CLEARANCE - r + g.pitch / 2, y1 - EDGE_CLEARANCE - r + g.pitch / 2)
+            inside = np.zeros(grid.shape[1:], dtype=bool)
+            if w is not None:
+                inside[w] = True
+            grid[:, ~inside] = BLOCKED
+        # each pad's own copper stays reachable for its net, whatever the halos did
+        for box, layers, net in self.pads:
+            if net >= 0:
+                for layer in layers:
+                    g.box(g.track, layer, box, 0.0, net + 1, force=True)
+                    ix, iy = g.cell((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+                    g.track[layer, iy, ix] = net + 1
+
+    def _owner(self, net):
+        """Grid value for copper of ``net``; copper of pad-less nets just blocks."""
+        return self.net_id[net] + 1 if net in self.net_id else BLOCKED
+
+    def _stamp_segment(self, layer, x1, y1, x2, y2, owner, half_width=None):
+        g = self.grid
+        hw = self.width / 2 if half_width is None else half_width
+        g.segment(g.track, layer, x1, y1, x2, y2, hw + self.clearance + self.width / 2, owner)
+        g.segment(g.via, layer, x1, y1, x2, y2, hw + self.clearance + self.via_size / 2, owner)
+
+    def _stamp_via(self, x, y, owner, radius=None):
+        r = self.via_size / 2 if radius is None else radius
+        for layer in (0, 1):
+            self._stamp_segment(layer, x, y, x, y, owner, r)
+
+    # -- search --------------------------------------------------------------
+    def _search(self, free, via_ok, sources, goal, target, scale=1):
+        """A* from ``sources`` (state ids, cost 0) to any state in ``goal``.
+
+        States are ``layer * size + iy * nx + ix``; returns the state path
+        or None (:attr:`ran_out` tells a spent budget from a blocked
+        target; ``scale`` multiplies the budget).  The heuristic is the
+        free-space cost of the remaining offset — straight steps at 1,
+        diagonal ones at the cheaper of one diagonal or two straight steps
+        — scaled by ``greed`` (> 1 trades a little path quality for fewer
+        expansions).
+        """
+        g = self.grid
+        nx, ny, size = g.nx, g.ny, g.size
+        tx, ty = target
+        greed = self.greed
+        wrong = self.wrong_way
+        diag = (min(math.sqrt(2) * (1 + wrong) / 2, 2.0) - 1) * greed   # extra per diagonal
+        bend, via_cost = self.bend, self.via_cost
+        cost = array("d", [float("inf")]) * (2 * size)
+        came = array("l", [-1]) * (2 * size)
+        heap = []
+        reach = nx + ny
+        for s in sources:
+            cost[s] = 0.0
+            c = s % size
+            dx, dy = abs(c % nx - tx), abs(c // nx - ty)
+            reach = min(reach, max(dx, dy))
+            heap.append((greed * max(dx, dy) + diag * min(dx, dy), 0.0, s))
+        heapq.heapify(heap)
+        steps = [[(ddx, ddy, ddx + ddy * nx, length * (1 + (wrong - 1) * (1 - horiz)))
+                  for ddx, ddy, length, horiz in _STEPS],
+                 [(ddx, ddy, ddx + ddy * nx, length * (1 + (wrong - 1) * horiz))
+                  for ddx, ddy, length, horiz in _STEPS]]
+        push, pop = heapq.heappush, heapq.heappop
+        budget = min(2 * size, max(self.max_expand, EXPAND_PER_CELL * reach * reach) * scale)
+        self.ran_out = False
+        while heap and budget:
+            _, cs, s = pop(heap)
+            if cs > cost[s]:
+                continue                                    # stale heap entry
+            budget -= 1
+            if s in goal:
+                path = [s]
+                while came[s] >= 0:
+                    s = came[s]
+                    path.append(s)
+                return path[::-1]
+            layer, c = divmod(s, size)
+            iy, ix = divmod(c, nx)
+            p = came[s]
+            last = s - p if p >= 0 and p // size == layer else 0
+            for ddx, ddy, d, w in steps[layer]:
+                x, y = ix + ddx, iy + ddy
+                if x < 0 or y < 0 or x >= nx or y >= ny:
+                    continue
+                t = s + d
+                if not free[t] or (ddx and ddy and not (free[s + ddx] and free[s + ddy * nx])):
+                    continue                                # blocked, or cutting a corner
+                nc = cs + w + (bend if last and last != d else 0.0)
+                if nc < cost[t]:
+                    cost[t] = nc
+                    came[t] = s
+                    dx, dy = abs(x - tx), abs(y - ty)
+                    push(heap, (nc + greed * max(dx, dy) + diag * min(dx, dy), nc, t))
+            if via_ok[c]:
+                t = (1 - layer) * size + c
+                nc = cs + via_cost
+                if nc < cost[t]:
+                    cost[t] = nc
+                    came[t] = s
+                    dx, dy = abs(ix - tx), abs(iy - ty)
+                    push(heap, (nc + greed * max(dx, dy) + diag * min(dx, dy), nc, t))
+        self.ran_out = bool(heap)
+        return None
+
+    # -- nets ----------------------------------------------------------------
+    def net_pads(self, name):
+        k = self.net_id[name]
+        return [i for i, (_, _, net) in enumerate(self.pads) if net == k]
+
+    def _pad_states(self, i, free):
+        g = self.grid
+        box, layers, _ = self.pads[i]
+        w = g._window(*box)
+        states = set()
+        for layer in layers:
+            if w is not None:
+                jj, ii = np.nonzero(np.asarray(free[layer * g.size:(layer + 1) * g.size])
+                                    .reshape(g.ny, g.nx)[w])
+                states.update((layer * g.size + (jj + w[0].start) * g.nx + ii + w[1].start).tolist())
+            ix, iy = g.cell(*self.pad_xy[i])
+            states.add(layer * g.size + iy * g.nx + ix)
+        return states
+
+    def route_net(self, name):
+        """Route one net; returns ``(tracks, vias, unrouted pad pairs)``."""
+        g = self.grid
+        k = self.net_id[name]
+        owner = k + 1
+        pads = self.net_pads(name)
+        if len(pads) < 2:
+            return [], [], []
+        free = bytearray(((g.track == 0) | (g.track == owner)).astype(np.uint8).ravel().tobytes())
+        via_ok = bytearray((((g.via == 0) | (g.via == owner)).all(0)).astype(np.uint8)
+                           .ravel().tobytes())
+        xy = self.pad_xy[pads]
+        tree = set(self._pad_states(pads[0], free))
+        tracks, vias, failed = [], [], []
+        self.exhausted = 0
+        for i, j in connection_order(xy):             # MST order, nearest pads first
+            goal = self._pad_states(pads[j], free)
+            path = self._search(free, via_ok, tree, goal, g.cell(*xy[j]))
+            if path is None and self.ran_out:
+                path = self._search(free, via_ok, tree, goal, g.cell(*xy[j]), RETRY)
+            if path is None:
+                failed.append((pads[i], pads[j]))
+                self.exhausted += self.ran_out
+                continue
+            t, v = self._emit(path, name, xy[j])
+            tracks += t
+            vias += v
+            tree.update(path)
+            tree.update(goal)
+        return tracks, vias, failed
+
+    def _own_pad(self, layer, x, y, k, both=False):
+        """Index of a net-k pad whose copper on ``layer`` covers ``x, y``, or None."""
+        for i, (box, layers, net) in enumerate(self.pads):
+            if net == k and layer in layers and (not both or len(layers) == 2) \
+                    and box[0] <= x <= box[2] and box[1] <= y <= box[3]:
+                return i
+        return None
+
+    def _emit(self, path, name, end_xy):
+        """Straight runs of a state path → tracks and vias (board + grid)."""
+        g = self.grid
+        k = self.net_id[name]
+        runs, vias = [], []                       # runs: [layer, [(x, y), ...]]
+        for s in path:
+            layer, c = divmod(s, g.size)
+            xy = g.xy(c % g.nx, c // g.nx)
+            if runs and runs[-1][0] == layer:
+                runs[-1][1].append(xy)
+                continue
+            if runs and self._own_pad(layer, *xy, k, both=True) is None:
+                vias.append(xy)                   # no via inside a through-hole pad
+            runs.append([layer, [xy]])
+        # stubs into the pad centres when the path starts / stops off-centre
+        end = (float(end_xy[0]), float(end_xy[1]))
+        if runs[-1][1][-1] != end:
+            runs[-1][1].append(end)
+        i = self._own_pad(runs[0][0], *runs[0][1][0], k)
+        if i is not None:
+            start = (float(self.pad_xy[i][0]), float(self.pad_xy[i][1]))
+            if runs[0][1][0] != start:
+                runs[0][1].insert(0, start)
+
+        tracks, out_vias = [], []
+        for layer, pts in runs:
+            corners = pts[:1]
+            for a, b in zip(pts[1:-1], pts[2:]):
+                d1 = (np.sign(round(a[0] - corners[-1][0], 6)), np.sign(round(a[1] - corners[-1][1], 6)))
+                d2 = (np.sign(round(b[0] - a[0], 6)), np.sign(round(b[1] - a[1], 6)))
+                if d1 != d2:
+                    corners.append(a)
+            corners.append(pts[-1])
+            for (x1, y1), (x2, y2) in zip(corners, corners[1:]):
+                if (x1, y1) != (x2, y2):
+                    tracks.append(self.board.add_track(x1, y1, x2, y2, self.width,
+                                                       LAYERS[layer], name))
+                    self._stamp_segment(layer, x1, y1, x2, y2, k + 1)
+        for x, y in vias:
+            out_vias.append(self.board.add_via(x, y, self.via_size, self.via_drill, name))
+            self._stamp_via(x, y, k + 1)
+        return tracks, out_vias
+
+    def fits(self, name, tracks, vias):
+        """Whether copper routed elsewhere (``(x1, y1, x2, y2, layer)``
+        tracks, ``(x, y)`` vias) is still legal on this router's grid."""
+        g = self.grid
+        ok = (0, self.net_id[name] + 1)
+        for x1, y1, x2, y2, layer in tracks:
+            hit = g.near(x1, y1, x2, y2, g.pitch / 2)
+            if hit is not None and not np.isin(g.track[LAYERS.index(layer)][hit[0]][hit[1]],
+                                               ok).all():
+                return False
+        for x, y in vias:
+            ix, iy = g.cell(x, y)
+            if g.via[0, iy, ix] not in ok or g.via[1, iy, ix] not in ok:
+                return False
+        return True
+
+    def add_copper(self, name, tracks, vias):
+        """Put copper routed elsewhere on the board and into the grids;
+        returns the new board items."""
+        owner = self.net_id[name] + 1
+        items = []
+        for x1, y1, x2, y2, layer in tracks:
+            items.append(self.board.add_track(x1, y1, x2, y2, self.width, layer, name))
+            self._stamp_segment(LAYERS.index(layer), x1, y1, x2, y2, owner)
+        for x, y in vias:
+            items.append(self.board.add_via(x, y, self.via_size, self.via_drill, name))
+            self._stamp_via(x, y, owner)
+        return items
+
+    def _route_pass(self, names, verbose):
+        report = {"nets": {}, "failed": [], "seconds": 0.0}
+        t_all = time.perf_counter()
+        for name in names:
+            t0 = time.perf_counter()
+            tracks, vias, failed = self.route_net(name)
+            r = {"seconds": time.perf_counter() - t0,
+                 "length": sum(math.hypot(t.x2 - t.x1, t.y2 - t.y1) for t in tracks),
+                 "segments": len(tracks), "vias": len(vias),
+                 "failed": [(self._pad_name(a), self._pad_name(b)) for a, b in failed]}
+            report["nets"][name] = r
+            if failed:
+                report["failed"].append(name)
+            if verbose:
+                print(f"  {name:16s} {r['seconds'] * 1e3:8.1f} ms  {r['length']:7.1f} mm  "
+                      f"{r['segments']:3d} seg  {r['vias']:2d} via"
+                      + (f"  ✗ {len(failed)} unrouted" if failed else ""))
+        report["seconds"] = time.perf_counter() - t_all
+        return report
+
+    def route(self, nets=None, skip=(), passes=3, verbose=True):
+        """Route ``nets`` (default: every net with 2+ pads) shortest first.
+
+        When nets fail, everything routed here is ripped up and the
+        failed nets go first in the next pass (up to ``passes``); the
+        pass with the fewest failures is kept.  Returns its report:
+        per-net ``seconds``, ``length``, ``segments``, ``vias`` and
+        ``failed`` pad pairs, plus ``failed`` nets, ``seconds`` and
+        ``passes``.
+        """
+        names = [n for n in (nets or self.net_names) if n in self.net_id and n not in skip]
+
+        def span(name):
+            xy = self.pad_xy[self.net_pads(name)]
+            return float((xy.max(0) - xy.min(0)).sum()) if len(xy) else 0.0
+
+        order = [n for n in sorted(names, key=span) if len(self.net_pads(n)) > 1]
+        tracks, vias = list(self.board.tracks), list(self.board.vias)
+        best = None
+        t0 = time.perf_counter()
+        for attempt in range(max(passes, 1)):
+            if attempt:
+                self.board.tracks, self.board.vias = list(tracks), list(vias)
+                self._rasterize()
+                order = report["failed"] + [n for n in order if n not in report["failed"]]
+                if verbose:
+                    print(f"  pass {attempt + 1}: {', '.join(report['failed'])} first")
+            report = self._route_pass(order, verbose)
+            if best is None or len(report["failed"]) < len(best[0]["failed"]):
+                best = report, self.board.tracks, self.board.vias
+            if not report["failed"]:
+                break
+        if best[0] is not report:                     # the grid still holds the last pass
+            report, self.board.tracks, self.board.vias = best
+            self._rasterize()
+        report["seconds"] = time.perf_counter() - t0
+        report["passes"] = attempt + 1
+        return report
+
+    def _pad_name(self, i):
+        fp = self.board.pads()["fp"][i]
+        return f"{self.board.footprints[fp].ref}.{self.board.pads()['number'][i]}"
+
+
+def route(board, nets=None, skip=(), passes=3, verbose=True, **kw):
+    """Route ``board`` in memory; returns the :meth:`Router.route` report."""
+    return Router(board, **kw).route(nets, skip, passes, verbose)
+
+
+def run(path=None, out=None, nets=None, skip=(), **kw):
+    board = Board.load(path) if path else Board.from_pcbnew()
+    t0 = time.perf_counter()
+    report = route(board, nets, skip, **kw)
+    board.commit(out)
+    routed = len(report["nets"]) - len(report["failed"])
+    print(f"✓ routed {routed} of {len(report['nets'])} nets in {report['seconds']:.2f} s, "
+          f"{report['passes']} pass(es); {len(board.tracks)} segments, {len(board.vias)} vias "
+          f"(total {time.perf_counter() - t0:.2f} s with the grid)")
+    if report["failed"]:
+        print(f"⚠ incomplete: {', '.join(report['failed'])}")
+    missing = Connectivity(board).unrouted(list(report["nets"]))
+    if missing:
+        print(f"⚠ {sum(map(len, missing.values()))} connections still unrouted "
+              f"in {len(missing)} nets")
+    return board, report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="two-layer grid maze router")
+    ap.add_argument("board", nargs="?", help=".kicad_pcb file (default: board open in KiCad)")
+    ap.add_argument("-o", "--output")
+    ap.add_argument("--net", action="append", help="route only these nets")
+    ap.add_argument("--skip", action="append", default=[], help="leave these nets (e.g. GND)")
+    ap.add_argument("--pitch", type=float, default=PITCH)
+    ap.add_argument("--width", type=float, default=WIDTH)
+    ap.add_argument("--clearance", type=float, default=CLEARANCE)
+    ap.add_argument("--via-cost", type=float, default=2.0, help="mm of track a via is worth")
+    ap.add_argument("--keepout", action="append", default=[], metavar="X0,Y0,X1,Y1[,LAYER]")
+    args = ap.parse_args()
+    keepouts = [tuple(float(v) for v in k.split(",")[:4]) + tuple(k.split(",")[4:])
+                for k in args.keepout]
+    run(args.board, args.output, args.net, args.skip, pitch=args.pitch, width=args.width,
+        clearance=args.clearance, via_cost=args.via_cost, keepouts=keepouts)
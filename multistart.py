@@ -0,0 +1,173 @@
+# ---------------------------------------------------------------------
+# multistart.py  –  N randomized placements in parallel, keep the best
+# ---------------------------------------------------------------------
+"""
+The grid placers fill rows in footprint order, so whatever order the
+board file (or ``GetFootprints()``) hands back decides the result.  This
+runs ``runs`` attempts, each on its own shuffled footprint order (run 0
+keeps the original order), optionally followed by :mod:`anneal` with a
+per-run seed.  Every attempt is legalized and scored
+
+    score = wire + overlap_weight × overlap area + area_weight × bbox area
+
+and the lowest score is written back.  Attempts are independent, so a
+process pool spreads them over all cores; the board goes to the
+workers once, as a :meth:`board_model.Board.detached` copy.
+
+``wire`` is the total HPWL or, with ``--wire mst|steiner``, the summed
+per-net tree lengths from :mod:`net_topology` (closer to routed length
+for multi-pin nets, a few ms more per attempt).  ``--congestion W`` adds
+W × the RUDY overflow from :mod:`congestion` (mm of track that will not
+fit), steering away from placements that cannot be routed.
+
+    python multistart.py board.kicad_pcb --runs 64 --anneal -o out.kicad_pcb
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+
+import numpy as np
+
+import net_topology
+import placement
+from anneal import MAX_DEGREE, anneal
+from board_model import Board
+from congestion import Rudy
+from spatial_index import SpatialIndex, legalize
+from wirelength import NetTable
+
+OVERLAP_WEIGHT = 100.0      # per mm² of courtyard overlap
+AREA_WEIGHT = 0.1           # per mm² of placement bounding box
+
+_board = None               # per-worker state, set by _init
+_nets = None
+_rudy = None
+
+
+def _init(board, bounds=None):
+    global _board, _nets, _rudy
+    _board = board
+    _nets = NetTable(board, MAX_DEGREE)
+    _rudy = Rudy(board, _nets, bounds=bounds)
+
+
+def score(board, nets, xy, rot, wire="hpwl", rudy=None, congestion=0.0):
+    """``{"hpwl", "wire", "overlap", "congestion", "area", "score"}`` for a
+    placement; ``congestion`` weights ``rudy``'s overflow."""
+    bb = board.bboxes(xy, rot)
+    overlap = 0.0
+    for i, j in SpatialIndex.from_boxes(bb).overlaps():
+        w = min(bb[i, 2], bb[j, 2]) - max(bb[i, 0], bb[j, 0])
+        h = min(bb[i, 3], bb[j, 3]) - max(bb[i, 1], bb[j, 1])
+        overlap += w * h
+    area = float((bb[:, 2].max() - bb[:, 0].min()) * (bb[:, 3].max() - bb[:, 1].min()))
+    pin_xy = nets.pin_xy(xy, rot)
+    hpwl = float(nets.per_net(pin_xy).sum())
+    length = hpwl if wire == "hpwl" else float(net_topology.per_net(nets, pin_xy, wire).sum())
+    over = rudy.overflow(xy, rot, pin_xy) if congestion else 0.0
+    return {"hpwl": hpwl, "wire": length, "overlap": overlap, "congestion": over, "area": area,
+            "score": length + OVERLAP_WEIGHT * overlap + AREA_WEIGHT * area
+            + congestion * over}
+
+
+def attempt(board, nets, layout, seed, effort=0.0, wire="hpwl", rudy=None, congestion=0.0):
+    """One run: shuffled order → grid/pack → (anneal) → legalize; returns
+    ``(xy, rot, scores)``."""
+    n = len(board.footprints)
+    perm = np.arange(n) if seed == 0 else np.random.default_rng(seed).permutation(n)
+    shuffled = Board([board.footprints[p] for p in perm], board.nets)
+    pxy, prot = placement.positions(shuffled, layout)
+    xy = np.empty_like(pxy)
+    rot = np.empty_like(prot)
+    xy[perm], rot[perm] = pxy, prot
+    if effort > 0:
+        xy, rot, _ = anneal(board, layout, effort=effort, seed=seed, start=xy, verbose=False)
+    bounds = (0, 0, layout.width, layout.height) if layout.fixed else None
+    xy, _ = legalize(board, xy, rot, bounds)
+    return xy, rot, score(board, nets, xy, rot, wire, rudy, congestion)
+
+
+def _attempt(job):
+    """Worker entry point (top-level so it pickles)."""
+    seed, layout, effort, wire, congestion = job
+    xy, rot, s = attempt(_board, _nets, layout, seed, effort, wire, _rudy, congestion)
+    return seed, xy, rot, s
+
+
+def multistart(board, layout, runs=None, jobs=None, effort=0.0, verbose=True, wire="hpwl",
+               congestion=0.0):
+    """Best of ``runs`` attempts; returns ``(xy, rot, best_seed, all_scores)``."""
+    jobs = jobs or os.cpu_count() or 1
+    runs = runs or jobs
+    detached = board.detached()
+    todo = [(seed, layout, effort, wire, congestion) for seed in range(runs)]
+    bounds = (0, 0, layout.width, layout.height) if layout.fixed else None
+    results = {}
+    t0 = time.perf_counter()
+
+    def report(seed, s):
+        if verbose:
+            print(f"  run {seed:3d}: score {s['score']:10.1f}  HPWL {s['hpwl']:8.1f} mm  "
+                  f"overlap {s['overlap']:6.1f} mm²  area {s['area']:8.0f} mm²  "
+                  + (f"overflow {s['congestion']:6.1f} mm  " if congestion else "") +
+                  f"[{len(results)}/{runs}, {time.perf_counter() - t0:.1f} s]")
+
+    if jobs > 1 and runs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init,
+                                 initargs=(detached, bounds)) as pool:
+            for fut in as_completed([pool.submit(_attempt, job) for job in todo]):
+                seed, xy, rot, s = fut.result()
+                results[seed] = (xy, rot, s)
+                report(seed, s)
+    else:
+        _init(detached, bounds)
+        for job in todo:
+            seed, xy, rot, s = _attempt(job)
+            results[seed] = (xy, rot, s)
+            report(seed, s)
+
+    best = min(results, key=lambda k: (results[k][2]["score"], k))
+    xy, rot, _ = results[best]
+    return xy, rot, best, {k: v[2] for k, v in sorted(results.items())}
+
+
+def run(layout, path=None, out=None, runs=None, jobs=None, effort=0.0, wire="hpwl",
+        congestion=0.0):
+    board = Board.load(path) if path else Board.from_pcbnew()
+    t0 = time.perf_counter()
+    xy, rot, best, scores = multistart(board, layout, runs, jobs, effort, wire=wire,
+                                       congestion=congestion)
+    board.set_placement(xy, rot)
+    if layout.fixed:
+        board.set_outline(0, 0, layout.width, layout.height)
+    else:
+        board.set_outline(*placement.fitted_outline(board, xy, rot, layout.fit_margin))
+    board.commit(out)
+    base = scores[0]["score"]
+    print(f"✓ best of {len(scores)} runs: #{best}, score {scores[best]['score']:.1f} "
+          f"(original order {base:.1f}), {time.perf_counter() - t0:.1f} s")
+    return board
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="multi-start parallel placement")
+    ap.add_argument("board", nargs="?", help=".kicad_pcb file (default: board open in KiCad)")
+    ap.add_argument("-o", "--output")
+    ap.add_argument("--layout", choices=sorted(placement.LAYOUTS), default="d")
+    ap.add_argument("--pack", action="store_true", help="shelf-pack instead of the pitch grid")
+    ap.add_argument("-n", "--runs", type=int, help="attempts (default: one per core)")
+    ap.add_argument("-j", "--jobs", type=int, help="worker processes (default: all cores)")
+    ap.add_argument("--anneal", type=float, nargs="?", const=0.3, default=0.0, metavar="EFFORT",
+                    help="anneal every attempt (effort, default 0.3)")
+    ap.add_argument("--wire", choices=("hpwl", "mst", "steiner"), default="hpwl",
+                    help="wirelength term of the score")
+    ap.add_argument("--congestion", type=float, nargs="?", const=10.0, default=0.0,
+                    metavar="WEIGHT", help="add RUDY overflow to the score (default weight 10)")
+    args = ap.parse_args()
+    layout = placement.LAYOUTS[args.layout]
+    if args.pack:
+        layout = replace(layout, pack=True)
+    run(layout, args.board, args.output, args.runs, args.jobs, args.anneal, args.wire,
+        args.congestion)
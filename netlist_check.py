@@ -0,0 +1,211 @@
+# ---------------------------------------------------------------------
+# netlist_check.py  –  pre-flight (ref, pin) ↔ footprint pad validation
+# ---------------------------------------------------------------------
+"""
+``a.py`` finds out that a symbol pin has no pad when
+``FindPadByNumber(pin)`` returns ``None`` halfway through building the
+board — one mismatch per run.  This joins every ``(ref, pin)`` node of a
+``.net`` against its footprint's pads up front and reports them all.
+
+Pad sets come from, best first:
+
+1. :class:`fp_cache.FootprintCache` — exact pad numbers parsed from the
+   ``.kicad_mod`` libraries (``--lib-dir`` / ``$KICAD*_FOOTPRINT_DIR``) or
+   from footprints already on a board (``--board``), persisted between
+   runs;
+2. KiCad's ``fp-info-cache`` — pad counts only: numeric pins must lie in
+   ``1 … unique pads`` and a part cannot use more pins than it has pads;
+   alphanumeric pins (BGA balls) are then counted as *unverified*.
+
+Problems: ``no-footprint``, ``unknown-footprint``, ``unknown-ref`` (node
+without a component), ``missing-pad``, ``pad-count`` and ``duplicate-pin``
+(one pin on two nets).  Only the last three — pads known to contradict
+the netlist — fail the check (:data:`FATAL`); a footprint neither source
+knows is reported, but the libraries KiCad loads from may still have it.
+
+    python netlist_check.py led_circuits.net
+    python netlist_check.py create_schematic.net --lib-dir ~/kicad/footprints -o check.json
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+
+import sexpr
+from fp_cache import CACHE, FootprintCache
+
+FP_INFO = "fp-info-cache"
+ERRORS = ("no-footprint", "unknown-footprint", "unknown-ref", "missing-pad", "pad-count",
+          "duplicate-pin")
+FATAL = ("missing-pad", "pad-count", "duplicate-pin")
+
+
+def read_netlist(path):
+    """``({ref: fpid}, [(net, ref, pin)])`` from a KiCad / SKiDL ``.net``."""
+    tree = sexpr.load(path)
+    comps = {}
+    for c in sexpr.find_all(sexpr.find(tree, "components") or [], "comp"):
+        comps[str(sexpr.value(c, "ref", ""))] = str(sexpr.value(c, "footprint", ""))
+    nodes = []
+    for n in sexpr.find_all(sexpr.find(tree, "nets") or [], "net"):
+        name = str(sexpr.value(n, "name", ""))
+        for node in sexpr.find_all(n, "node"):
+            nodes.append((name, str(sexpr.value(node, "ref", "")),
+                          str(sexpr.value(node, "pin", ""))))
+    return comps, nodes
+
+
+@functools.lru_cache(maxsize=4)
+def _info_counts(path, mtime):
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().split("\n")
+    out = {}
+    for k in range(1, len(lines) - 6, 7):            # line 0 is a timestamp
+        try:
+            out[f"{lines[k]}:{lines[k + 1]}"] = int(lines[k + 6])
+        except ValueError:
+            break
+    return out
+
+
+def info_counts(path=FP_INFO):
+    """``{lib:name: unique pad count}`` from ``fp-info-cache`` (memoized by mtime)."""
+    if not path or not os.path.exists(path):
+        return {}
+    return _info_counts(os.path.abspath(path), os.path.getmtime(path))
+
+
+class PadSets:
+    """Pad numbers (or just a count) per footprint id."""
+
+    def __init__(self, cache=None, info=FP_INFO):
+        self.cache = cache
+        self.counts = info_counts(info)
+        self._sets = {}
+
+    def get(self, fpid):
+        """``(set of pad numbers | None, pad count | None)``."""
+        if fpid not in self._sets:
+            numbers = None
+            if self.cache is not None:
+                row = self.cache.get(fpid)
+                if row is not None:
+                    numbers = {n for n in self.cache.numbers[row] if n}
+            self._sets[fpid] = numbers, (len(numbers) if numbers is not None
+                                         else self.counts.get(fpid))
+        return self._sets[fpid]
+
+
+def pad_sets(netlist, lib_dirs=(), fp_info=None, cache=CACHE):
+    """:class:`PadSets` for ``netlist``: a :class:`fp_cache.FootprintCache`
+    over ``lib_dirs`` and ``$KICAD*_FOOTPRINT_DIR``, plus the
+    ``fp-info-cache`` next to the netlist (or in the working directory)."""
+    info = fp_info or next((p for p in (os.path.join(os.path.dirname(os.path.abspath(
+        netlist)), FP_INFO), FP_INFO) if os.path.exists(p)), None)
+    return PadSets(FootprintCache(cache, lib_dirs), info)
+
+
+def check(netlist, pads=None):
+    """Every mismatch of a netlist path (or ``read_netlist`` result):
+    ``{"kind", "ref", "pin", "net", "footprint", "detail"}`` dicts, plus
+    ``unverified`` notes when only pad counts were known."""
+    comps, nodes = read_netlist(netlist) if isinstance(netlist, str) else netlist
+    pads = pads or PadSets()
+    out = []
+
+    def report(kind, ref, pin="", net="", detail=""):
+        out.append({"kind": kind, "ref": ref, "pin": pin, "net": net,
+                    "footprint": comps.get(ref, ""), "detail": detail})
+
+    for ref, fpid in comps.items():
+        if not fpid:
+            report("no-footprint", ref)
+        elif pads.get(fpid) == (None, None):
+            report("unknown-footprint", ref, detail="not in the libraries or fp-info-cache")
+    seen, used = {}, {}
+    for net, ref, pin in nodes:
+        if ref not in comps:
+            report("unknown-ref", ref, pin, net)
+            continue
+        if (ref, pin) in seen and seen[ref, pin] != net:
+            report("duplicate-pin", ref, pin, net, f"also on {seen[ref, pin]}")
+        seen[ref, pin] = net
+        used.setdefault(ref, set()).add(pin)
+        fpid = comps[ref]
+        if not fpid:
+            continue
+        numbers, count = pads.get(fpid)
+        if numbers is not None:
+            if pin not in numbers:
+                report("missing-pad", ref, pin, net,
+                       f"{fpid} has pads {', '.join(sorted(numbers, key=_pad_order)[:12])}"
+                       + (", …" if len(numbers) > 12 else ""))
+        elif count is not None:
+            if pin.isdigit() and not 1 <= int(pin) <= count:
+                report("pad-count", ref, pin, net, f"{fpid} has {count} pads")
+            elif not pin.isdigit():
+                report("unverified", ref, pin, net, "only a pad count is known")
+    for ref, pins in used.items():
+        count = pads.get(comps[ref])[1] if comps[ref] else None
+        if count is not None and len(pins) > count:
+            report("pad-count", ref, detail=f"{len(pins)} pins used, footprint has {count} pads")
+    return out
+
+
+def _pad_order(n):
+    return (0, int(n), "") if n.isdigit() else (1, 0, n)
+
+
+def errors(problems, kinds=ERRORS):
+    return [p for p in problems if p["kind"] in kinds]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="netlist ↔ footprint pad pre-flight check")
+    ap.add_argument("netlist", help=".net file")
+    ap.add_argument("--lib-dir", action="append", default=[],
+                    help="directory holding <lib>.pretty folders")
+    ap.add_argument("--board", help="also take footprints from this .kicad_pcb")
+    ap.add_argument("--fp-info", help=f"fp-info-cache (default: next to the netlist, or ./{FP_INFO})")
+    ap.add_argument("--cache", default=CACHE, help="footprint geometry cache file")
+    ap.add_argument("-o", "--output", help="write the JSON report here")
+    args = ap.parse_args(argv)
+    t0 = time.perf_counter()
+    pads = pad_sets(args.netlist, args.lib_dir, args.fp_info, args.cache)
+    cache = pads.cache
+    if args.board:
+        from board_model import Board
+        cache.seed(Board.load(args.board))
+    comps, nodes = read_netlist(args.netlist)
+    problems = check((comps, nodes), pads)
+    if cache.dirty:
+        cache.save()
+    ms = (time.perf_counter() - t0) * 1e3
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"netlist": args.netlist, "components": len(comps), "nodes": len(nodes),
+                       "problems": problems}, f, indent=1)
+    bad = errors(problems)
+    for p in bad:
+        print(f"  {p['kind']:17s} {p['ref']:>10s} {p['pin']:>5s}  {p['net']:20s} "
+              f"{p['footprint']}  {p['detail']}")
+    notes = len(problems) - len(bad)
+    tail = f", {notes} pins unverified (pad counts only)" if notes else ""
+    fatal = errors(problems, FATAL)
+    if fatal:
+        print(f"⚠ {len(fatal)} pad mismatches in {len(comps)} components / {len(nodes)} nodes"
+              f"{tail} ({ms:.0f} ms)")
+        return 1
+    if bad:
+        print(f"⚠ {len(bad)} unchecked ({', '.join(sorted({p['kind'] for p in bad}))}) in "
+              f"{len(comps)} components / {len(nodes)} nodes{tail} ({ms:.0f} ms)")
+        return 0
+    print(f"✓ {len(comps)} components / {len(nodes)} nodes match their footprints{tail} "
+          f"({ms:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,8 @@ Components: IS43LQ32256A-062BLI LPDDR4 + XCZU4CG-2SFVC784E Zynq UltraScale+
 from skidl import *
 import os
 
+from svg_sheets import generate_sheets
+
 # Configure KiCad environment
 os.environ['KICAD_SYMBOL_DIR'] = 'C:/Program Files/KiCad/9.0/share/kicad/symbols'
 #lib_search_paths[KICAD].append('C:/Program Files/KiCad/9.0/share/kicad/symbols')
@@ -595,10 +597,14 @@ def generate_fpga_lpddr4_system():
     print("Generating BOM...")
     generate_bom(file_='fpga_lpddr4_system.csv')
     
+    print("Generating schematic sheets...")
+    generate_sheets(file_='fpga_lpddr4_system')
+    
     print("Generation complete!")
     print("Files created:")
     print("- fpga_lpddr4_system.net (netlist)")
     print("- fpga_lpddr4_system.csv (BOM)")
+    print("- fpga_lpddr4_system_sheets/ (one SVG per subcircuit + index.html)")
 
 # =============================================================================
 # EXECUTE DESIGN GENERATION
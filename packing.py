@@ -0,0 +1,89 @@
+# ---------------------------------------------------------------------
+# packing.py  –  footprint-size-aware shelf packing per family row
+# ---------------------------------------------------------------------
+"""
+Replaces the fixed pitch of the grid placer with the real footprint
+extents: every part's courtyard (or pad extent) is read up front from
+:meth:`board_model.Board.local_bboxes`, and each family row is packed
+with next-fit decreasing-height shelves — sort by height, fill a shelf
+left to right, open a new shelf when the strip is full.  Sorting makes
+it O(n log n); a BGA gets a tall shelf of its own instead of landing on
+its neighbours, and 0201 caps sit edge to edge ``gap`` mm apart.
+
+Family rows stack top to bottom in :attr:`placement.Layout.rows` order,
+as in :func:`placement.grid`.  Parts are placed unrotated.
+"""
+import math
+
+import numpy as np
+
+GAP = 0.5           # mm between courtyards
+
+
+def shelf_pack(w, h, width, gap=GAP, sort=True):
+    """Pack boxes ``w × h`` into a strip ``width`` wide.
+
+    Returns ``(x, d, depth)``: left edge and distance from the strip top
+    of every box, and the total depth used.  ``sort=False`` keeps the
+    input order (looser, but neighbours in the list stay neighbours).
+    """
+    n = len(w)
+    x = np.zeros(n)
+    d = np.zeros(n)
+    # tallest first, then widest
+    order = np.lexsort((-w, -h)) if sort else np.arange(n)
+    cx = shelf_top = shelf_h = 0.0
+    for i in order.tolist():
+        if cx > 0 and cx + w[i] > width:    # strip full: open a new shelf
+            shelf_top += shelf_h + gap
+            cx = shelf_h = 0.0
+        x[i], d[i] = cx, shelf_top
+        cx += w[i] + gap
+        shelf_h = max(shelf_h, h[i])
+    return x, d, (shelf_top + shelf_h if n else 0.0)
+
+
+def strip_width(lb, gap=GAP, aspect=1.0):
+    """Strip width for an unbounded board: about ``aspect`` × a square."""
+    w = lb[:, 2] - lb[:, 0] + gap
+    h = lb[:, 3] - lb[:, 1] + gap
+    return max(float(w.max(initial=0)), math.sqrt(float((w * h).sum()) * aspect))
+
+
+def pack_rows(lb, rows, width, gap=GAP):
+    """Shelf-pack each row group; returns ``(x, d, depth)`` as :func:`shelf_pack`."""
+    w = lb[:, 2] - lb[:, 0]
+    h = lb[:, 3] - lb[:, 1]
+    x = np.zeros(len(lb))
+    d = np.zeros(len(lb))
+    top = 0.0
+    for row in np.unique(rows).tolist():
+        hit = np.flatnonzero(rows == row)
+        rx, rd, depth = shelf_pack(w[hit], h[hit], width, gap)
+        x[hit] = rx
+        d[hit] = rd + top
+        top += depth + gap
+    return x, d, max(top - gap, 0.0)
+
+
+def pack(board, layout, rows, gap=GAP):
+    """Packed ``(xy (N, 2), rot (N,))`` for ``board``; ``rows`` from
+    :func:`placement.row_numbers`."""
+    lb = board.local_bboxes()
+    n = len(lb)
+    rot = np.zeros(n)
+    if layout.fixed:
+        left, top = layout.margin, layout.height - layout.margin
+        width = layout.width - 2 * layout.margin
+    else:
+        left, top = 0.0, 0.0
+        width = strip_width(lb, gap)
+    x, d, depth = pack_rows(lb, rows, width, gap)
+    if layout.fixed and depth > layout.height - 2 * layout.margin:
+        print(f"⚠ packed rows need {depth:.1f} mm, board has "
+              f"{layout.height - 2 * layout.margin:.1f} mm inside the margin")
+    h = lb[:, 3] - lb[:, 1]
+    # box lower-left -> footprint origin
+    ox = left + x - lb[:, 0]
+    oy = top - d - h - lb[:, 1]
+    return np.stack([ox, oy], 1), rot
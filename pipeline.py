@@ -0,0 +1,365 @@
+# ---------------------------------------------------------------------
+# pipeline.py  –  schematic → routed board as a cached stage DAG
+# ---------------------------------------------------------------------
+"""
+The hand-run sequence — a SKiDL script, ``a.py``, one of the placers,
+a router, then a check — as one command.  Stages and what they read:
+
+    elaborate   SKiDL script                  → .net, .erc, netlistsvg .json
+    erc         .erc                          (fails on ERC errors)
+    netlist     .net                          → netlist_check report
+    svg         netlistsvg .json              → schematic .svg   (svg_render)
+    board       .net  (after erc + netlist)   → board.kicad_pcb  (a.py, pcbnew)
+    place       board.kicad_pcb               → placed.kicad_pcb
+    route       placed.kicad_pcb              → routed.kicad_pcb
+    drc         routed.kicad_pcb              → drc.json
+
+Every stage has a key: the SHA-256 of its command line (so parameters
+count), of each input file's content and of the source of the tool it
+runs plus the repo modules that tool imports.  Keys and output hashes
+go to ``<out>/.cache/manifest.json`` and the outputs themselves into a
+content-addressed store beside it.  A stage whose key is unchanged is
+skipped — an output deleted or overwritten since is restored from the
+store — and because keys hash output *content*, a stage that re-ran but
+wrote the same bytes does not invalidate anything downstream.
+
+Stages run as child processes (SKiDL and pcbnew stay out of this
+process; ``--kicad-python`` picks the interpreter that has pcbnew) on a
+thread pool, each starting as soon as its dependencies are done, so
+``svg`` runs beside ``erc`` / ``netlist`` / ``board`` and so on.
+Without a script the netlist is the first input (``elaborate`` and
+``erc`` drop out); without a netlistsvg JSON there is no ``svg``;
+``--board`` starts placement from a board imported by hand.
+
+    python pipeline.py scheamtic_1.py --netlist schematic_1.net --svg-json schematic_1.svg.json
+    python pipeline.py --netlist create_schematic.net --placer anneal --until place
+"""
+import argparse
+import ast
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ORDER = ("elaborate", "erc", "netlist", "svg", "board", "place", "route", "drc")
+PLACERS = ("placement", "anneal", "multistart")
+ROUTERS = ("route_scheduler", "maze_router")
+
+
+class Stage:
+    __slots__ = ("name", "deps", "inputs", "outputs", "cmd", "fn", "ok")
+
+    def __init__(self, name, deps=(), inputs=(), outputs=(), cmd=None, fn=None, ok=(0,)):
+        self.name, self.deps = name, tuple(deps)
+        self.inputs, self.outputs = list(inputs), list(outputs)
+        self.cmd, self.fn, self.ok = cmd, fn, ok          # argv list, or fn(stage) in-process
+
+
+# ── hashing ──────────────────────────────────────────────────────────────
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _imports(path, mtime):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(a.name.split(".")[0] for a in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split(".")[0])
+    here = os.path.dirname(path)
+    return tuple(sorted(p for p in (os.path.join(here, n + ".py") for n in names)
+                        if os.path.exists(p)))
+
+
+def sources(script):
+    """``script`` and every module next to it that it imports, transitively."""
+    seen, todo = set(), [os.path.abspath(script)]
+    while todo:
+        p = todo.pop()
+        if p in seen:
+            continue
+        seen.add(p)
+        try:
+            todo.extend(_imports(p, os.path.getmtime(p)))
+        except SyntaxError:                           # hashed, just not followed
+            pass
+    return sorted(seen)
+
+
+def stage_key(stage, digest):
+    """Hash of a stage's command, inputs and tool sources (``digest(path)``)."""
+    h = hashlib.sha256(stage.name.encode())
+    argv = stage.cmd or [stage.fn.__name__]
+    h.update(json.dumps([_rel(a) for a in argv]).encode())
+    tools = sources(stage.cmd[1]) if stage.cmd and stage.cmd[1].endswith(".py") else []
+    for p in sorted(set(stage.inputs)) + tools:
+        h.update(f"\0{_rel(p)}\0{digest(p)}".encode())
+    return h.hexdigest()
+
+
+def _rel(p):
+    """Paths in keys are made relative, so a moved checkout keeps its cache."""
+    return os.path.relpath(p, ROOT) if isinstance(p, str) and os.path.isabs(p) else p
+
+
+# ── the cache ────────────────────────────────────────────────────────────
+class Cache:
+    """``manifest.json`` (stage → key, outputs) plus a content-addressed store."""
+
+    def __init__(self, root):
+        self.root = root
+        self.store = os.path.join(root, "objects")
+        self.path = os.path.join(root, "manifest.json")
+        os.makedirs(self.store, exist_ok=True)
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    def hit(self, stage, key, digest):
+        """True when ``stage`` ran with ``key`` before; restores its outputs."""
+        entry = self.manifest.get(stage.name)
+        if not entry or entry["key"] != key:
+            return False
+        for path, sha in entry["outputs"].items():
+            if os.path.exists(path) and digest(path) == sha:
+                continue
+            blob = os.path.join(self.store, sha)
+            if not os.path.exists(blob):
+                return False
+            shutil.copyfile(blob, path)
+        return True
+
+    def record(self, stage, key, digest):
+        outputs = {}
+        for path in stage.outputs:
+            sha = outputs[path] = digest(path)
+            blob = os.path.join(self.store, sha)
+            if not os.path.exists(blob):
+                shutil.copyfile(path, blob)
+        self.manifest[stage.name] = {"key": key, "outputs": outputs, "time": time.time()}
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+
+
+# ── stages ───────────────────────────────────────────────────────────────
+def erc_errors(path):
+    """ERROR lines of a SKiDL ``.erc`` file (empty file: clean)."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return [line.strip() for line in f if "ERROR" in line]
+
+
+def _check_erc(stage):
+    bad = erc_errors(stage.inputs[0])
+    if bad:
+        raise RuntimeError(f"{len(bad)} ERC errors, first: {bad[0]}")
+    return "no ERC errors"
+
+
+def build(args):
+    """The stage list for the command-line options (dependencies first)."""
+    py, out = sys.executable, os.path.abspath(args.out_dir)
+    tool = functools.partial(os.path.join, ROOT)
+    stages = []
+    net = os.path.abspath(args.netlist) if args.netlist else None
+    svg_json = os.path.abspath(args.svg_json) if args.svg_json else None
+    if args.script:
+        script = os.path.abspath(args.script)
+        stem = os.path.splitext(script)[0]
+        net = net or stem + ".net"
+        made = [net, stem + ".erc"] + ([svg_json] if svg_json else [])
+        stages.append(Stage("elaborate", (), [script, *args.input], made, [py, script]))
+        stages.append(Stage("erc", ["elaborate"], [stem + ".erc"], [], fn=_check_erc))
+    if net is None:
+        raise SystemExit("need a SKiDL script or --netlist")
+    first = ["elaborate"] if args.script else []
+    check = os.path.join(out, "netlist_check.json")
+    stages.append(Stage("netlist", first, [net], [check],
+                        [py, tool("netlist_check.py"), net, "-o", check]
+                        + sum((["--lib-dir", d] for d in args.lib_dir), [])))
+    if svg_json:
+        svg = os.path.join(out, os.path.basename(svg_json).removesuffix(".json"))
+        svg += "" if svg.endswith(".svg") else ".svg"
+        stages.append(Stage("svg", first, [svg_json], [svg],
+                            [py, tool("svg_render.py"), svg_json, "-o", svg]))
+    if args.board:                                    # imported by hand in KiCad
+        board = os.path.abspath(args.board)
+    else:
+        board = os.path.join(out, "board.kicad_pcb")
+        stages.append(Stage("board", ["erc", "netlist"] if args.script else ["netlist"],
+                            [net], [board], [args.kicad_python, tool("a.py"), net, board]))
+    placed = os.path.join(out, "placed.kicad_pcb")
+    place = [py, tool(args.placer + ".py"), board, "-o", placed, "--layout", args.layout]
+    stages.append(Stage("place", ["board"], [board], [placed], place + args.place_arg))
+    routed = os.path.join(out, "routed.kicad_pcb")
+    route = [py, tool(args.router + ".py"), placed, "-o", routed]
+    route += sum((["--skip", n] for n in args.skip), [])
+    stages.append(Stage("route", ["place"], [placed], [routed], route + args.route_arg))
+    report = os.path.join(out, "drc.json")
+    stages.append(Stage("drc", ["route"], [routed], [report],        # violations: reported,
+                        [py, tool("drc.py"), routed, "-o", report], ok=(0, 1)))  # not fatal
+    if args.until:
+        keep = set()
+        todo = [args.until]
+        by_name = {s.name: s for s in stages}
+        while todo:
+            name = todo.pop()
+            if name in by_name and name not in keep:
+                keep.add(name)
+                todo.extend(by_name[name].deps)
+        stages = [s for s in stages if s.name in keep]
+    return stages
+
+
+# ── the scheduler ────────────────────────────────────────────────────────
+def _execute(stage, log_dir):
+    """Run one stage; ``(ok, message, seconds)``, output in ``<log_dir>/<stage>.log``."""
+    t0 = time.perf_counter()
+    log = os.path.join(log_dir, stage.name + ".log")
+    if stage.fn is not None:
+        try:
+            msg = stage.fn(stage)
+            ok = True
+        except (OSError, RuntimeError) as e:
+            msg, ok = str(e), False
+        with open(log, "w", encoding="utf-8") as f:
+            f.write(msg + "\n")
+        return ok, msg, time.perf_counter() - t0
+    env = dict(os.environ, PYTHONIOENCODING="utf-8")
+    cwd = os.path.dirname(stage.cmd[1]) if stage.name == "elaborate" else ROOT
+    try:
+        p = subprocess.run(stage.cmd, cwd=cwd, env=env, capture_output=True, text=True,
+                           encoding="utf-8", errors="replace")
+    except OSError as e:
+        return False, str(e), time.perf_counter() - t0
+    with open(log, "w", encoding="utf-8") as f:
+        f.write(p.stdout + p.stderr)
+    lines = [l for l in (p.stdout + p.stderr).splitlines() if l.strip()]
+    msg = lines[-1].strip() if lines else ""
+    missing = [o for o in stage.outputs if not os.path.exists(o)]
+    if p.returncode not in stage.ok:
+        return False, f"exit {p.returncode}: {msg}", time.perf_counter() - t0
+    if missing:
+        return False, f"did not write {', '.join(map(_rel, missing))}", time.perf_counter() - t0
+    return True, msg, time.perf_counter() - t0
+
+
+def run(stages, cache_dir, jobs=None, force=()):
+    """Run ``stages`` in dependency order, skipping cached ones.
+    ``{stage: "ran" | "cached" | "failed" | "blocked"}``."""
+    cache = Cache(cache_dir)
+    log_dir = os.path.join(cache_dir, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    digests = {}
+
+    def digest(path):                                 # memo per (path, mtime, size)
+        st = os.stat(path)
+        k = path, st.st_mtime_ns, st.st_size
+        if k not in digests:
+            digests[k] = file_hash(path)
+        return digests[k]
+
+    by_name = {s.name: s for s in stages}
+    state = {}
+    pending = {s.name for s in stages}
+    running = {}
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        while pending or running:
+            for name in sorted(pending, key=ORDER.index):
+                deps = [d for d in by_name[name].deps if d in by_name]
+                stuck = [d for d in deps if state.get(d) in ("failed", "blocked")]
+                if stuck:
+                    state[name] = "blocked"
+                    pending.discard(name)
+                    print(f"  {name:10s} skipped, {', '.join(stuck)} did not finish")
+                    continue
+                if not all(state.get(d) in ("ran", "cached") for d in deps):
+                    continue
+                pending.discard(name)
+                stage = by_name[name]
+                try:
+                    key = stage_key(stage, digest)
+                except OSError as e:
+                    state[name] = "failed"
+                    print(f"⚠ {name:10s} input missing: {e.filename}")
+                    continue
+                if name not in force and cache.hit(stage, key, digest):
+                    state[name] = "cached"
+                    print(f"· {name:10s} unchanged")
+                    continue
+                running[pool.submit(_execute, stage, log_dir)] = stage, key
+            if not running:
+                if pending:                           # a dependency outside the DAG
+                    raise SystemExit(f"cannot schedule {', '.join(sorted(pending))}")
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage, key = running.pop(fut)
+                ok, msg, sec = fut.result()
+                if ok:
+                    cache.record(stage, key, digest)
+                    cache.save()
+                    state[stage.name] = "ran"
+                    print(f"✓ {stage.name:10s} {sec:6.2f} s  {msg}")
+                else:
+                    state[stage.name] = "failed"
+                    print(f"⚠ {stage.name:10s} {sec:6.2f} s  {msg}  "
+                          f"(log: {os.path.join(log_dir, stage.name + '.log')})")
+    cache.save()
+    counts = {k: sum(v == k for v in state.values()) for k in ("ran", "cached", "failed",
+                                                                "blocked")}
+    print(f"{'⚠' if counts['failed'] or counts['blocked'] else '✓'} "
+          + ", ".join(f"{v} {k}" for k, v in counts.items() if v)
+          + f" ({time.perf_counter() - t0:.2f} s)")
+    return state
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="cached schematic-to-board pipeline")
+    ap.add_argument("script", nargs="?", help="SKiDL script (omit to start from --netlist)")
+    ap.add_argument("--netlist", help="netlist the script writes (default: <script>.net)")
+    ap.add_argument("--svg-json", help="netlistsvg JSON the script writes (enables the svg stage)")
+    ap.add_argument("--input", action="append", default=[],
+                    help="extra file the script reads (symbol library, ...)")
+    ap.add_argument("--lib-dir", action="append", default=[], help="footprint libraries")
+    ap.add_argument("--board", help="start from this .kicad_pcb instead of importing the netlist")
+    ap.add_argument("--kicad-python", default=os.environ.get("KICAD_PYTHON", sys.executable),
+                    help="interpreter with pcbnew, for the board stage ($KICAD_PYTHON)")
+    ap.add_argument("--placer", choices=PLACERS, default="placement")
+    ap.add_argument("--layout", default="d", help="placement.LAYOUTS preset")
+    ap.add_argument("--place-arg", action="append", default=[], help="passed to the placer")
+    ap.add_argument("--router", choices=ROUTERS, default="route_scheduler")
+    ap.add_argument("--skip", action="append", default=[], help="nets left unrouted (planes)")
+    ap.add_argument("--route-arg", action="append", default=[], help="passed to the router")
+    ap.add_argument("--until", choices=ORDER, help="stop after this stage")
+    ap.add_argument("--force", action="append", default=[], choices=ORDER,
+                    help="re-run this stage even if cached")
+    ap.add_argument("-j", "--jobs", type=int, help="stages run at once (default: all cores)")
+    ap.add_argument("-o", "--out-dir", default="build")
+    args = ap.parse_args(argv)
+    os.makedirs(args.out_dir, exist_ok=True)
+    stages = build(args)
+    state = run(stages, os.path.join(args.out_dir, ".cache"), args.jobs, set(args.force))
+    return 1 if any(v in ("failed", "blocked") for v in state.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+# ---------------------------------------------------------------------
+# placement.py  –  family-row grid placement, headless or in KiCad
+# ---------------------------------------------------------------------
+"""
+The one grid placer behind ``c.py``, ``d.py`` and ``e.py``.
+
+Each footprint is classified by reference prefix (:func:`family`), every
+family owns a row, and parts fill their row left to right at a fixed
+pitch.  All positions are computed as NumPy arrays in one pass,
+overlapping courtyards are pushed apart by :func:`spatial_index.legalize`,
+and everything is written back in one batch.  The three historical
+layouts are kept as :data:`LAYOUTS` presets; board size, margin, pitch
+and the family→row table are plain fields of :class:`Layout`.  With ``pack`` set, the
+pitch is ignored and each row is shelf-packed by footprint size
+(:mod:`packing`).
+
+Works on a ``.kicad_pcb`` file (no KiCad needed) or on the board open in
+the editor::
+
+    python placement.py my_board_100x100.kicad_pcb --layout d -o out.kicad_pcb
+    python placement.py my_board_100x100.kicad_pcb --layout e --pack
+    exec(open("d.py").read())          # inside the KiCad scripting console
+"""
+import argparse
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+
+import eco
+import packing
+from board_model import Board
+from spatial_index import legalize
+
+# checked in order; first hit wins (D_BAR before D)
+FAMILY_RULES = (("J", "CONN"), ("U", "IC"), ("C", "CAP"), ("R", "RES"),
+                ("D_BAR", "BAR"), ("D", "LED"))
+
+
+def family(ref):
+    """Crude reference-prefix classifier shared by every placer."""
+    for prefix, fam in FAMILY_RULES:
+        if ref.startswith(prefix):
+            return fam
+    if "PWR" in ref:
+        return "POWER"
+    return "MISC"
+
+
+@dataclass
+class Layout:
+    """Grid placement parameters (mm)."""
+    width: float = None             # None: no fixed board, fit the outline
+    height: float = None
+    margin: float = 5
+    pitch_x: float = 8
+    pitch_y: float = 8
+    rows: dict = field(default_factory=dict)      # family -> row number
+    default_row: int = 9
+    snap: dict = field(default_factory=dict)      # family -> "left" | "bottom"
+    fit_margin: float = 3                         # outline margin when fitting
+    pack: bool = False                            # shelf-pack real sizes, not pitch
+    gap: float = 0.5                              # courtyard gap when packing
+
+    @property
+    def fixed(self):
+        return self.width is not None and self.height is not None
+
+
+LAYOUTS = {
+    # c.py: 300 × 100 mm, 8 × 10 mm pitch
+    "c": Layout(300, 100, 5, 8, 10,
+                rows={"CONN": 9, "POWER": 1, "IC": 4, "BAR": 0, "LED": 4,
+                      "RES": 6, "CAP": 7, "MISC": 8}, default_row=8),
+    # d.py: 125 × 125 mm, 8 mm pitch, power left / connectors bottom
+    "d": Layout(125, 125, 5, 8, 8,
+                rows={"BAR": 0, "LED": 2, "RES": 4, "CAP": 5, "IC": 6,
+                      "POWER": 7, "CONN": 8, "MISC": 9}, default_row=9,
+                snap={"POWER": "left", "CONN": "bottom"}),
+    # e.py: origin-centred 8 mm grid, outline fitted 3 mm around the parts
+    "e": Layout(None, None, 0, 8, 8,
+                rows={"CONN": 0, "IC": 1, "BAR": 2, "LED": 3, "RES": 4,
+                      "CAP": 5, "MISC": 6, "POWER": 6}, default_row=7),
+}
+
+
+# ── 1. positions ─────────────────────────────────────────────────────────
+def row_numbers(refs, layout):
+    return np.array([layout.rows.get(family(r), layout.default_row) for r in refs],
+                    dtype=np.int64)
+
+
+def slots(rows):
+    """Column slot of each part inside its row, in input order."""
+    order = np.argsort(rows, kind="stable")
+    ranked = rows[order]
+    col = np.empty_like(rows)
+    col[order] = np.arange(len(rows)) - np.searchsorted(ranked, ranked, side="left")
+    return col
+
+
+def grid(board, layout):
+    """Vectorized grid positions ``(xy (N, 2), rot (N,))`` for ``board``."""
+    refs = board.refs
+    n = len(refs)
+    rows = row_numbers(refs, layout)
+    col = slots(rows)
+    rot = np.zeros(n)
+    if not layout.fixed:
+        return np.stack([col * layout.pitch_x, rows * layout.pitch_y], 1).astype(float), rot
+
+    left, right = layout.margin, layout.width - layout.margin
+    bottom, top = layout.margin, layout.height - layout.margin
+    per_line = max(int((right - left) // layout.pitch_x) + 1, 1)
+    line, col = np.divmod(col, per_line)
+
+    # rows that wrap push every later row down instead of onto it
+    extra = np.zeros(rows.max() + 2 if n else 1, dtype=np.int64)
+    np.maximum.at(extra, rows + 1, line)
+    shift = np.cumsum(extra)[rows]
+
+    x = left + col * layout.pitch_x
+    y = top - (rows + shift + line) * layout.pitch_y
+    fams = np.array([family(r) for r in refs])
+    for fam, edge in layout.snap.items():
+        hit = fams == fam
+        if edge == "left":
+            x[hit] = left
+        elif edge == "bottom":
+            y[hit] = bottom
+    x = np.clip(x, left, right)
+    y = np.clip(y, bottom, top)
+    return np.stack([x, y], 1).astype(float), rot
+
+
+def positions(board, layout):
+    """Grid or packed positions, depending on ``layout.pack``."""
+    if layout.pack:
+        return packing.pack(board, layout, row_numbers(board.refs, layout), layout.gap)
+    return grid(board, layout)
+
+
+def fitted_outline(board, xy, rot, margin):
+    """Rectangle ``margin`` mm outside the footprint bounding boxes."""
+    bb = board.bboxes(xy, rot)
+    return (bb[:, 0].min() - margin, bb[:, 1].min() - margin,
+            bb[:, 2].max() + margin, bb[:, 3].max() + margin)
+
+
+# ── 2. driver ────────────────────────────────────────────────────────────
+def place(board, layout):
+    """Place ``board`` in memory and set its outline; returns the outline."""
+    xy, rot = positions(board, layout)
+    bounds = (0, 0, layout.width, layout.height) if layout.fixed else None
+    xy, moved = legalize(board, xy, rot, bounds)
+    if moved:
+        print(f"  legalized {len(moved)} overlapping or off-board footprints")
+    board.set_placement(xy, rot)
+    if layout.fixed:
+        outline = (0, 0, layout.width, layout.height)
+    else:
+        outline = fitted_outline(board, xy, rot, layout.fit_margin)
+    board.set_outline(*outline)
+    return outline
+
+
+def run(layout, path=None, out=None):
+    """Place a board file (``path``) or the board open in KiCad, then write it back."""
+    board = Board.load(path) if path else Board.from_pcbnew()
+    x0, y0, x1, y1 = place(board, layout)
+    board.commit(out)
+    print(f"✓ placed {len(board.footprints)} footprints, "
+          f"board {x1 - x0:.1f} mm × {y1 - y0:.1f} mm")
+    return board
+
+
+def main(layout=None, argv=None):
+    ap = argparse.ArgumentParser(description="family-row grid placement")
+    ap.add_argument("board", nargs="?", help=".kicad_pcb file (default: board open in KiCad)")
+    ap.add_argument("-o", "--output", help="write here instead of overwriting the input")
+    if layout is None:
+        ap.add_argument("--layout", choices=sorted(LAYOUTS), default="d")
+    ap.add_argument("--pack", action="store_true",
+                    help="shelf-pack by footprint size instead of the fixed pitch")
+    ap.add_argument("--eco", action="store_true",
+                    help="keep placed parts, only place new ones (see eco.py)")
+    args = ap.parse_args(argv)
+    layout = layout or LAYOUTS[args.layout]
+    if args.eco:
+        bounds = (0, 0, layout.width, layout.height) if layout.fixed else None
+        return eco.run(args.board, args.output, bounds=bounds)
+    if args.pack:
+        layout = replace(layout, pack=True)
+    return run(layout, args.board, args.output)
+
+
+if __name__ == "__main__":
+    main()
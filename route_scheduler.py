@@ -0,0 +1,296 @@
+# ---------------------------------------------------------------------
+# route_scheduler.py  –  parallel region-batched routing with rip-up
+# ---------------------------------------------------------------------
+"""
+:mod:`maze_router` routes one net at a time.  Nets far apart do not
+interact, so this scheduler routes them side by side in a process pool:
+
+1. nets are sorted shortest first and packed into *waves*: nets whose
+   bounding boxes (grown by ``margin``) are pairwise disjoint, found with
+   :class:`spatial_index.SpatialIndex`;
+2. the board is cut into ``regions`` (columns × rows); each wave is
+   split by the region holding each net's centre, one job per region, so
+   a worker gets a compact area and routes its nets in sequence;
+3. every worker keeps a :class:`maze_router.Router` resident and, per
+   job, is sent the copper committed since the iteration began;
+4. back in the main process results are merged in net order: a net whose
+   copper still fits the committed grid (:meth:`Router.fits`) is kept,
+   one that now collides with a neighbour's is dropped and queued for
+   the next iteration;
+5. a net that finds no path is routed again on the bare board (pads,
+   keep-outs and edge only); the committed nets whose copper that path
+   runs into are ripped up — the most-crossed ``rip_cap`` of them.  It
+   goes first in the next iteration, they follow.  A net that failed
+   only because its search budget ran out rips nothing up.
+
+Each iteration prints routed / conflicts / failed and its time.  After
+``iterations``, or as soon as the same nets fail twice, the remaining
+nets get a last sequential pass in the main process, which sees
+everything.  With ``jobs=1`` it all runs in-process.
+
+    python route_scheduler.py board.kicad_pcb -j 8 -o routed.kicad_pcb
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from board_model import Board
+from connectivity import Connectivity
+from maze_router import LAYERS, Router
+from spatial_index import SpatialIndex
+
+MARGIN = 2.0                # mm added around net bounding boxes
+RIP_CAP = 3                 # committed nets ripped up per failed net, at most
+
+_router = None              # per-worker state, set by _init
+_synced = 0                 # committed entries already stamped
+_epoch = 0                  # bumped by the main process on every rip-up
+_base = (0, 0)              # the board's own tracks / vias
+
+
+def _init(board, options):
+    global _router, _synced, _base
+    _router = Router(board, **options)
+    _synced = 0
+    _base = len(board.tracks), len(board.vias)
+
+
+def _route_job(job):
+    """Worker entry point: route ``names`` on top of ``committed`` copper;
+    the worker's own results are not kept in its grid."""
+    global _synced, _epoch
+    names, committed, epoch = job
+    r = _router
+    if epoch != _epoch:                               # copper was ripped up: start over
+        del r.board.tracks[_base[0]:], r.board.vias[_base[1]:]
+        r._rasterize()
+        _synced, _epoch = 0, epoch
+    for name, tracks, vias in committed[_synced:]:
+        r.add_copper(name, tracks, vias)
+    _synced = len(committed)
+    board = r.board
+    saved = r.grid.track.copy(), r.grid.via.copy(), len(board.tracks), len(board.vias)
+    out = []
+    for name in names:
+        t0 = time.perf_counter()
+        tracks, vias, failed = r.route_net(name)
+        failed = ("budget" if r.exhausted == len(failed) else "blocked") if failed else ""
+        out.append((name, [(t.x1, t.y1, t.x2, t.y2, t.layer) for t in tracks],
+                    [(v.x, v.y) for v in vias], failed, time.perf_counter() - t0))
+    r.grid.track[...], r.grid.via[...] = saved[0], saved[1]
+    del board.tracks[saved[2]:], board.vias[saved[3]:]
+    return out
+
+
+def net_boxes(router, names, margin=MARGIN):
+    boxes = []
+    for name in names:
+        xy = router.pad_xy[router.net_pads(name)]
+        lo, hi = xy.min(0) - margin, xy.max(0) + margin
+        boxes.append((lo[0], lo[1], hi[0], hi[1]))
+    return np.array(boxes, dtype=float).reshape(-1, 4)
+
+
+def waves(boxes):
+    """Greedy partition of box indices into groups of pairwise disjoint boxes."""
+    out, index = [], []
+    for i, box in enumerate(boxes.tolist()):
+        for wave, idx in zip(out, index):
+            if idx.free(box):
+                wave.append(i)
+                idx.insert(i, box)
+                break
+        else:
+            out.append([i])
+            index.append(SpatialIndex.from_boxes(np.array([box]), ids=[i]))
+    return out
+
+
+def blockers(router, bare, name, cap=RIP_CAP):
+    """Nets whose copper is in the way of ``name``, most-crossed first (at
+    most ``cap``).  ``name`` is routed on ``bare`` — the ``(track, via)``
+    grids before any net was committed — and the cells of that path are
+    looked up in the router's current grids; empty when not even the
+    bare board has a path."""
+    g, board = router.grid, router.board
+    live = g.track.copy(), g.via.copy(), len(board.tracks), len(board.vias)
+    g.track[...], g.via[...] = bare
+    try:
+        tracks, vias, _ = router.route_net(name)
+    finally:
+        g.track[...], g.via[...] = live[0], live[1]
+        del board.tracks[live[2]:], board.vias[live[3]:]
+    own = router.net_id[name] + 1
+    owners = [np.zeros(0, dtype=g.track.dtype)]
+    for t in tracks:
+        hit = g.near(t.x1, t.y1, t.x2, t.y2, g.pitch / 2)
+        if hit is not None:
+            owners.append(g.track[LAYERS.index(t.layer)][hit[0]][hit[1]])
+    for v in vias:
+        ix, iy = g.cell(v.x, v.y)
+        owners.append(g.via[:, iy, ix])
+    owners = np.concatenate(owners)
+    owners = owners[(owners > 0) & (owners != own)]
+    if not len(owners):
+        return []
+    ids, counts = np.unique(owners, return_counts=True)
+    return [router.net_names[k - 1] for k in ids[np.argsort(-counts, kind="stable")][:cap].tolist()]
+
+
+def rip_up(router, items, names):
+    """Remove the committed ``names`` from the board (``items``: name →
+    board objects) and the router's grid."""
+    gone = {id(obj) for name in names for obj in items.pop(name)}
+    board = router.board
+    board.tracks = [t for t in board.tracks if id(t) not in gone]
+    board.vias = [v for v in board.vias if id(v) not in gone]
+    router._rasterize()
+
+
+def region_of(boxes, bounds, regions):
+    """Region number (row-major over ``regions = (cols, rows)``) of each box centre."""
+    cols, rows = regions
+    x0, y0, x1, y1 = bounds
+    cx = (boxes[:, 0] + boxes[:, 2]) / 2
+    cy = (boxes[:, 1] + boxes[:, 3]) / 2
+    c = np.clip(((cx - x0) / max(x1 - x0, 1e-9) * cols).astype(int), 0, cols - 1)
+    r = np.clip(((cy - y0) / max(y1 - y0, 1e-9) * rows).astype(int), 0, rows - 1)
+    return r * cols + c
+
+
+def schedule(board, nets=None, skip=(), jobs=None, regions=None, iterations=4,
+             margin=MARGIN, rip_cap=RIP_CAP, verbose=True, **options):
+    """Route ``board`` in memory; returns a report with per-iteration
+    ``history`` and per-net results (as :meth:`Router.route`)."""
+    jobs = jobs or os.cpu_count() or 1
+    if regions is None:
+        side = max(int(np.ceil(np.sqrt(jobs))), 1)
+        regions = (side, side)
+    main = Router(board, **options)
+    bare = main.grid.track.copy(), main.grid.via.copy()
+    names = [n for n in (nets or main.net_names)
+             if n in main.net_id and n not in skip and len(main.net_pads(n)) > 1]
+    boxes = net_boxes(main, names, margin)
+    order = np.argsort((boxes[:, 2] - boxes[:, 0]) + (boxes[:, 3] - boxes[:, 1]), kind="stable")
+    pending = [names[i] for i in order]
+    committed = []                                   # (name, tracks, vias)
+    items = {}                                       # name -> board objects
+    epoch = 0
+    seen = set()                                     # failed sets of earlier iterations
+    report = {"nets": {}, "history": [], "failed": []}
+    t_all = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init,
+                               initargs=(board.detached(), options)) if jobs > 1 else None
+    if pool is None:
+        _init(board.detached(), options)
+    try:
+        for it in range(iterations):
+            if not pending:
+                break
+            t0 = time.perf_counter()
+            boxes = net_boxes(main, pending, margin)
+            region = region_of(boxes, main.bounds, regions)
+            results = {}
+            for wave in waves(boxes):
+                batches = {}
+                for i in wave:
+                    batches.setdefault(int(region[i]), []).append(pending[i])
+                todo = [(batch, list(committed), epoch) for batch in batches.values()]
+                done = pool.map(_route_job, todo) if pool else map(_route_job, todo)
+                wave_results = [r for out in done for r in out]
+                for name, tracks, vias, failed, seconds in wave_results:
+                    results[name] = (tracks, vias, failed, seconds)
+                # merge in routing order: earlier nets win conflicts
+                for name in [pending[i] for i in wave]:
+                    tracks, vias, failed, seconds = results[name]
+                    if failed or not main.fits(name, tracks, vias):
+                        continue
+                    items[name] = main.add_copper(name, tracks, vias)
+                    committed.append((name, tracks, vias))
+                    report["nets"][name] = {
+                        "seconds": seconds, "iteration": it + 1, "vias": len(vias),
+                        "segments": len(tracks),
+                        "length": float(sum(np.hypot(t[2] - t[0], t[3] - t[1]) for t in tracks))}
+            routed = [n for n in pending if n in report["nets"]]
+            failed = [n for n in pending if n not in report["nets"] and results[n][2]]
+            conflicts = [n for n in pending if n not in report["nets"] and not results[n][2]]
+            ripped = []
+            for name in failed:
+                if results[name][2] != "budget":         # a bigger budget, not more room
+                    ripped += [n for n in blockers(main, bare, name, rip_cap)
+                               if n in items and n not in ripped]
+            if ripped:
+                rip_up(main, items, ripped)
+                for name in ripped:
+                    del report["nets"][name]
+                committed = [c for c in committed if c[0] not in ripped]
+                epoch += 1
+            pending = failed + ripped + conflicts
+            step = {"iteration": it + 1, "routed": len(routed), "conflicts": len(conflicts),
+                    "failed": len(failed), "ripped": len(ripped),
+                    "seconds": time.perf_counter() - t0}
+            report["history"].append(step)
+            if verbose:
+                print(f"  iteration {it + 1}: {step['routed']:4d} routed, "
+                      f"{step['conflicts']:3d} conflicts, {step['failed']:3d} failed, "
+                      f"{step['ripped']:3d} ripped up, {len(committed)}/{len(names)} done  "
+                      f"({step['seconds']:.2f} s)")
+            key = frozenset(failed)
+            if not routed and not ripped or failed and key in seen:
+                break                                 # no progress: finish sequentially
+            seen.add(key)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if pending:
+        t0 = time.perf_counter()
+        for name in pending:
+            tracks, vias, failed = main.route_net(name)
+            if failed:
+                report["failed"].append(name)
+            report["nets"][name] = {"seconds": time.perf_counter() - t0, "iteration": 0,
+                                    "vias": len(vias), "segments": len(tracks),
+                                    "length": sum(float(np.hypot(t.x2 - t.x1, t.y2 - t.y1))
+                                                  for t in tracks)}
+            t0 = time.perf_counter()
+        if verbose:
+            print(f"  sequential: {len(pending) - len(report['failed'])} of {len(pending)} "
+                  f"remaining nets routed")
+    report["seconds"] = time.perf_counter() - t_all
+    return report
+
+
+def run(path=None, out=None, jobs=None, regions=None, iterations=4, **kw):
+    board = Board.load(path) if path else Board.from_pcbnew()
+    report = schedule(board, jobs=jobs, regions=regions, iterations=iterations, **kw)
+    board.commit(out)
+    n = len(report["nets"])
+    print(f"✓ routed {n - len(report['failed'])} of {n} nets in {report['seconds']:.2f} s "
+          f"({len(report['history'])} parallel iterations, {jobs or os.cpu_count()} jobs)")
+    if report["failed"]:
+        print(f"⚠ incomplete: {', '.join(report['failed'])}")
+    missing = Connectivity(board).unrouted(list(report["nets"]))
+    if missing:
+        print(f"⚠ {sum(map(len, missing.values()))} connections still unrouted "
+              f"in {len(missing)} nets")
+    return board, report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="parallel region-batched routing")
+    ap.add_argument("board", nargs="?", help=".kicad_pcb file (default: board open in KiCad)")
+    ap.add_argument("-o", "--output")
+    ap.add_argument("-j", "--jobs", type=int, help="worker processes (default: all cores)")
+    ap.add_argument("--regions", type=int, nargs=2, metavar=("COLS", "ROWS"))
+    ap.add_argument("--iterations", type=int, default=4)
+    ap.add_argument("--rip-cap", type=int, default=RIP_CAP,
+                    help="committed nets ripped up per failed net, at most")
+    ap.add_argument("--skip", action="append", default=[], help="leave these nets (e.g. GND)")
+    ap.add_argument("--pitch", type=float, default=0.25)
+    args = ap.parse_args()
+    run(args.board, args.output, args.jobs, args.regions, args.iterations,
+        skip=args.skip, pitch=args.pitch, rip_cap=args.rip_cap)
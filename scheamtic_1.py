@@ -7,6 +7,7 @@ Single LEDs, arrays, different colors, indicators
 
 import os
 from skidl import *
+from svg_render import generate_svg   # in-process, replaces netlistsvg
 
 
 def setup_kicad():
@@ -0,0 +1,113 @@
+# ---------------------------------------------------------------------
+# sexpr.py  –  minimal KiCad s-expression reader/writer, zero deps
+# ---------------------------------------------------------------------
+"""
+Reads ``.kicad_pcb`` / ``.kicad_mod`` / ``.net`` files into nested Python
+lists and writes them back in KiCad's tab-indented layout.
+
+Atoms stay strings; quoted strings are :class:`QStr` so they are quoted
+again on output.  Numbers are converted only where a caller asks for them.
+"""
+import re
+
+_TOKEN = re.compile(r'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|([^\s()"]+))', re.S)
+
+
+class QStr(str):
+    """A string that was quoted in the source file."""
+    __slots__ = ()
+
+
+def _unescape(s):
+    return s.replace('\\"', '"').replace("\\\\", "\\") if "\\" in s else s
+
+
+def parse(text):
+    """Parse one s-expression (the whole file) into nested lists."""
+    stack, cur = [], None
+    for m in _TOKEN.finditer(text):
+        opened, closed, quoted, atom = m.groups()
+        if opened:
+            node = []
+            if cur is not None:
+                cur.append(node)
+                stack.append(cur)
+            cur = node
+        elif closed:
+            if not stack:
+                return cur
+            cur = stack.pop()
+        elif quoted is not None:
+            cur.append(QStr(_unescape(quoted)))
+        elif atom is not None:
+            cur.append(atom)
+    return cur
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return parse(f.read())
+
+
+def _atom(x):
+    if isinstance(x, QStr):
+        return '"%s"' % x.replace("\\", "\\\\").replace('"', '\\"')
+    if isinstance(x, float):
+        return ("%.6f" % x).rstrip("0").rstrip(".") or "0"
+    return str(x)
+
+
+def _write(node, out, depth):
+    pad = "\t" * depth
+    if all(not isinstance(x, list) for x in node):
+        out.append(pad + "(" + " ".join(_atom(x) for x in node) + ")")
+        return
+    head = []
+    i = 0
+    while i < len(node) and not isinstance(node[i], list):
+        head.append(_atom(node[i]))
+        i += 1
+    out.append(pad + "(" + " ".join(head))
+    for x in node[i:]:
+        if isinstance(x, list):
+            _write(x, out, depth + 1)
+        else:
+            out.append("\t" * (depth + 1) + _atom(x))
+    out.append(pad + ")")
+
+
+def dumps(node):
+    out = []
+    _write(node, out, 0)
+    return "\n".join(out) + "\n"
+
+
+def save(node, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(dumps(node))
+
+
+# ── tree helpers ─────────────────────────────────────────────────────────
+def find(node, key):
+    """First child list whose head is ``key`` (or ``None``)."""
+    for x in node:
+        if isinstance(x, list) and x and x[0] == key:
+            return x
+    return None
+
+
+def find_all(node, key):
+    return [x for x in node if isinstance(x, list) and x and x[0] == key]
+
+
+def value(node, key, default=None):
+    """Second element of child ``key`` — e.g. ``value(pad, "net")``."""
+    x = find(node, key)
+    return x[1] if x is not None and len(x) > 1 else default
+
+
+def floats(node, key, n=2, default=0.0):
+    """First ``n`` numbers of child ``key``, padded with ``default``."""
+    x = find(node, key)
+    vals = [float(v) for v in x[1:n + 1]] if x is not None else []
+    return vals + [default] * (n - len(vals))
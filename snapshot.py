@@ -0,0 +1,210 @@
+# ---------------------------------------------------------------------
+# snapshot.py  –  packed placement snapshots and run-to-run comparison
+# ---------------------------------------------------------------------
+"""
+A placement is just ref → x, y, rotation, side.  Instead of comparing
+layouts by unzipping ``my_board_100x100-backups/*.zip`` into KiCad, keep
+them as ``.plsnap`` files (little-endian, same spirit as ``.svgnet``)::
+
+    "PLSN"  u16 version  u16 0
+    u32 n   u32 len   refs, UTF-8, newline-separated
+    u32 len           meta, JSON
+    f64 x[n]  f64 y[n]  f64 rot[n]  u8 side[n]      (0 = front, 1 = back)
+
+Reading is a couple of ``np.frombuffer`` calls.  Metrics are vectorized:
+HPWL and courtyard bbox area against a board's nets and footprints, and
+displacement between two snapshots matched by reference.
+:meth:`Snapshot.apply` restores positions, rotations and sides onto a
+board in one :meth:`board_model.Board.set_placement` batch; parts on the
+wrong side are flipped back.
+
+    python snapshot.py save  board.kicad_pcb d.plsnap --label d
+    python snapshot.py stats board.kicad_pcb c.plsnap d.plsnap e.plsnap
+    python snapshot.py diff  c.plsnap d.plsnap
+    python snapshot.py restore d.plsnap board.kicad_pcb -o out.kicad_pcb
+"""
+import argparse
+import json
+import struct
+import sys
+import time
+
+import numpy as np
+
+from board_model import Board
+from wirelength import NetTable
+
+MAGIC = b"PLSN"
+VERSION = 1
+SIDES = ("F", "B")
+
+
+class Snapshot:
+    """Ref-indexed placement as packed arrays."""
+
+    __slots__ = ("refs", "xy", "rot", "side", "meta", "_index")
+
+    def __init__(self, refs, xy, rot, side=None, meta=None):
+        self.refs = list(refs)
+        self.xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        self.rot = np.asarray(rot, dtype=np.float64)
+        self.side = (np.zeros(len(self.refs), dtype=np.uint8) if side is None
+                     else np.asarray(side, dtype=np.uint8))
+        self.meta = dict(meta or {})
+        self._index = None
+
+    @classmethod
+    def from_board(cls, board, **meta):
+        xy, rot = board.placement()
+        side = [SIDES.index(fp.side) if fp.side in SIDES else 0 for fp in board.footprints]
+        meta.setdefault("time", time.time())
+        if board.path:
+            meta.setdefault("board", board.path)
+        return cls(board.refs, xy, rot, side, meta)
+
+    def __len__(self):
+        return len(self.refs)
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {r: i for i, r in enumerate(self.refs)}
+        return self._index
+
+    # -- file format -------------------------------------------------------
+    def save(self, path):
+        refs = "\n".join(self.refs).encode("utf-8")
+        meta = json.dumps(self.meta, separators=(",", ":")).encode("utf-8")
+        n = len(self.refs)
+        with open(path, "wb") as f:
+            f.write(MAGIC + struct.pack("<HHII", VERSION, 0, n, len(refs)) + refs)
+            f.write(struct.pack("<I", len(meta)) + meta)
+            f.write(self.xy[:, 0].astype("<f8").tobytes())
+            f.write(self.xy[:, 1].astype("<f8").tobytes())
+            f.write(self.rot.astype("<f8").tobytes())
+            f.write(self.side.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path}: not a .plsnap file")
+        version, _, n, ln = struct.unpack_from("<HHII", data, 4)
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported .plsnap version {version}")
+        off = 16
+        refs = data[off:off + ln].decode("utf-8").split("\n") if n else []
+        off += ln
+        (ln,) = struct.unpack_from("<I", data, off)
+        meta = json.loads(data[off + 4:off + 4 + ln] or b"{}")
+        off += 4 + ln
+        cols = np.frombuffer(data, "<f8", 3 * n, off)
+        side = np.frombuffer(data, np.uint8, n, off + 24 * n)
+        return cls(refs, np.stack([cols[:n], cols[n:2 * n]], 1), cols[2 * n:], side, meta)
+
+    # -- matching and metrics ----------------------------------------------
+    def align(self, refs):
+        """``(mine, theirs)`` index arrays for the refs both sides have."""
+        pairs = [(self.index[r], j) for j, r in enumerate(refs) if r in self.index]
+        if not pairs:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        a = np.array(pairs, dtype=np.int64)
+        return a[:, 0], a[:, 1]
+
+    def displacement(self, other):
+        """``(refs, distance mm, rotation change deg)`` for refs in both."""
+        mine, theirs = self.align(other.refs)
+        d = np.hypot(*(self.xy[mine] - other.xy[theirs]).T)
+        dr = np.abs((self.rot[mine] - other.rot[theirs] + 180) % 360 - 180)
+        return [self.refs[i] for i in mine.tolist()], d, dr
+
+    def on(self, board):
+        """This placement in ``board`` footprint order (missing refs keep
+        the board's own position); returns ``(xy, rot, idx)``."""
+        xy, rot = board.placement()
+        mine, idx = self.align(board.refs)
+        xy, rot = xy.copy(), rot.copy()
+        xy[idx], rot[idx] = self.xy[mine], self.rot[mine]
+        return xy, rot, idx
+
+    def metrics(self, board, nets=None):
+        """``{"hpwl", "area", "width", "height", "parts"}`` on ``board``'s nets
+        and courtyards."""
+        xy, rot, idx = self.on(board)
+        nets = nets or NetTable(board)
+        bb = board.bboxes(xy, rot)
+        w = float(bb[:, 2].max() - bb[:, 0].min()) if len(bb) else 0.0
+        h = float(bb[:, 3].max() - bb[:, 1].min()) if len(bb) else 0.0
+        return {"hpwl": nets.hpwl(xy, rot), "area": w * h, "width": w, "height": h,
+                "parts": len(idx)}
+
+    def apply(self, board):
+        """Restore onto ``board`` in one batch; returns how many footprints matched."""
+        mine, idx = self.align(board.refs)
+        board.set_placement(self.xy[mine], self.rot[mine], idx=idx.tolist(),
+                            side=[SIDES[s] for s in self.side[mine].tolist()])
+        return len(idx)
+
+
+def _label(path, snap):
+    return snap.meta.get("label") or path
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="placement snapshots")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("save", help="snapshot a board's placement")
+    p.add_argument("board")
+    p.add_argument("snapshot")
+    p.add_argument("--label")
+    p = sub.add_parser("stats", help="HPWL / area of snapshots on a board's nets")
+    p.add_argument("board")
+    p.add_argument("snapshots", nargs="+")
+    p = sub.add_parser("diff", help="displacement between two snapshots")
+    p.add_argument("a")
+    p.add_argument("b")
+    p.add_argument("--top", type=int, default=10)
+    p = sub.add_parser("restore", help="apply a snapshot to a board")
+    p.add_argument("snapshot")
+    p.add_argument("board", nargs="?", help=".kicad_pcb file (default: board open in KiCad)")
+    p.add_argument("-o", "--output")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "save":
+        meta = {"label": args.label} if args.label else {}
+        snap = Snapshot.from_board(Board.load(args.board), **meta)
+        snap.save(args.snapshot)
+        print(f"✓ {args.snapshot}: {len(snap)} footprints")
+    elif args.cmd == "stats":
+        board = Board.load(args.board)
+        nets = NetTable(board)
+        print(f"{'snapshot':24s} {'HPWL mm':>10s} {'bbox mm':>15s} {'area mm²':>10s} parts")
+        for path in args.snapshots:
+            snap = Snapshot.load(path)
+            m = snap.metrics(board, nets)
+            print(f"{_label(path, snap):24s} {m['hpwl']:10.1f} "
+                  f"{m['width']:7.1f}×{m['height']:<7.1f} {m['area']:10.0f} {m['parts']}")
+    elif args.cmd == "diff":
+        a, b = Snapshot.load(args.a), Snapshot.load(args.b)
+        refs, d, dr = a.displacement(b)
+        moved = d > 1e-6
+        print(f"{len(refs)} common refs, {int(moved.sum())} moved, "
+              f"mean {d.mean() if len(d) else 0:.2f} mm, max {d.max(initial=0):.2f} mm, "
+              f"{int((dr > 1e-6).sum())} rotated")
+        only_a = len(a) - len(refs)
+        only_b = len(b) - len(refs)
+        if only_a or only_b:
+            print(f"  {only_a} refs only in {args.a}, {only_b} only in {args.b}")
+        for i in np.argsort(-d)[:args.top].tolist():
+            if d[i] > 1e-6:
+                print(f"  {refs[i]:12s} {d[i]:8.2f} mm  {dr[i]:5.1f}°")
+    else:
+        board = Board.load(args.board) if args.board else Board.from_pcbnew()
+        n = Snapshot.load(args.snapshot).apply(board)
+        board.commit(args.output)
+        print(f"✓ restored {n} of {len(board.footprints)} footprints from {args.snapshot}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
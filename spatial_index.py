@@ -0,0 +1,203 @@
+# ---------------------------------------------------------------------
+# spatial_index.py  –  uniform-grid index over courtyards + legalizer
+# ---------------------------------------------------------------------
+"""
+Axis-aligned boxes (``xmin, ymin, xmax, ymax``) bucketed into square
+cells.  Insert, move, remove and query touch only the cells a box
+covers, so they stay O(1) on average however many footprints the board
+has; finding every overlapping pair is one sweep over the buckets.
+
+:func:`legalize` uses it to push overlapping parts to the nearest free
+spot.  Parts go largest first and are inserted as they are settled, so
+only locked parts and parts already placed count as obstacles: a big part
+keeps its place and the small ones under it move.  The placers and any
+later DRC pass share the same index::
+
+    idx = SpatialIndex.from_boxes(board.bboxes())
+    idx.overlaps()                 # [(i, j), ...]
+"""
+import functools
+import math
+from collections import defaultdict
+
+import numpy as np
+
+EPS = 1e-6          # boxes that merely touch do not overlap
+
+
+def _hit(a, b):
+    return (a[0] < b[2] - EPS and b[0] < a[2] - EPS
+            and a[1] < b[3] - EPS and b[1] < a[3] - EPS)
+
+
+class SpatialIndex:
+    """Uniform grid of ``cell`` mm buckets holding box ids."""
+
+    def __init__(self, cell=5.0):
+        self.cell = float(cell)
+        self.boxes = {}
+        self.cells = defaultdict(set)
+
+    @classmethod
+    def from_boxes(cls, boxes, cell=None, ids=None):
+        """Index rows of an ``(N, 4)`` array under ``ids`` (default ``0 … N-1``)."""
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        idx = cls(max(_cell(boxes) if cell is None else cell, 0.1))
+        for i, b in zip(range(len(boxes)) if ids is None else ids, boxes.tolist()):
+            idx.insert(i, b)
+        return idx
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __contains__(self, key):
+        return key in self.boxes
+
+    def _keys(self, box):
+        c = self.cell
+        x0, y0 = math.floor(box[0] / c), math.floor(box[1] / c)
+        x1, y1 = math.floor(box[2] / c), math.floor(box[3] / c)
+        return [(i, j) for i in range(x0, x1 + 1) for j in range(y0, y1 + 1)]
+
+    def insert(self, key, box):
+        box = tuple(box)
+        self.boxes[key] = box
+        for k in self._keys(box):
+            self.cells[k].add(key)
+
+    def remove(self, key):
+        for k in self._keys(self.boxes.pop(key)):
+            bucket = self.cells[k]
+            bucket.discard(key)
+            if not bucket:
+                del self.cells[k]
+
+    def move(self, key, box):
+        self.remove(key)
+        self.insert(key, box)
+
+    def query(self, box, exclude=None):
+        """Ids whose boxes overlap ``box`` (``exclude`` left out)."""
+        found = set()
+        for k in self._keys(box):
+            for key in self.cells.get(k, ()):
+                if key != exclude and key not in found and _hit(box, self.boxes[key]):
+                    found.add(key)
+        return sorted(found)
+
+    def free(self, box, exclude=None):
+        for k in self._keys(box):
+            for key in self.cells.get(k, ()):
+                if key != exclude and _hit(box, self.boxes[key]):
+                    return False
+        return True
+
+    def nearest_free(self, box, bounds=None, step=0.5, max_steps=400, exclude=None,
+                     chunk=2048):
+        """Smallest ``(dx, dy)`` on a ``step`` mm lattice that makes ``box``
+        overlap nothing (and stay inside ``bounds``), or ``None``.
+
+        Offsets within ``max_steps`` lattice steps are tried in order of
+        distance, ``chunk`` at a time: each chunk is tested in one NumPy
+        pass against only the boxes its reach can touch, so a crowded
+        neighbourhood costs a few array ops, not one bucket walk per probe.
+        """
+        box = np.asarray(box, dtype=float)
+        for off in _disk_chunks(max_steps, chunk):
+            off = off * step
+            reach = float(np.abs(off).max())
+            cand = np.concatenate([box[:2] + off, box[2:] + off], axis=1)
+            ok = np.ones(len(cand), dtype=bool)
+            if bounds is not None:
+                ok &= ((cand[:, 0] >= bounds[0] - EPS) & (cand[:, 1] >= bounds[1] - EPS)
+                       & (cand[:, 2] <= bounds[2] + EPS) & (cand[:, 3] <= bounds[3] + EPS))
+            near = self.query((box[0] - reach, box[1] - reach, box[2] + reach, box[3] + reach),
+                              exclude)
+            if near and ok.any():
+                obs = np.array([self.boxes[k] for k in near])
+                hit = ((cand[:, None, 0] < obs[:, 2] - EPS) & (obs[:, 0] < cand[:, None, 2] - EPS)
+                       & (cand[:, None, 1] < obs[:, 3] - EPS) & (obs[:, 1] < cand[:, None, 3] - EPS))
+                ok &= ~hit.any(axis=1)
+            if ok.any():
+                dx, dy = off[int(np.argmax(ok))]
+                return float(dx), float(dy)
+        return None
+
+    def overlaps(self):
+        """Every overlapping pair ``(i, j)``, ``i < j``, once."""
+        pairs = set()
+        for bucket in self.cells.values():
+            if len(bucket) < 2:
+                continue
+            ids = sorted(bucket)
+            for n, a in enumerate(ids):
+                ba = self.boxes[a]
+                for b in ids[n + 1:]:
+                    if _hit(ba, self.boxes[b]):
+                        pairs.add((a, b))
+        return sorted(pairs)
+
+
+def _inside(box, bounds):
+    return bounds is None or (box[0] >= bounds[0] - EPS and box[1] >= bounds[1] - EPS
+                              and box[2] <= bounds[2] + EPS and box[3] <= bounds[3] + EPS)
+
+
+@functools.lru_cache(maxsize=8)
+def _disk_chunks(r, chunk):
+    """Lattice offsets with ``|d| <= r`` sorted by distance, split into chunks
+    (built once per radius)."""
+    g = np.arange(-r, r + 1)
+    dx, dy = np.meshgrid(g, g)
+    d2 = dx * dx + dy * dy
+    keep = d2 <= r * r
+    off = np.stack([dx[keep], dy[keep]], axis=1)
+    off = off[np.argsort(d2[keep], kind="stable")]
+    return tuple(off[i:i + chunk] for i in range(0, len(off), chunk))
+
+
+def legalize(board, xy, rot=None, bounds=None, clearance=0.0, step=0.5, max_steps=400,
+             movable=None):
+    """Nudge overlapping (or out-of-bounds) footprints to the nearest free spot.
+
+    ``bounds`` (``xmin, ymin, xmax, ymax``) keeps moved parts inside the
+    board; locked footprints never move, and when ``movable`` (indices)
+    is given nothing else does either.  Returns ``(xy, moved)`` with
+    ``moved`` the indices that were shifted.  Parts that find no room
+    within ``max_steps`` × ``step`` mm stay put.
+    """
+    xy = np.array(xy, dtype=float)
+    bb = board.bboxes(xy, rot)
+    half = clearance / 2
+    bb[:, :2] -= half
+    bb[:, 2:] += half
+    locked = [fp.locked for fp in board.footprints]
+    if movable is not None:
+        locked = [True] * len(locked)
+        for i in movable:
+            locked[i] = board.footprints[i].locked
+    # only fixed parts and parts already legalized are obstacles, so a big
+    # part keeps its place and the small ones it covers move instead
+    fixed = [i for i, lk in enumerate(locked) if lk]
+    idx = SpatialIndex.from_boxes(bb[fixed], cell=_cell(bb), ids=fixed)
+    area = (bb[:, 2] - bb[:, 0]) * (bb[:, 3] - bb[:, 1])
+    moved = []
+    for i in np.argsort(-area, kind="stable").tolist():
+        if locked[i]:
+            continue
+        box = tuple(bb[i].tolist())
+        if not (idx.free(box) and _inside(box, bounds)):
+            shift = idx.nearest_free(box, bounds, step, max_steps)
+            if shift:
+                dx, dy = shift
+                box = (box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy)
+                xy[i] += dx, dy
+                moved.append(i)
+        idx.insert(i, box)
+    return xy, moved
+
+
+def _cell(boxes):
+    """About two median parts per cell keeps buckets short."""
+    size = np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1])
+    return max(2 * float(np.median(size)), 0.1) if len(size) else 5.0
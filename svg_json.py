@@ -0,0 +1,305 @@
+# ---------------------------------------------------------------------
+# svg_json.py  –  compact netlistsvg intermediate: streamed JSON + binary
+# ---------------------------------------------------------------------
+"""
+Emitter for the cells/connections document that :mod:`svg_render` lays
+out.  Compared with the pretty-printed file SKiDL writes:
+
+* JSON is minified and written cell by cell, never built as one string;
+* ``port_directions`` lives once per cell type under ``cell_types`` and a
+  cell only carries its own copy when it differs (every R/C/LED shares
+  one entry instead of repeating it per part);
+* a binary sidecar (``.svgnet``) holds the same data as a string table and
+  flat little-endian integer arrays, for tools that should not parse JSON.
+
+``expand()`` turns a compact document back into plain netlistsvg form.
+"""
+import array
+import json
+import struct
+import sys
+
+MAGIC = b"SVGN"
+VERSION = 2                 # 2 added the per-cell direction overrides
+_DIRS = ("input", "output", "inout")
+
+_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+
+# ── 1. build ─────────────────────────────────────────────────────────────
+def netlistsvg_json(circuit=None):
+    """Build the compact netlistsvg document from a SKiDL circuit."""
+    from skidl import default_circuit
+    from skidl.pin import pin_types
+
+    circuit = circuit or default_circuit
+    drivers = {pin_types.OUTPUT, pin_types.PWROUT, pin_types.TRISTATE}
+
+    bits, netnames = {}, {}
+    for bit, net in enumerate(circuit.get_nets(), 2):   # 0/1 are constants
+        netnames[net.name] = {"bits": [bit]}
+        for pin in net.get_pins():
+            bits[id(pin)] = bit
+
+    cell_types, cells = {}, {}
+    for part in circuit.parts:
+        type_ = "%s_1_" % part.name
+        dirs = {pin.num: "output" if pin.func in drivers else "input"
+                for pin in part.pins}
+        cell = {"type": type_, "attributes": {"value": str(part.value)},
+                "connections": {pin.num: [bits[id(pin)]]
+                                for pin in part.pins if id(pin) in bits}}
+        shared = cell_types.setdefault(type_, {"port_directions": dirs})
+        if shared["port_directions"] != dirs:
+            cell["port_directions"] = dirs
+        cells[part.ref] = cell
+    return {"modules": {"": {"ports": {}, "cell_types": cell_types,
+                             "cells": cells, "netnames": netnames}}}
+
+
+def port_directions(module, cell):
+    """Directions of one cell, falling back to its shared cell type."""
+    dirs = cell.get("port_directions")
+    if dirs is None:
+        dirs = module.get("cell_types", {}).get(cell["type"], {}).get("port_directions", {})
+    return dirs
+
+
+def expand(doc):
+    """Plain netlistsvg document (``port_directions`` on every cell)."""
+    modules = {}
+    for name, module in doc["modules"].items():
+        cells = {c: dict(cell, port_directions=port_directions(module, cell))
+                 for c, cell in module.get("cells", {}).items()}
+        modules[name] = {k: v for k, v in module.items() if k != "cell_types"}
+        modules[name]["cells"] = cells
+    return {"modules": modules}
+
+
+# ── 2. streamed JSON ─────────────────────────────────────────────────────
+def dump(doc, fp):
+    """Write ``doc`` as minified JSON, one cell per ``write`` call."""
+    w = fp.write
+    w('{"modules":{')
+    for mi, (name, module) in enumerate(doc["modules"].items()):
+        w("%s%s:{" % ("," if mi else "", _encode(name)))
+        for key in ("ports", "cell_types", "netnames"):
+            w("%s:%s," % (_encode(key), _encode(module.get(key, {}))))
+        w('"cells":{')
+        for i, (c, cell) in enumerate(module.get("cells", {}).items()):
+            w("%s%s:%s" % ("," if i else "", _encode(c), _encode(cell)))
+        w("}}")
+    w("}}")
+
+
+def save(doc, path, binary=True):
+    """Write ``path`` (JSON) and, by default, the ``.svgnet`` sidecar next to it."""
+    with open(path, "w", encoding="utf-8") as f:
+        dump(doc, f)
+    if binary:
+        dump_binary(doc, sidecar_path(path))
+
+
+def sidecar_path(path):
+    return (path[:-5] if path.endswith(".json") else path) + ".svgnet"
+
+
+# ── 3. binary sidecar ────────────────────────────────────────────────────
+# Layout (all little-endian):
+#   "SVGN" u16 version u16 0
+#   u32 n  then n x (u16 len, utf-8 bytes)          string table
+#   u32 n  then n x u32 array                       one block per array
+# Arrays, in order: types(name) | type ports: type, pid, dir |
+#   cells: name, type, attr_start, conn_start |
+#   attrs: key, value | conns: pid, bit | nets: name, bit |
+#   ports: name, dir, bit | cell overrides of its type's directions: cell, pid, dir
+_ARRAYS = ("type_name", "tport_type", "tport_pid", "tport_dir",
+           "cell_name", "cell_type", "cell_attr0", "cell_conn0",
+           "attr_key", "attr_val", "conn_pid", "conn_bit",
+           "net_name", "net_bit", "port_name", "port_dir", "port_bit",
+           "odir_cell", "odir_pid", "odir_dir")
+_V1_ARRAYS = 17
+
+
+class _Strings(dict):
+    def __missing__(self, s):
+        self[s] = len(self)
+        return self[s]
+
+
+def _u32(values):
+    a = array.array("I", values)
+    if sys.byteorder != "little":
+        a.byteswap()
+    return a
+
+
+def dump_binary(doc, path):
+    """Write the single-module ``doc`` in the ``.svgnet`` layout above."""
+    module = next(iter(doc["modules"].values()))
+    st = _Strings()
+    cols = {k: [] for k in _ARRAYS}
+
+    types = dict(module.get("cell_types", {}))
+    for cell in module.get("cells", {}).values():
+        types.setdefault(cell["type"], {"port_directions": cell.get("port_directions", {})})
+    for t, info in types.items():
+        ti = len(cols["type_name"])
+        cols["type_name"].append(st[t])
+        for pid, d in info.get("port_directions", {}).items():
+            cols["tport_type"].append(ti)
+            cols["tport_pid"].append(st[pid])
+            cols["tport_dir"].append(_DIRS.index(d) if d in _DIRS else 0)
+    type_index = {t: i for i, t in enumerate(types)}
+
+    for ci, (c, cell) in enumerate(module.get("cells", {}).items()):
+        dirs = cell.get("port_directions")
+        if dirs is not None and dirs != types[cell["type"]].get("port_directions", {}):
+            for pid, d in dirs.items():
+                cols["odir_cell"].append(ci)
+                cols["odir_pid"].append(st[pid])
+                cols["odir_dir"].append(_DIRS.index(d) if d in _DIRS else 0)
+        cols["cell_name"].append(st[c])
+        cols["cell_type"].append(type_index[cell["type"]])
+        cols["cell_attr0"].append(len(cols["attr_key"]))
+        cols["cell_conn0"].append(len(cols["conn_pid"]))
+        for k, v in cell.get("attributes", {}).items():
+            cols["attr_key"].append(st[k])
+            cols["attr_val"].append(st[str(v)])
+        for pid, bits in cell.get("connections", {}).items():
+            for b in bits:
+                if isinstance(b, int):
+                    cols["conn_pid"].append(st[pid])
+                    cols["conn_bit"].append(b)
+    for name, info in module.get("netnames", {}).items():
+        for b in info.get("bits", []):
+            cols["net_name"].append(st[name])
+            cols["net_bit"].append(b)
+    for name, port in module.get("ports", {}).items():
+        for b in port.get("bits", []):
+            cols["port_name"].append(st[name])
+            cols["port_dir"].append(_DIRS.index(port.get("direction", "input")))
+            cols["port_bit"].append(b)
+
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<HH", VERSION, 0))
+        f.write(struct.pack("<I", len(st)))
+        for s in st:
+            raw = s.encode("utf-8")
+            f.write(struct.pack("<H", len(raw)) + raw)
+        for key in _ARRAYS:
+            a = _u32(cols[key])
+            f.write(struct.pack("<I", len(a)))
+            f.write(a.tobytes())
+
+
+def read_columns(path):
+    """Raw ``.svgnet`` contents: ``(strings, {array name: array('I')})``.
+
+    This is the fast path for tools that work on the flat arrays directly;
+    :func:`load_binary` builds the JSON-shaped document on top of it.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != MAGIC:
+        raise ValueError(f"{path}: not an .svgnet file")
+    version, _ = struct.unpack_from("<HH", data, 4)
+    if version not in (1, VERSION):
+        raise ValueError(f"{path}: unsupported .svgnet version {version}")
+    (n,), off = struct.unpack_from("<I", data, 8), 12
+    strings = []
+    for _ in range(n):
+        (ln,) = struct.unpack_from("<H", data, off)
+        strings.append(data[off + 2:off + 2 + ln].decode("utf-8"))
+        off += 2 + ln
+    cols = {}
+    for key in _ARRAYS if version > 1 else _ARRAYS[:_V1_ARRAYS]:
+        (ln,) = struct.unpack_from("<I", data, off)
+        a = array.array("I")
+        a.frombytes(data[off + 4:off + 4 + 4 * ln])
+        if sys.byteorder != "little":
+            a.byteswap()
+        cols[key] = a
+        off += 4 + 4 * ln
+    for key in _ARRAYS:
+        cols.setdefault(key, array.array("I"))
+    return strings, cols
+
+
+def load_binary(path):
+    """Read a ``.svgnet`` file back into a compact netlistsvg document."""
+    S, cols = read_columns(path)
+    types = [S[i] for i in cols["type_name"]]
+    cell_types = {t: {"port_directions": {}} for t in types}
+    for ti, pid, d in zip(cols["tport_type"], cols["tport_pid"], cols["tport_dir"]):
+        cell_types[types[ti]]["port_directions"][S[pid]] = _DIRS[d]
+
+    cells = {}
+    n_cells = len(cols["cell_name"])
+    attr_end = list(cols["cell_attr0"][1:]) + [len(cols["attr_key"])]
+    conn_end = list(cols["cell_conn0"][1:]) + [len(cols["conn_pid"])]
+    for i in range(n_cells):
+        conns = {}
+        for j in range(cols["cell_conn0"][i], conn_end[i]):
+            conns.setdefault(S[cols["conn_pid"][j]], []).append(cols["conn_bit"][j])
+        cells[S[cols["cell_name"][i]]] = {
+            "type": types[cols["cell_type"][i]],
+            "attributes": {S[cols["attr_key"][j]]: S[cols["attr_val"][j]]
+                           for j in range(cols["cell_attr0"][i], attr_end[i])},
+            "connections": conns,
+        }
+    names = list(cells)
+    for ci, pid, d in zip(cols["odir_cell"], cols["odir_pid"], cols["odir_dir"]):
+        cells[names[ci]].setdefault("port_directions", {})[S[pid]] = _DIRS[d]
+    netnames = {}
+    for name, b in zip(cols["net_name"], cols["net_bit"]):
+        netnames.setdefault(S[name], {"bits": []})["bits"].append(b)
+    ports = {}
+    for name, d, b in zip(cols["port_name"], cols["port_dir"], cols["port_bit"]):
+        ports.setdefault(S[name], {"direction": _DIRS[d], "bits": []})["bits"].append(b)
+    return {"modules": {"": {"ports": ports, "cell_types": cell_types,
+                             "cells": cells, "netnames": netnames}}}
+
+
+def directions(doc):
+    """``{cell: port_directions}`` after expansion — what a sidecar must keep."""
+    return {c: cell["port_directions"]
+            for module in expand(doc)["modules"].values()
+            for c, cell in module["cells"].items()}
+
+
+def load(path):
+    """Load a netlistsvg document from JSON or ``.svgnet`` (by extension)."""
+    if path.endswith(".svgnet"):
+        return load_binary(path)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compact(doc):
+    """Move repeated ``port_directions`` of a plain document into ``cell_types``."""
+    modules = {}
+    for name, module in doc["modules"].items():
+        cell_types = dict(module.get("cell_types", {}))
+        cells = {}
+        for c, cell in module.get("cells", {}).items():
+            cell = dict(cell)
+            dirs = cell.pop("port_directions", None)
+            if dirs is not None:
+                shared = cell_types.setdefault(cell["type"], {"port_directions": dirs})
+                if shared["port_directions"] != dirs:
+                    cell["port_directions"] = dirs
+            cells[c] = cell
+        modules[name] = dict(module, cell_types=cell_types, cells=cells)
+    return {"modules": modules}
+
+
+if __name__ == "__main__":
+    # python svg_json.py schematic_1.svg.json  ->  schematic_1.svg.min.json + .svgnet
+    for src in sys.argv[1:]:
+        doc = compact(load(src))
+        dst = src[:-5] + ".min.json" if src.endswith(".json") else src + ".json"
+        save(doc, dst)
+        if directions(load_binary(sidecar_path(dst))) != directions(doc):
+            sys.exit(f"⚠ {sidecar_path(dst)}: port directions do not survive the round trip")
+        print(f"✓ {src} → {dst} + {sidecar_path(dst)}")
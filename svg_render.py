@@ -0,0 +1,414 @@
+# ---------------------------------------------------------------------
+# svg_render.py  –  in-process schematic SVG renderer (no netlistsvg/ELK)
+# ---------------------------------------------------------------------
+"""
+Lays out the netlistsvg cells/connections JSON that SKiDL produces and
+writes the SVG directly, so ``generate_svg`` no longer has to start Node
+and the ELK layouter just to get a picture.
+
+Layout is a plain layered (Sugiyama-style) pass per connected group of
+cells: BFS layering along signal direction, two barycenter sweeps to cut
+crossings, then the groups are shelf-packed onto the page.  High-fanout
+nets (GND, VCC, ...) are drawn as named stubs instead of wires, which is
+what keeps designs with thousands of cells readable and linear in time.
+
+Symbol skins are parsed once per skin file (keyed by mtime) and emitted
+once per symbol type into ``<defs>``; every cell is a ``<use>`` of it.
+"""
+import argparse
+import copy
+import functools
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from collections import defaultdict, deque
+from xml.sax.saxutils import escape
+
+import svg_json
+
+SVG_NS = "http://www.w3.org/2000/svg"
+S_NS = "https://github.com/nturley/netlistsvg"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+
+BUNDLED_SKIN = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "schematic_1.svg_skin.svg")   # KiCad symbols, from a netlistsvg run
+MAX_FANOUT = 8          # nets with more pins than this become labels
+H_GAP, V_GAP = 40, 60   # spacing between cells / layers
+GROUP_GAP = 80          # spacing between packed groups
+STUB = 12               # pin escape length
+
+_DEFAULT_STYLE = """
+svg { stroke: #000; fill: none; stroke-linejoin: round; stroke-linecap: round; }
+text { fill: #000; stroke: none; font-size: 10px; font-family: "Courier New", monospace; }
+.symbol { stroke: #840000; }
+.part_ref_text { fill: #008484; }
+.net_name_text { font-style: italic; fill: #840084; }
+"""
+
+
+# ── 1. skin symbols ──────────────────────────────────────────────────────
+class Symbol:
+    """One skin template: size, port anchors and pre-rendered body."""
+
+    __slots__ = ("type", "width", "height", "ports", "body", "labels")
+
+    def __init__(self, type_, width, height, ports, body, labels):
+        self.type = type_
+        self.width = width
+        self.height = height
+        self.ports = ports          # pid -> (x, y, side)
+        self.body = body            # SVG markup without per-cell text
+        self.labels = labels        # [(attribute, markup-before, markup-after)]
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _strip(el):
+    """Drop the s: namespace and svg tag prefixes so fragments serialize clean."""
+    el.tag = _local(el.tag)
+    for key in [k for k in el.attrib if k.startswith("{")]:
+        if key.startswith("{%s}" % XLINK_NS):
+            el.attrib["xlink:" + _local(key)] = el.attrib.pop(key)
+        else:
+            del el.attrib[key]
+    for child in list(el):
+        if _local(child.tag) == "alias":
+            el.remove(child)
+        else:
+            _strip(child)
+    return el
+
+
+def _symbol_from_element(g):
+    sattr = lambda el, k, d=None: el.get("{%s}%s" % (S_NS, k), d)
+    ports = {}
+    for el in g.iter():
+        pid = sattr(el, "pid")
+        if pid is not None:
+            ports[pid] = (float(sattr(el, "x", 0)), float(sattr(el, "y", 0)),
+                          sattr(el, "position", "left"))
+
+    body, labels = [], []
+    for child in g:
+        attribute = sattr(child, "attribute")
+        child = _strip(copy.deepcopy(child))
+        if child.tag == "alias":
+            continue
+        if attribute:
+            child.text = "\x00"
+            before, after = ET.tostring(child, encoding="unicode").split("\x00")
+            labels.append((attribute, before, after))
+        else:
+            body.append(ET.tostring(child, encoding="unicode"))
+    markup = "".join(body).replace("$cell_id", "").replace("ns0:", "")
+    return Symbol(sattr(g, "type"), float(sattr(g, "width", 30)),
+                  float(sattr(g, "height", 30)), ports, markup, labels)
+
+
+@functools.lru_cache(maxsize=16)
+def _load_skin(path, mtime):
+    root = ET.parse(path).getroot()
+    symbols, style = {}, ""
+    for el in root:
+        tag = _local(el.tag)
+        if tag == "style":
+            style = el.text or ""
+        elif tag == "g" and el.get("{%s}type" % S_NS):
+            sym = _symbol_from_element(el)
+            symbols[sym.type] = sym
+            for alias in el.iter("{%s}alias" % S_NS):
+                symbols.setdefault(alias.get("val"), sym)
+    return symbols, style
+
+
+def load_skin(path):
+    """Parse a netlistsvg skin once; re-parsed only when the file changes."""
+    if not path or not os.path.exists(path):
+        return {}, _DEFAULT_STYLE
+    return _load_skin(os.path.abspath(path), os.path.getmtime(path))
+
+
+def skin_for(base):
+    """``<base>_skin.svg`` if an earlier SKiDL run left one, else the bundled skin."""
+    own = base + "_skin.svg"
+    return own if os.path.exists(own) else BUNDLED_SKIN
+
+
+@functools.lru_cache(maxsize=4096)
+def _generic_symbol(type_, inputs, outputs):
+    """Box symbol for cell types the skin does not know: inputs left, outputs right."""
+    rows = max(len(inputs), len(outputs), 1)
+    w, h = 80.0, 20.0 * (rows + 1)
+    ports, body = {}, ['<rect x="0" y="0" width="%g" height="%g" class="symbol"/>' % (w, h)]
+    for side, x, anchor, pids in (("left", 0.0, "start", inputs),
+                                  ("right", w, "end", outputs)):
+        for i, pid in enumerate(pids, 1):
+            ports[pid] = (x, 20.0 * i, side)
+            tx = x + 3 if side == "left" else x - 3
+            body.append('<text x="%g" y="%g" text-anchor="%s">%s</text>'
+                        % (tx, 20.0 * i + 3, anchor, escape(pid)))
+    labels = [("ref", '<text x="0" y="-4" class="part_ref_text">', "</text>")]
+    return Symbol(type_, w, h, ports, "".join(body), labels)
+
+
+# ── 2. layered layout ────────────────────────────────────────────────────
+def _cells_of(module):
+    """Normalise cells and top-level ports into one name -> cell mapping."""
+    cells = {c: dict(cell, port_directions=svg_json.port_directions(module, cell))
+             for c, cell in module.get("cells", {}).items()}
+    for name, port in module.get("ports", {}).items():
+        ext_in = port.get("direction", "input") == "input"
+        pid = "Y" if ext_in else "A"
+        cells[name] = {
+            "type": "inputExt" if ext_in else "outputExt",
+            "connections": {pid: port.get("bits", [])},
+            "port_directions": {pid: "output" if ext_in else "input"},
+            "attributes": {"ref": name},
+        }
+    return cells
+
+
+def _symbol_for(cell, symbols):
+    sym = symbols.get(cell["type"])
+    if sym is not None:
+        return sym
+    dirs = cell.get("port_directions", {})
+    pids = list(cell.get("connections", {})) or list(dirs)
+    ins = tuple(p for p in pids if dirs.get(p) != "output")
+    outs = tuple(p for p in pids if dirs.get(p) == "output")
+    return _generic_symbol(cell["type"], ins, outs)
+
+
+def _layer_group(members, succ, pred):
+    """BFS layering from the drivers of one connected group."""
+    roots = [c for c in members if not pred[c]] or [members[0]]
+    layer = {c: 0 for c in roots}
+    queue = deque(roots)
+    while queue:
+        c = queue.popleft()
+        for n in succ[c]:
+            if n not in layer:
+                layer[n] = layer[c] + 1
+                queue.append(n)
+    for c in members:               # cycles with no root left behind
+        layer.setdefault(c, 0)
+    layers = defaultdict(list)
+    for c in members:
+        layers[layer[c]].append(c)
+    return [layers[i] for i in sorted(layers)]
+
+
+def _order_layers(layers, adj):
+    """Two barycenter sweeps (down, then up) to reduce wire crossings."""
+    pos = {c: i for lay in layers for i, c in enumerate(lay)}
+    for sweep in (range(1, len(layers)), range(len(layers) - 2, -1, -1)):
+        for li in sweep:
+            def bary(c):
+                ns = [pos[n] for n in adj[c] if n in pos]
+                return sum(ns) / len(ns) if ns else pos[c]
+            layers[li].sort(key=bary)
+            for i, c in enumerate(layers[li]):
+                pos[c] = i
+    return layers
+
+
+def layout(module, symbols, max_fanout=MAX_FANOUT):
+    """Return ``(cells, placement, nets, size)`` for one netlistsvg module.
+
+    ``placement`` maps cell name to ``(x, y, Symbol)``; ``nets`` maps bit id
+    to its ``[(cell, pid), ...]`` pins.
+    """
+    cells = _cells_of(module)
+    names = sorted(cells)
+    sym = {c: _symbol_for(cells[c], symbols) for c in names}
+
+    nets = defaultdict(list)
+    for c in names:
+        for pid, bits in cells[c].get("connections", {}).items():
+            for b in bits:
+                if isinstance(b, int):
+                    nets[b].append((c, pid))
+
+    succ, pred, adj = defaultdict(set), defaultdict(set), defaultdict(set)
+    for pins in nets.values():
+        if not 2 <= len(pins) <= max_fanout:
+            continue
+        drivers = [c for c, p in pins
+                   if cells[c].get("port_directions", {}).get(p) == "output"]
+        if drivers:
+            edges = [(d, c) for d in drivers for c, _ in pins if c != d]
+        else:                          # passive net: chain in pin order
+            edges = [(pins[0][0], c) for c, _ in pins[1:] if c != pins[0][0]]
+        for a, b in edges:
+            succ[a].add(b)
+            pred[b].add(a)
+            adj[a].add(b)
+            adj[b].add(a)
+
+    # connected groups, in name order so output is stable between runs
+    seen, groups = set(), []
+    for c in names:
+        if c in seen:
+            continue
+        members, queue = [], deque([c])
+        seen.add(c)
+        while queue:
+            m = queue.popleft()
+            members.append(m)
+            for n in adj[m]:
+                if n not in seen:
+                    seen.add(n)
+                    queue.append(n)
+        groups.append(members)
+
+    boxes = []
+    for members in groups:
+        layers = _order_layers(_layer_group(members, succ, pred), adj)
+        widths = [sum(sym[c].width for c in lay) + H_GAP * (len(lay) - 1)
+                  for lay in layers]
+        heights = [max(sym[c].height for c in lay) for lay in layers]
+        gw = max(widths)
+        local, y = {}, 0.0
+        for lay, lw, lh in zip(layers, widths, heights):
+            x = (gw - lw) / 2
+            for c in lay:
+                local[c] = (x, y + (lh - sym[c].height) / 2)
+                x += sym[c].width + H_GAP
+            y += lh + V_GAP
+        boxes.append((gw, y - V_GAP, local))
+
+    # shelf-pack groups, tallest first, into a roughly 4:3 page
+    area = sum((w + GROUP_GAP) * (h + GROUP_GAP) for w, h, _ in boxes)
+    page_w = max(max((w for w, _, _ in boxes), default=0), (area * 4 / 3) ** 0.5)
+    placement, x, y, shelf_h, max_x = {}, 0.0, 0.0, 0.0, 0.0
+    for gw, gh, local in sorted(boxes, key=lambda b: -b[1]):
+        if x > 0 and x + gw > page_w:
+            x, y, shelf_h = 0.0, y + shelf_h + GROUP_GAP, 0.0
+        for c, (lx, ly) in local.items():
+            placement[c] = (x + lx, y + ly, sym[c])
+        x += gw + GROUP_GAP
+        shelf_h = max(shelf_h, gh)
+        max_x = max(max_x, x - GROUP_GAP)
+    return cells, placement, nets, (max_x, y + shelf_h)
+
+
+# ── 3. SVG output ────────────────────────────────────────────────────────
+_OUT = {"left": (-1, 0), "right": (1, 0), "top": (0, -1), "bottom": (0, 1)}
+
+
+def _net_names(module):
+    names = {}
+    for name, info in module.get("netnames", {}).items():
+        for b in info.get("bits", []):
+            names.setdefault(b, name)
+    return names
+
+
+def _pin_xy(placement, cell, pid):
+    x, y, sym = placement[cell]
+    px, py, side = sym.ports.get(pid, (0.0, 0.0, "left"))
+    dx, dy = _OUT.get(side, (-1, 0))
+    return x + px, y + py, x + px + dx * STUB, y + py + dy * STUB
+
+
+def _sym_id(type_):
+    return "sym-" + "".join(ch if ch.isalnum() else "_" for ch in type_)
+
+
+def render(netlist, skin=None, max_fanout=MAX_FANOUT):
+    """Render a netlistsvg JSON document (dict) to SVG text."""
+    symbols, style = load_skin(skin)
+    module = next(iter(netlist["modules"].values()))
+    cells, placement, nets, (w, h) = layout(module, symbols, max_fanout)
+    net_names = _net_names(module)
+
+    out = []
+    used = {s.type: s for _, _, s in placement.values()}
+    out.append("<defs>")
+    for t, s in used.items():
+        out.append('<g id="%s">%s</g>' % (_sym_id(t), s.body))
+    out.append("</defs>")
+
+    for c, (x, y, s) in placement.items():
+        out.append('<use xlink:href="#%s" x="%.3f" y="%.3f"/>' % (_sym_id(s.type), x, y))
+        attrs = dict(cells[c].get("attributes", {}))
+        attrs.setdefault("ref", c)
+        if s.labels:
+            out.append('<g transform="translate(%.3f,%.3f)">' % (x, y))
+            for attribute, before, after in s.labels:
+                out.append(before + escape(str(attrs.get(attribute, ""))) + after)
+            out.append("</g>")
+
+    wires, dots, stubs = [], [], []
+    for bit, pins in nets.items():
+        ends = [_pin_xy(placement, c, p) for c, p in pins]
+        if 2 <= len(pins) <= max_fanout:
+            trunk_y = sum(e[3] for e in ends) / len(ends)
+            xs = [e[2] for e in ends]
+            for px, py, ex, ey in ends:
+                wires.append("M%.2f,%.2fL%.2f,%.2fV%.2f" % (px, py, ex, ey, trunk_y))
+            wires.append("M%.2f,%.2fH%.2f" % (min(xs), trunk_y, max(xs)))
+            if len(pins) > 2:
+                dots.extend((ex, trunk_y) for _, _, ex, _ in ends)
+        else:
+            label = escape(net_names.get(bit, "#%s" % bit))
+            for px, py, ex, ey in ends:
+                wires.append("M%.2f,%.2fL%.2f,%.2f" % (px, py, ex, ey))
+                stubs.append('<text x="%.2f" y="%.2f" class="net_name_text">%s</text>'
+                             % (ex + 2, ey - 2, label))
+    out.append('<path class="symbol" d="%s"/>' % "".join(wires))
+    out.extend('<circle cx="%.2f" cy="%.2f" r="2" class="symbol" fill="#840000"/>' % d
+               for d in dots)
+    out.extend(stubs)
+
+    pad = 40
+    head = ('<svg xmlns="%s" xmlns:xlink="%s" width="%.0f" height="%.0f" '
+            'viewBox="%.0f %.0f %.0f %.0f">' % (SVG_NS, XLINK_NS, w + 2 * pad, h + 2 * pad,
+                                               -pad, -pad, w + 2 * pad, h + 2 * pad))
+    return "\n".join([head, "<style>%s</style>" % escape(style)] + out + ["</svg>"])
+
+
+def render_files(json_file, skin_file=None, svg_file=None, max_fanout=MAX_FANOUT):
+    """Re-render an existing ``*.json`` / ``*_skin.svg`` pair; returns the SVG path."""
+    netlist = svg_json.load(json_file)
+    base = os.path.splitext(json_file)[0]
+    svg_file = svg_file or base + ".svg"
+    with open(svg_file, "w", encoding="utf-8") as f:
+        f.write(render(netlist, skin_file or skin_for(base), max_fanout))
+    return svg_file
+
+
+# ── 4. SKiDL front end ───────────────────────────────────────────────────
+def generate_svg(file_=None, circuit=None, max_fanout=MAX_FANOUT):
+    """Drop-in for SKiDL's ``generate_svg`` that renders in-process.
+
+    Keeps SKiDL's file naming: ``<file_>.json`` (compact, plus its
+    ``.svgnet`` sidecar) is written next to the output ``<file_>.svg``.
+    Symbol graphics come from ``<file_>_skin.svg`` when an earlier SKiDL
+    run left one, otherwise from the skin bundled with the repo
+    (:data:`BUNDLED_SKIN`), so a fresh checkout does not draw boxes.
+    """
+    t0 = time.perf_counter()
+    base = file_ or os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    netlist = svg_json.netlistsvg_json(circuit)
+    svg_json.save(netlist, base + ".json")
+    with open(base + ".svg", "w", encoding="utf-8") as f:
+        f.write(render(netlist, skin_for(base), max_fanout))
+    n = len(netlist["modules"][""]["cells"])
+    print(f"✓ {base}.svg  ({n} cells, {(time.perf_counter() - t0) * 1e3:.1f} ms)")
+    return netlist
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="render a netlistsvg JSON file to SVG")
+    ap.add_argument("json_file")
+    ap.add_argument("--skin")
+    ap.add_argument("-o", "--output")
+    ap.add_argument("--max-fanout", type=int, default=MAX_FANOUT)
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    out = render_files(args.json_file, args.skin, args.output, args.max_fanout)
+    print(f"✓ {out}  ({(time.perf_counter() - t0) * 1e3:.1f} ms)")
@@ -0,0 +1,207 @@
+# ---------------------------------------------------------------------
+# svg_sheets.py  –  one schematic SVG per @subcircuit, cached + parallel
+# ---------------------------------------------------------------------
+"""
+Splits the netlistsvg document of a hierarchical SKiDL design into one
+sheet per ``@subcircuit`` (parts outside any subcircuit go on ``top``)
+and renders each sheet with :mod:`svg_render`.
+
+Nets that cross sheets become hierarchical ports named after the net, so
+every sheet is self-contained.  Each sheet is hashed on its own
+connectivity (bit ids renumbered locally, so an unrelated change on
+another sheet does not disturb it) and only sheets whose hash changed are
+laid out again; those are rendered in parallel worker processes.  An
+``index.html`` links all sheets and lists the nets they share.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+
+import svg_json
+import svg_render
+
+MANIFEST = "sheets.json"
+
+
+# ── 1. split ─────────────────────────────────────────────────────────────
+def sheet_of(part):
+    """Subcircuit path of a SKiDL part below the root, ``"top"`` for the root."""
+    hier = getattr(part, "hiertuple", None)
+    if not hier:
+        hier = str(getattr(part, "hierarchy", "top")).split(".")
+    return ".".join(hier[1:]) or "top"
+
+
+def split_netlist(netlist, sheet_for):
+    """Split a netlistsvg document into ``{sheet: document}``.
+
+    ``sheet_for`` maps cell name to sheet name; unknown cells go on ``top``.
+    """
+    module = next(iter(netlist["modules"].values()))
+    names = {}
+    for name, info in module.get("netnames", {}).items():
+        for b in info.get("bits", []):
+            names.setdefault(b, name)
+
+    cells = defaultdict(dict)
+    bit_sheets = defaultdict(set)
+    for c, cell in module.get("cells", {}).items():
+        sheet = sheet_for.get(c, "top")
+        cells[sheet][c] = cell
+        for bits in cell.get("connections", {}).values():
+            for b in bits:
+                bit_sheets[b].add(sheet)
+
+    sheets = {}
+    for sheet, members in cells.items():
+        remap = {}                 # global bit -> sheet-local bit, first-seen order
+        local = {}
+        for c in sorted(members):
+            cell = dict(members[c])
+            cell["connections"] = {
+                pid: [remap.setdefault(b, len(remap) + 2) if isinstance(b, int) else b
+                      for b in bits]
+                for pid, bits in sorted(cell.get("connections", {}).items())
+            }
+            local[c] = cell
+        ports, netnames = {}, {}
+        for b, lb in remap.items():
+            name = names.get(b, "N%s" % b)
+            netnames[name] = {"bits": [lb]}
+            if len(bit_sheets[b]) > 1:
+                ports[name] = {"direction": "input", "bits": [lb]}
+        types = module.get("cell_types", {})
+        cell_types = {t: types[t] for t in sorted({c["type"] for c in local.values()})
+                      if t in types}
+        sheets[sheet] = {"modules": {sheet: {"ports": ports, "cell_types": cell_types,
+                                             "cells": local, "netnames": netnames}}}
+    return sheets
+
+
+def sheet_hash(doc, *extra):
+    """Connectivity hash of one sheet (plus any render parameters)."""
+    blob = json.dumps([doc, extra], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+# ── 2. render ────────────────────────────────────────────────────────────
+def _file_name(sheet):
+    return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in sheet) + ".svg"
+
+
+def _render_sheet(job):
+    """Worker entry point; must stay top-level so it pickles on Windows."""
+    doc, skin, path, max_fanout = job
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(svg_render.render(doc, skin, max_fanout))
+    return path
+
+
+def _write_index(out_dir, sheets, hashes):
+    shared = defaultdict(list)
+    for sheet, doc in sheets.items():
+        for port in next(iter(doc["modules"].values()))["ports"]:
+            shared[port].append(sheet)
+    rows = []
+    for sheet in sorted(sheets):
+        module = next(iter(sheets[sheet]["modules"].values()))
+        links = ", ".join(
+            "%s&nbsp;→&nbsp;%s" % (escape(net), " ".join(
+                '<a href="%s">%s</a>' % (_file_name(s), escape(s))
+                for s in shared[net] if s != sheet))
+            for net in sorted(module["ports"]))
+        rows.append('<tr><td><a href="%s">%s</a></td><td>%d</td><td>%s</td>'
+                    '<td><code>%s</code></td></tr>'
+                    % (_file_name(sheet), escape(sheet), len(module["cells"]),
+                       links, hashes[sheet][:10]))
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write("<!doctype html><meta charset='utf-8'><title>schematic sheets</title>"
+                "<table border=1 cellpadding=4><tr><th>sheet</th><th>cells</th>"
+                "<th>shared nets</th><th>hash</th></tr>%s</table>" % "".join(rows))
+
+
+def render_sheets(netlist, sheet_for, out_dir, skin=None, jobs=None,
+                  max_fanout=svg_render.MAX_FANOUT):
+    """Render every changed sheet into ``out_dir``; returns ``(rendered, skipped)``."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            old = json.load(f)
+    except (OSError, ValueError):
+        old = {}
+
+    skin_key = os.path.getmtime(skin) if skin and os.path.exists(skin) else None
+    sheets = split_netlist(netlist, sheet_for)
+    hashes = {s: sheet_hash(doc, skin_key, max_fanout) for s, doc in sheets.items()}
+
+    todo, skipped = [], []
+    for sheet, doc in sheets.items():
+        path = os.path.join(out_dir, _file_name(sheet))
+        if old.get(sheet) == hashes[sheet] and os.path.exists(path):
+            skipped.append(sheet)
+        else:
+            todo.append((sheet, (doc, skin, path, max_fanout)))
+
+    if len(todo) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(_render_sheet, [job for _, job in todo]))
+    else:
+        for _, job in todo:
+            _render_sheet(job)
+
+    for stale in set(old) - set(sheets):
+        try:
+            os.remove(os.path.join(out_dir, _file_name(stale)))
+        except OSError:
+            pass
+    _write_index(out_dir, sheets, hashes)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(hashes, f, indent=1, sort_keys=True)
+    return [s for s, _ in todo], skipped
+
+
+# ── 3. SKiDL front end ───────────────────────────────────────────────────
+def generate_sheets(file_=None, circuit=None, jobs=None, max_fanout=svg_render.MAX_FANOUT):
+    """Per-subcircuit counterpart of ``svg_render.generate_svg``.
+
+    Writes ``<file_>_sheets/<subcircuit>.svg`` plus ``index.html``; an
+    existing ``<file_>_skin.svg`` (else the bundled skin) supplies the
+    symbol graphics.
+    """
+    from skidl import default_circuit
+
+    t0 = time.perf_counter()
+    circuit = circuit or default_circuit
+    base = file_ or os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    netlist = svg_json.netlistsvg_json(circuit)
+    sheet_for = {part.ref: sheet_of(part) for part in circuit.parts}
+    done, skipped = render_sheets(netlist, sheet_for, base + "_sheets",
+                                  svg_render.skin_for(base), jobs, max_fanout)
+    print(f"✓ {base}_sheets/  ({len(done)} sheets rendered, {len(skipped)} unchanged, "
+          f"{(time.perf_counter() - t0) * 1e3:.1f} ms)")
+    return done, skipped
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="split a netlistsvg JSON file into sheets")
+    ap.add_argument("json_file", help="netlistsvg JSON or .svgnet")
+    ap.add_argument("sheet_map", help='JSON file {"<cell>": "<sheet>", ...}')
+    ap.add_argument("--skin", help="symbol skin (default: <json_file>_skin.svg, else bundled)")
+    ap.add_argument("-o", "--out-dir")
+    ap.add_argument("-j", "--jobs", type=int)
+    args = ap.parse_args()
+    netlist = svg_json.load(args.json_file)             # JSON or .svgnet
+    with open(args.sheet_map, encoding="utf-8") as f:
+        sheet_for = json.load(f)
+    base = os.path.splitext(args.json_file)[0]
+    out_dir = args.out_dir or base + "_sheets"
+    done, skipped = render_sheets(netlist, sheet_for, out_dir,
+                                  args.skin or svg_render.skin_for(base), args.jobs)
+    print(f"✓ {out_dir}/  ({len(done)} rendered, {len(skipped)} unchanged)")
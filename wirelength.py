@@ -0,0 +1,103 @@
+# ---------------------------------------------------------------------
+# wirelength.py  –  net/pin arrays and half-perimeter wirelength (HPWL)
+# ---------------------------------------------------------------------
+"""
+Flattens a :class:`board_model.Board` into CSR-style NumPy arrays so
+placement cost can be evaluated without touching Python objects:
+
+* pins:  ``pin_fp`` (owning footprint), ``pin_local`` (footprint frame);
+* nets:  ``net_ptr`` / ``net_pin``  – pins of net k are
+  ``net_pin[net_ptr[k]:net_ptr[k + 1]]``;
+* parts: ``fp_ptr`` / ``fp_net``    – nets touching footprint i.
+
+Full HPWL is one ``reduceat`` pass; :meth:`NetTable.net_hpwl` recomputes
+only the nets handed to it, which is what incremental movers use.
+"""
+import numpy as np
+
+from board_model import rotate
+
+
+class NetTable:
+    """Pins and multi-pin nets of a board as flat arrays."""
+
+    def __init__(self, board, max_degree=None, skip=()):
+        pads = board.pads()
+        names = pads["net_names"]
+        net = pads["net"]
+        counts = np.bincount(net[net >= 0], minlength=len(names))
+        keep_net = counts >= 2
+        if max_degree:
+            keep_net &= counts <= max_degree
+        for name in skip:
+            if name in names:
+                keep_net[names.index(name)] = False
+
+        pin = np.flatnonzero((net >= 0) & keep_net[np.maximum(net, 0)])
+        self.n_fp = len(board.footprints)
+        self.pin_fp = pads["fp"][pin]
+        self.pin_local = pads["local"][pin]
+        old_net = net[pin]
+
+        kept = np.flatnonzero(keep_net)
+        renum = np.full(len(names), -1, dtype=np.int64)
+        renum[kept] = np.arange(len(kept))
+        self.pin_net = renum[old_net]
+        self.names = [names[i] for i in kept]
+
+        order = np.argsort(self.pin_net, kind="stable")
+        self.net_pin = order
+        self.net_ptr = np.concatenate([[0], np.cumsum(np.bincount(self.pin_net,
+                                                                  minlength=len(kept)))])
+
+        pairs = np.unique(np.stack([self.pin_fp, self.pin_net], 1), axis=0) \
+            if len(pin) else np.zeros((0, 2), dtype=np.int64)
+        self.fp_net = pairs[:, 1]
+        self.fp_ptr = np.concatenate([[0], np.cumsum(np.bincount(pairs[:, 0],
+                                                                 minlength=self.n_fp))])
+        # pins of footprint i, for moving one part's pins at a time
+        fp_order = np.argsort(self.pin_fp, kind="stable")
+        self.fp_pin = fp_order
+        self.fp_pin_ptr = np.concatenate([[0], np.cumsum(np.bincount(self.pin_fp,
+                                                                     minlength=self.n_fp))])
+
+    @property
+    def n_nets(self):
+        return len(self.names)
+
+    def pin_xy(self, xy, rot=None):
+        """World pin positions ``(P, 2)`` for a placement."""
+        rot = np.zeros(self.n_fp) if rot is None else np.asarray(rot, dtype=float)
+        return rotate(self.pin_local, rot[self.pin_fp]) + np.asarray(xy)[self.pin_fp]
+
+    def per_net(self, pin_xy):
+        """HPWL of every net, ``(K,)`` — one vectorized pass."""
+        if not self.n_nets:
+            return np.zeros(0)
+        p = pin_xy[self.net_pin]
+        start = self.net_ptr[:-1]
+        lo = np.minimum.reduceat(p, start, axis=0)
+        hi = np.maximum.reduceat(p, start, axis=0)
+        return (hi - lo).sum(1)
+
+    def hpwl(self, xy, rot=None):
+        return float(self.per_net(self.pin_xy(xy, rot)).sum())
+
+    def nets_of(self, fp):
+        return self.fp_net[self.fp_ptr[fp]:self.fp_ptr[fp + 1]]
+
+    def net_hpwl(self, pin_xy, nets):
+        """HPWL of just ``nets`` (cost is the sum of their degrees)."""
+        total = 0.0
+        for k in nets:
+            p = pin_xy[self.net_pin[self.net_ptr[k]:self.net_ptr[k + 1]]]
+            span = p.max(0) - p.min(0)
+            total += span[0] + span[1]
+        return total
+
+
+def hpwl(board, xy=None, rot=None, max_degree=None):
+    """Total HPWL of ``board`` (current placement unless ``xy`` is given)."""
+    if xy is None:
+        xy, rot = board.placement()
+    return NetTable(board, max_degree).hpwl(xy, rot)
@@ -0,0 +1,411 @@
+# ---------------------------------------------------------------------
+# zone_fill.py  –  raster copper pour, islands and plane connectivity
+# ---------------------------------------------------------------------
+"""
+Whether a GND / power plane actually reaches every pad is only visible
+after KiCad's zone filler has run.  This approximates it headlessly on a
+raster of ``res`` mm cells:
+
+1. the zone polygon (rectangle or any outline; even-odd scanline fill)
+   minus the board edge grown by ``edge_clearance``;
+2. copper of other nets on the layer — pads, tracks, vias — grown by the
+   zone clearance is cut out, using the exact distance to each shape;
+3. same-net tracks and vias join solidly; same-net pads get a thermal
+   relief: a ``thermal_gap`` ring cut round the pad, bridged by four
+   ``spoke_width`` spokes along the pad axes (``connect="solid"`` skips it);
+4. necks thinner than ``min_width`` are opened away (erode + dilate);
+5. connected components (4-neighbour) label the result.
+
+A component without any same-net copper is an *island* (KiCad would
+remove it); a pad whose component holds no pour is *unconnected*; pads on
+different components mean the plane is *split*.  Labelling runs on row
+runs: each row's filled runs come from one ``np.diff``, runs overlapping
+in the next row are found with ``searchsorted`` and merged in a
+union-find, so the cost follows the number of runs, not cells.
+
+Zones come from the board file, or ``--zone NET:LAYER[:x0,y0,x1,y1]``
+(default area: the outline's bounding box).  A zone passes when every
+pad of its net lies inside it and is connected, the plane is in one
+piece, and at least one pad connects it.
+
+    python zone_fill.py board.kicad_pcb --zone GND:B.Cu --png gnd.png
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+import sexpr
+from board_model import COPPER, Board, Via, copper_layers
+from congestion import save_png
+from maze_router import EDGE_CLEARANCE
+
+RES = 0.1                   # mm per raster cell
+CLEARANCE = 0.3             # zone copper to other nets
+MIN_WIDTH = 0.25
+THERMAL_GAP = 0.5
+SPOKE_WIDTH = 0.5
+
+
+class Zone:
+    __slots__ = ("net", "layer", "polygon", "clearance", "min_width", "thermal_gap",
+                 "spoke_width", "connect")
+
+    def __init__(self, net, layer, polygon, clearance=CLEARANCE, min_width=MIN_WIDTH,
+                 thermal_gap=THERMAL_GAP, spoke_width=SPOKE_WIDTH, connect="thermal"):
+        self.net, self.layer, self.polygon = net, layer, [tuple(p) for p in polygon]
+        self.clearance, self.min_width = clearance, min_width
+        self.thermal_gap, self.spoke_width, self.connect = thermal_gap, spoke_width, connect
+
+
+def zones_from_board(board):
+    """Zones of a board loaded from a file (one per copper layer listed)."""
+    out = []
+    for n in sexpr.find_all(board._tree or [], "zone"):
+        net = str(sexpr.value(n, "net_name", ""))
+        layers = sexpr.find(n, "layers")
+        names = [str(l) for l in layers[1:]] if layers else [str(sexpr.value(n, "layer", ""))]
+        poly = sexpr.find(n, "polygon")
+        pts = [(float(p[1]), float(p[2])) for p in sexpr.find_all(sexpr.find(poly, "pts"), "xy")] \
+            if poly else []
+        cp = sexpr.find(n, "connect_pads")
+        fill = sexpr.find(n, "fill") or []
+        kw = {"clearance": float(sexpr.value(cp, "clearance", CLEARANCE)) if cp else CLEARANCE,
+              "min_width": float(sexpr.value(n, "min_thickness", MIN_WIDTH)),
+              "thermal_gap": float(sexpr.value(fill, "thermal_gap", THERMAL_GAP)),
+              "spoke_width": float(sexpr.value(fill, "thermal_bridge_width", SPOKE_WIDTH)),
+              "connect": "solid" if cp and "yes" in cp[1:2] else "thermal"}
+        for layer in names:
+            if layer in COPPER and net and pts:
+                out.append(Zone(net, layer, pts, **kw))
+    return out
+
+
+# ── raster helpers ───────────────────────────────────────────────────────
+class Raster:
+    """Cell-centre grid over ``bounds`` at ``res`` mm."""
+
+    def __init__(self, bounds, res=RES):
+        x0, y0, x1, y1 = bounds
+        self.res = res
+        self.nx = max(int(math.ceil((x1 - x0) / res)), 1)
+        self.ny = max(int(math.ceil((y1 - y0) / res)), 1)
+        self.x0, self.y0 = x0, y0
+        self.xs = x0 + (np.arange(self.nx) + 0.5) * res
+        self.ys = y0 + (np.arange(self.ny) + 0.5) * res
+
+    def window(self, box, grow):
+        """``(slice y, slice x, X, Y)`` of cell centres inside ``box`` + ``grow``."""
+        r = self.res
+        ix0 = max(int(math.floor((box[0] - grow - self.x0) / r)), 0)
+        iy0 = max(int(math.floor((box[1] - grow - self.y0) / r)), 0)
+        ix1 = min(int(math.ceil((box[2] + grow - self.x0) / r)), self.nx)
+        iy1 = min(int(math.ceil((box[3] + grow - self.y0) / r)), self.ny)
+        if ix0 >= ix1 or iy0 >= iy1:
+            return None
+        X, Y = np.meshgrid(self.xs[ix0:ix1], self.ys[iy0:iy1])
+        return slice(iy0, iy1), slice(ix0, ix1), X, Y
+
+    def cell(self, x, y):
+        ix = int((x - self.x0) / self.res)
+        iy = int((y - self.y0) / self.res)
+        return (iy, ix) if 0 <= ix < self.nx and 0 <= iy < self.ny else None
+
+    def polygon(self, pts):
+        """Even-odd fill of a polygon: crossings per row toggled with a cumsum."""
+        p = np.asarray(pts, dtype=float)
+        a, b = p, np.roll(p, -1, axis=0)
+        toggles = np.zeros((self.ny, self.nx + 1), dtype=np.int32)
+        ys = self.ys
+        for (x1, y1), (x2, y2) in zip(a.tolist(), b.tolist()):
+            if y1 == y2:
+                continue
+            rows = np.flatnonzero((ys >= min(y1, y2)) & (ys < max(y1, y2)))
+            x = x1 + (ys[rows] - y1) * (x2 - x1) / (y2 - y1)
+            col = np.clip(np.ceil((x - self.x0) / self.res - 0.5), 0, self.nx).astype(int)
+            np.add.at(toggles, (rows, col), 1)
+        return (np.cumsum(toggles, axis=1)[:, :-1] & 1).astype(bool)
+
+
+def _seg_dist(X, Y, x1, y1, x2, y2):
+    dx, dy = x2 - x1, y2 - y1
+    L = dx * dx + dy * dy
+    t = np.zeros_like(X) if L == 0 else np.clip(((X - x1) * dx + (Y - y1) * dy) / L, 0, 1)
+    return np.hypot(X - x1 - t * dx, Y - y1 - t * dy)
+
+
+class _PadGeo:
+    """World pad with a vectorized distance-to-copper."""
+
+    __slots__ = ("x", "y", "a", "hw", "hh", "shape", "net", "layers", "name", "box")
+
+    def __init__(self, fp, p, x, y):
+        self.x, self.y, self.a = x, y, fp.rot + p.angle
+        self.hw, self.hh, self.shape = p.w / 2, p.h / 2, p.shape
+        self.net, self.layers, self.name = p.net, copper_layers(p, fp.side), f"{fp.ref}.{p.number}"
+        r = math.hypot(p.w, p.h) / 2
+        self.box = (x - r, y - r, x + r, y + r)
+
+    def frame(self, X, Y):
+        """Cell centres in the pad frame (inverse of :func:`board_model.rotate`)."""
+        c, s = math.cos(math.radians(self.a)), math.sin(math.radians(self.a))
+        dx, dy = X - self.x, Y - self.y
+        return dx * c - dy * s, dx * s + dy * c
+
+    def dist(self, X, Y):
+        u, v = self.frame(X, Y)
+        if self.shape == "circle":
+            return np.hypot(u, v) - self.hw
+        if self.shape == "oval":
+            r = min(self.hw, self.hh)
+            return _seg_dist(u, v, -(self.hw - r), -(self.hh - r), self.hw - r, self.hh - r) - r
+        return np.hypot(np.maximum(np.abs(u) - self.hw, 0), np.maximum(np.abs(v) - self.hh, 0))
+
+
+# ── connected components ─────────────────────────────────────────────────
+def label(mask):
+    """4-connected components of a boolean image: ``(labels, n)`` with
+    labels ``0 … n-1`` on filled cells and -1 elsewhere."""
+    ny, nx = mask.shape
+    edge = np.diff(np.pad(mask.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    rs, cs = np.nonzero(edge == 1)
+    _, ce = np.nonzero(edge == -1)
+    n = len(rs)
+    lab = np.full(mask.shape, -1, dtype=np.int32)
+    if not n:
+        return lab, 0
+    W = nx + 2
+    key_s, key_e = rs * W + cs, rs * W + ce
+    below = rs > 0
+    b = np.flatnonzero(below)
+    lo = np.searchsorted(key_e, (rs[b] - 1) * W + cs[b], "right")
+    hi = np.searchsorted(key_s, (rs[b] - 1) * W + ce[b], "left")
+    cnt = np.maximum(hi - lo, 0)
+    src = np.repeat(b, cnt)
+    dst = np.repeat(lo, cnt) + np.arange(cnt.sum()) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+    parent = list(range(n))
+    for i, j in zip(src.tolist(), dst.tolist()):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        while parent[j] != j:
+            parent[j] = parent[parent[j]]
+            j = parent[j]
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+    root = np.array(parent)
+    while True:                                       # flatten
+        nxt = root[root]
+        if (nxt == root).all():
+            break
+        root = nxt
+    _, comp = np.unique(root, return_inverse=True)
+    length = ce - cs
+    flat = np.repeat(rs * nx + cs - (np.cumsum(length) - length), length) + np.arange(length.sum())
+    lab.ravel()[flat] = np.repeat(comp, length)
+    return lab, int(comp.max()) + 1
+
+
+# ── the filler ───────────────────────────────────────────────────────────
+def fill(board, zone, res=RES, edge_clearance=EDGE_CLEARANCE, pad_xy=None):
+    """Fill ``zone`` on ``board``: ``{"raster", "fill", "labels", "islands",
+    "connected", "unconnected", "outside", "groups", "area"}``."""
+    poly = zone.polygon
+    xs, ys = [p[0] for p in poly], [p[1] for p in poly]
+    ras = Raster((min(xs), min(ys), max(xs), max(ys)), res)
+    area = ras.polygon(poly)
+    block = np.zeros_like(area)
+    own = np.zeros_like(area)                        # same-net copper
+    half = res / 2
+
+    for x1, y1, x2, y2 in board.outline:             # board edge
+        w = ras.window((min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)), edge_clearance + res)
+        if w:
+            sy, sx, X, Y = w
+            block[sy, sx] |= _seg_dist(X, Y, x1, y1, x2, y2) < edge_clearance + half
+    if board.outline:
+        inside = ras.polygon([(s[0], s[1]) for s in board.outline]) if _closed(board.outline) \
+            else np.ones_like(area)
+        area &= inside
+
+    if pad_xy is None:
+        pad_xy = board.pad_xy()
+    pads, k = [], 0
+    for fp in board.footprints:
+        for p in fp.pads:
+            pads.append(_PadGeo(fp, p, *map(float, pad_xy[k])))
+            k += 1
+    thermal = zone.connect == "thermal"
+    mine = []
+    for pg in pads:
+        if zone.layer not in pg.layers:
+            continue
+        same = pg.net == zone.net
+        grow = (zone.thermal_gap if same else zone.clearance) + res
+        w = ras.window(pg.box, grow)
+        if not w:
+            if same:
+                mine.append((pg, None))
+            continue
+        sy, sx, X, Y = w
+        d = pg.dist(X, Y)
+        if not same:
+            block[sy, sx] |= d < zone.clearance + half
+            continue
+        mine.append((pg, (sy, sx)))
+        own[sy, sx] |= d <= 0
+        if thermal:
+            u, v = pg.frame(X, Y)
+            spoke = (np.abs(u) <= zone.spoke_width / 2) | (np.abs(v) <= zone.spoke_width / 2)
+            block[sy, sx] |= (d > 0) & (d < zone.thermal_gap + half) & ~spoke
+    for obj in list(board.tracks) + list(board.vias):
+        if isinstance(obj, Via):
+            seg, r = (obj.x, obj.y, obj.x, obj.y), obj.size / 2
+        elif obj.layer == zone.layer:
+            seg, r = (obj.x1, obj.y1, obj.x2, obj.y2), obj.width / 2
+        else:
+            continue
+        same = obj.net == zone.net
+        w = ras.window((min(seg[0], seg[2]) - r, min(seg[1], seg[3]) - r,
+                        max(seg[0], seg[2]) + r, max(seg[1], seg[3]) + r),
+                       0 if same else zone.clearance + res)
+        if not w:
+            continue
+        sy, sx, X, Y = w
+        d = _seg_dist(X, Y, *seg) - r
+        if same:
+            own[sy, sx] |= d <= 0
+        else:
+            block[sy, sx] |= d < zone.clearance + half
+
+    pour = area & ~block
+    k = int(round(zone.min_width / 2 / res))
+    if k > 0:
+        pour = _dilate(_erode(pour, k), k) & pour
+    copper = pour | (own & area)
+    labels, n = label(copper)
+
+    has_pour = np.bincount(labels[pour & ~own], minlength=n) > 0 if n else np.zeros(0, bool)
+    has_own = np.bincount(labels[own & (labels >= 0)], minlength=n) > 0 if n else np.zeros(0, bool)
+    size = np.bincount(labels[labels >= 0], minlength=n)
+    islands = []
+    for c in np.flatnonzero(~has_own).tolist():
+        iy, ix = np.nonzero(labels == c)
+        islands.append({"area": float(size[c] * res * res),
+                        "x": float(ras.xs[ix].mean()), "y": float(ras.ys[iy].mean())})
+    connected, unconnected, outside, groups = [], [], [], {}
+    for pg, win in mine:
+        cell = ras.cell(pg.x, pg.y)
+        c = labels[cell] if cell is not None else -1
+        if c < 0:
+            outside.append(pg.name)
+        elif has_pour[c]:
+            connected.append(pg.name)
+            groups.setdefault(int(c), []).append(pg.name)
+        else:
+            unconnected.append(pg.name)
+    return {"zone": zone, "raster": ras, "fill": pour, "copper": copper, "labels": labels,
+            "islands": islands, "connected": connected, "unconnected": unconnected,
+            "outside": outside, "groups": list(groups.values()),
+            "area": float(pour.sum() * res * res)}
+
+
+def _closed(outline):
+    """Do the Edge.Cuts segments form one loop in drawing order?"""
+    return all(math.isclose(a[2], b[0], abs_tol=1e-3) and math.isclose(a[3], b[1], abs_tol=1e-3)
+               for a, b in zip(outline, outline[1:] + outline[:1]))
+
+
+def _erode(m, k):
+    out = m.copy()
+    for axis in (0, 1):
+        acc = out.copy()
+        for d in range(1, k + 1):
+            for s in (d, -d):
+                sh = np.roll(out, s, axis=axis)
+                cut = [slice(None)] * 2
+                cut[axis] = slice(0, d) if s > 0 else slice(-d, None)
+                sh[tuple(cut)] = False
+                acc &= sh
+        out = acc
+    return out
+
+
+def _dilate(m, k):
+    return ~_erode(~m, k)
+
+
+def write_png(path, result, scale=1):
+    """Pour (copper), same-net copper (gold), islands (red), unconnected pads (magenta)."""
+    lab, copper, pour = result["labels"], result["copper"], result["fill"]
+    img = np.full(lab.shape + (3,), 24, dtype=np.uint8)
+    n = int(lab.max()) + 1
+    island = np.zeros(max(n, 1), bool)
+    has_own = np.bincount(lab[(copper & ~pour) & (lab >= 0)], minlength=n) > 0
+    island[:n] = ~has_own
+    img[pour] = (184, 115, 51)
+    img[copper & ~pour] = (230, 190, 60)
+    img[(lab >= 0) & island[np.maximum(lab, 0)]] = (220, 40, 40)
+    save_png(path, img.repeat(scale, 0).repeat(scale, 1))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="raster zone fill and plane connectivity")
+    ap.add_argument("board", nargs="?", help=".kicad_pcb file (default: board open in KiCad)")
+    ap.add_argument("--zone", action="append", default=[], metavar="NET:LAYER[:X0,Y0,X1,Y1]")
+    ap.add_argument("--res", type=float, default=RES, help="mm per cell")
+    ap.add_argument("--clearance", type=float, default=CLEARANCE)
+    ap.add_argument("--solid", action="store_true", help="connect pads solidly (no thermals)")
+    ap.add_argument("--png", help="image of the (first) zone")
+    args = ap.parse_args(argv)
+    board = Board.load(args.board) if args.board else Board.from_pcbnew()
+    zones = []
+    for spec in args.zone:
+        parts = spec.split(":")
+        if len(parts) > 2:
+            x0, y0, x1, y1 = map(float, parts[2].split(","))
+        else:
+            xy = board.pad_xy()
+            x0, y0, x1, y1 = board.outline_bbox() or (*xy.min(0), *xy.max(0))
+        zones.append(Zone(parts[0], parts[1] if len(parts) > 1 else "B.Cu",
+                          [(x0, y0), (x1, y0), (x1, y1), (x0, y1)], args.clearance,
+                          connect="solid" if args.solid else "thermal"))
+    if not zones:
+        zones = zones_from_board(board)
+    if not zones:
+        print("⚠ the board has no zones; give one with --zone NET:LAYER")
+        return 1
+    pad_xy = board.pad_xy()
+    bad = 0
+    for k, zone in enumerate(zones):
+        t0 = time.perf_counter()
+        r = fill(board, zone, args.res, pad_xy=pad_xy)
+        ms = (time.perf_counter() - t0) * 1e3
+        ras = r["raster"]
+        split = len(r["groups"]) > 1
+        floating = not r["connected"]                    # the whole pour is an island
+        failed = len(r["unconnected"]) + len(r["outside"]) + split + floating
+        print(f"{'⚠' if failed else '✓'} {zone.net} on {zone.layer}: "
+              f"{r['area']:.0f} mm² poured, {len(r['connected'])} pads connected, "
+              f"{len(r['unconnected'])} unconnected, {len(r['outside'])} outside the zone, "
+              f"{len(r['islands'])} islands ({ras.nx} × {ras.ny} cells, {ms:.0f} ms)")
+        if r["unconnected"]:
+            print(f"    unconnected: {', '.join(r['unconnected'])}")
+        if r["outside"]:
+            print(f"    outside the zone: {', '.join(r['outside'])}")
+        if floating:
+            print("    no pad connected: the pour floats")
+        if split:
+            print(f"    plane split into {len(r['groups'])} parts: "
+                  + " | ".join(", ".join(g[:4]) + (" …" if len(g) > 4 else "") for g in r["groups"]))
+        for isl in sorted(r["islands"], key=lambda i: -i["area"])[:5]:
+            print(f"    island {isl['area']:7.2f} mm² at ({isl['x']:.1f}, {isl['y']:.1f})")
+        if args.png and k == 0:
+            write_png(args.png, r)
+        bad += failed
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())